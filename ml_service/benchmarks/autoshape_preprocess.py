@@ -0,0 +1,95 @@
+"""
+AutoShape pre-processing: letterbox + stack + transpose + /255 against letterboxing into reused buffers.
+
+Both paths turn the same list of uint8 RGB images into the model's BCHW float input; the
+outputs are compared for equality. Allocations are counted with tracemalloc (NumPy and
+OpenCV-through-NumPy allocations; torch's own allocator is not traced) over steady-state calls.
+
+Usage:
+    $ python benchmarks/autoshape_preprocess.py --images path/to/captures --batch-size 1 8 --size 640
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import torch
+from PIL import Image
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1] / "yolov5"  # YOLOv5 root directory
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))  # ahead of ml_service/utils.py
+
+from models.common import AutoShape, _preprocess_buffers  # noqa: E402
+from utils.augmentations import letterbox  # noqa: E402
+from utils.general import make_divisible  # noqa: E402
+
+
+def previous(ims, shape, p):
+    """The previous AutoShape path"""
+    x = [letterbox(im, shape, auto=False)[0] for im in ims]  # pad
+    x = np.ascontiguousarray(np.array(x).transpose((0, 3, 1, 2)))  # stack and BHWC to BCHW
+    return torch.from_numpy(x).to(p.device).type_as(p) / 255  # uint8 to fp16/32
+
+
+def pooled(ims, shape, p):
+    """The AutoShape path: letterbox into pooled buffers, returned to the pool as AutoShape does after inference"""
+    x, lease = AutoShape._preprocess(ims, shape, p)
+    _preprocess_buffers.release(*lease)
+    return x
+
+
+def inference_shape(ims, size, stride=32):
+    shape1 = [[int(y * size / max(im.shape[:2])) for y in im.shape[:2]] for im in ims]
+    return [make_divisible(x, stride) for x in np.array(shape1).max(0)]
+
+
+def measure(fn, ims, shape, p, n):
+    with torch.inference_mode():
+        fn(ims, shape, p)  # buffers and caches
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        t = time.perf_counter()
+        for _ in range(n):
+            fn(ims, shape, p)
+        dt = (time.perf_counter() - t) / n
+        stats = tracemalloc.take_snapshot().compare_to(before, "lineno")
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    allocations = sum(max(s.count_diff, 0) for s in stats)  # blocks still live after the loop
+    return dt, allocations, peak
+
+
+def run(images, batch_size=(1, 8), size=640, device="cpu", iterations=50):
+    files = sorted(p for p in Path(images).rglob("*") if p.suffix.lower() in {".jpg", ".jpeg", ".png"})
+    arrays = [np.asarray(Image.open(f).convert("RGB")) for f in files]
+    p = torch.empty(1, device=device)
+    print(f"{'batch':>5} {'shape':>10} {'path':<9} {'ms/batch':>9} {'peak MB':>8} {'live blocks':>11}  identical")
+    for bs in batch_size:
+        ims = [arrays[i % len(arrays)] for i in range(bs)]
+        shape = inference_shape(ims, size)
+        with torch.inference_mode():
+            same = torch.equal(previous(ims, shape, p), pooled(ims, shape, p))
+        for name, fn in (("previous", previous), ("buffers", pooled)):
+            dt, allocations, peak = measure(fn, ims, shape, p, iterations)
+            s = "x".join(map(str, shape))
+            print(f"{bs:>5} {s:>10} {name:<9} {dt * 1e3:>9.2f} {peak / 1e6:>8.1f} {allocations:>11}  {same}")
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=str, required=True, help="directory of sample captures")
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1, 8], help="images per AutoShape call")
+    parser.add_argument("--size", type=int, default=640, help="inference size (long side, pixels)")
+    parser.add_argument("--device", type=str, default="cpu", help="cpu or cuda device, i.e. cuda:0")
+    parser.add_argument("--iterations", type=int, default=50, help="timed calls per configuration")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
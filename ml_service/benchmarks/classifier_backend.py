@@ -0,0 +1,85 @@
+"""
+Startup time, memory and latency of the classifier served by TensorFlow (TFSMLayer) vs ONNX Runtime.
+
+Each backend runs in a fresh process, timed from before its runtime is imported to the end
+of the first inference, so the TensorFlow import cost is included. Peak RSS covers the whole
+process; 'tf imported' confirms the ONNX path never loads TensorFlow.
+
+Usage:
+    $ python benchmarks/classifier_backend.py --images path/to/captures --pool-size 1 2 4
+"""
+
+import argparse
+import multiprocessing as mp
+import resource
+import sys
+import time
+from pathlib import Path
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1]  # ml_service directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+RSS_UNIT = 1024 if sys.platform != "darwin" else 1  # ru_maxrss is KiB on Linux, bytes on macOS
+
+
+def _measure(backend, source, images, pool_size, queue):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from PIL import Image
+
+    from onnx_classifier import OnnxSessionPool, classifier_input, predictions_from_output
+
+    inputs = [classifier_input(Image.open(f).convert("RGB")) for f in images]
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t = time.perf_counter()
+    if backend == "onnx":
+        model = OnnxSessionPool(source, pool_size)
+    else:
+        from tensorflow import keras
+
+        model = keras.layers.TFSMLayer(source, call_endpoint="serving_default")
+    predictions_from_output(model(inputs[0]))
+    startup = time.perf_counter() - t
+
+    with ThreadPoolExecutor(pool_size) as pool:
+        t = time.perf_counter()
+        list(pool.map(lambda x: predictions_from_output(model(x)), inputs))
+        latency = (time.perf_counter() - t) / len(inputs)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((startup, latency, (peak - baseline) * RSS_UNIT, "tensorflow" in sys.modules))
+
+
+def measure(backend, source, images, pool_size):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    p = ctx.Process(target=_measure, args=(backend, source, images, pool_size, queue))
+    p.start()
+    result = queue.get()
+    p.join()
+    return result
+
+
+def run(images, savedmodel="models/trained_v3_savedmodel", onnx="models/trained_v3.onnx", pool_size=(1, 2)):
+    files = sorted(str(p) for p in Path(images).rglob("*") if p.suffix.lower() in {".jpg", ".jpeg", ".png"})
+    print(f"{len(files)} images\n")
+    print(f"{'backend':<11} {'threads':>7} {'startup s':>10} {'ms/image':>9} {'peak MB':>8}  tf imported")
+    configs = [("tensorflow", savedmodel, n) for n in pool_size] + [("onnx", onnx, n) for n in pool_size]
+    for backend, source, n in configs:
+        startup, latency, peak, tf_imported = measure(backend, source, files, n)
+        print(f"{backend:<11} {n:>7} {startup:>10.2f} {latency * 1e3:>9.2f} {peak / 1e6:>8.0f}  {tf_imported}")
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=str, required=True, help="directory of sample captures")
+    parser.add_argument("--savedmodel", type=str, default="models/trained_v3_savedmodel", help="SavedModel directory")
+    parser.add_argument("--onnx", type=str, default="models/trained_v3.onnx", help="converted ONNX classifier")
+    parser.add_argument("--pool-size", type=int, nargs="+", default=[1, 2], help="sessions / client threads")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
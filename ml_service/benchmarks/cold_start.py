@@ -0,0 +1,80 @@
+"""
+Detector cold-start time with and without the compiled-artifact cache.
+
+Every configuration starts in a fresh process and times the same steps as service startup:
+resolving the artifact (a build on a cache miss, a hash check on a hit), loading it through
+torch.hub with AutoShape, and the first inference. 'miss' uses an empty cache directory,
+'hit' reuses the artifact built by the miss run.
+
+Usage:
+    $ python benchmarks/cold_start.py --weights models/yolov5s.pt --artifacts fused torchscript onnx ort
+"""
+
+import argparse
+import multiprocessing as mp
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1]  # ml_service directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+
+def _measure(weights, artifact, cache_dir, imgsz, queue):
+    import numpy as np
+    import torch
+
+    t0 = time.perf_counter()
+    model = torch.hub.load(
+        str(ROOT / "yolov5"),
+        "custom",
+        path=weights,
+        source="local",
+        artifact=artifact,
+        cache_dir=cache_dir,
+        imgsz=imgsz,
+    )
+    t1 = time.perf_counter()
+    model(np.full((imgsz, imgsz, 3), 114, dtype=np.uint8), size=imgsz)
+    t2 = time.perf_counter()
+    queue.put((t1 - t0, t2 - t1))
+
+
+def measure(weights, artifact, cache_dir, imgsz):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    p = ctx.Process(target=_measure, args=(weights, artifact, cache_dir, imgsz, queue))
+    p.start()
+    result = queue.get()
+    p.join()
+    return result
+
+
+def run(weights, artifacts=("fused", "torchscript", "onnx", "ort"), imgsz=640):
+    weights = str(Path(weights).resolve())
+    print(f"{'artifact':<12} {'cache':<6} {'load s':>7} {'first inference s':>18} {'total s':>8}")
+    load, first = measure(weights, None, None, imgsz)
+    print(f"{'checkpoint':<12} {'-':<6} {load:>7.2f} {first:>18.2f} {load + first:>8.2f}")
+    for artifact in artifacts:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for cache in ("miss", "hit"):
+                load, first = measure(weights, artifact, cache_dir, imgsz)
+                print(f"{artifact:<12} {cache:<6} {load:>7.2f} {first:>18.2f} {load + first:>8.2f}")
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", type=str, default="models/yolov5s.pt", help="YOLOv5 checkpoint")
+    parser.add_argument(
+        "--artifacts", type=str, nargs="+", default=["fused", "torchscript", "onnx", "ort"], help="artifacts to time"
+    )
+    parser.add_argument("--imgsz", type=int, default=640, help="inference size the artifacts are built for")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
@@ -0,0 +1,91 @@
+"""
+CPU inference modes of the PyTorch detector: FP32 NCHW, FP32 NHWC (channels_last) and bfloat16 autocast (NHWC).
+
+Each mode runs in a fresh process that loads the model on CPU through torch.hub and switches it
+with DetectMultiBackend.cpu_inference(). Reported per image: AutoShape inference time (mean, p50,
+p95) and the detection count and largest box/confidence difference against FP32 NCHW. bf16 is
+reported as unsupported on CPUs without native bfloat16 kernels.
+
+Usage:
+    $ python benchmarks/cpu_inference.py --weights models/yolov5s.pt --images path/to/captures --threads 4
+"""
+
+import argparse
+import multiprocessing as mp
+from pathlib import Path
+
+import numpy as np
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1]  # ml_service directory
+
+MODES = {"fp32 nchw": (False, False), "fp32 nhwc": (True, False), "bf16 nhwc": (True, True)}  # (channels_last, bf16)
+
+
+def _measure(mode, weights, images, size, repeats, threads, queue):
+    import torch
+    from PIL import Image
+
+    if threads:
+        torch.set_num_threads(threads)
+    arrays = [np.asarray(Image.open(f).convert("RGB")) for f in images]
+    model = torch.hub.load(str(ROOT / "yolov5"), "custom", path=weights, source="local", device="cpu", verbose=False)
+    channels_last, bf16 = MODES[mode]
+    if channels_last or bf16:
+        model.model.cpu_inference(channels_last, bf16)
+    if bf16 and not model.model.bf16:
+        queue.put(None)  # no native bf16 on this CPU
+        return
+    model(arrays[0], size=size)  # warmup
+    infer = [model(im, size=size).t[1] for _ in range(repeats) for im in arrays]
+    preds = [model(im, size=size).pred[0].float().numpy() for im in arrays]
+    queue.put((infer, preds))
+
+
+def measure(mode, weights, images, size, repeats, threads):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    p = ctx.Process(target=_measure, args=(mode, weights, images, size, repeats, threads, queue))
+    p.start()
+    result = queue.get()
+    p.join()
+    return result
+
+
+def run(weights, images, size=640, repeats=3, threads=0):
+    files = sorted(str(p) for p in Path(images).rglob("*") if p.suffix.lower() in {".jpg", ".jpeg", ".png"})
+    print(f"{len(files)} images, {repeats} passes per mode\n")
+    print(f"{'mode':<10} {'mean ms':>8} {'p50 ms':>7} {'p95 ms':>7} {'dets':>6} {'box diff':>9} {'conf diff':>9}")
+    reference = None
+    for mode in MODES:
+        result = measure(mode, weights, files, size, repeats, threads)
+        if result is None:
+            print(f"{mode:<10} unsupported (no native bfloat16 on this CPU)")
+            continue
+        infer, preds = result
+        reference = preds if reference is None else reference
+        box = conf = 0.0
+        for a, b in zip(reference, preds):
+            if a.shape != b.shape:  # detections appeared or disappeared
+                box = conf = float("inf")
+            elif len(a):
+                box = max(box, float(np.abs(a[:, :4] - b[:, :4]).max()))
+                conf = max(conf, float(np.abs(a[:, 4] - b[:, 4]).max()))
+        n = sum(len(p) for p in preds)
+        p50, p95 = np.percentile(infer, (50, 95))
+        print(f"{mode:<10} {np.mean(infer):>8.2f} {p50:>7.2f} {p95:>7.2f} {n:>6} {box:>9.2e} {conf:>9.2e}")
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", type=str, default="models/yolov5s.pt", help="detector weights")
+    parser.add_argument("--images", type=str, required=True, help="directory of reference images")
+    parser.add_argument("--size", type=int, default=640, help="inference size (long side, pixels)")
+    parser.add_argument("--repeats", type=int, default=3, help="passes over the images per mode")
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads, 0 for the default")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
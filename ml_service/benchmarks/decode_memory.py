@@ -0,0 +1,95 @@
+"""
+Peak memory and time of the upload decode path, before and after the bounded decoder.
+
+Each variant runs in a fresh process so ru_maxrss reflects only that request:
+    legacy   BytesIO -> Image.open -> LANCZOS resize -> np.asarray(exif_transpose(im)) (what AutoShape did)
+    bounded  decode_upload() (header check, JPEG draft, in-place EXIF) -> to_detector_array()
+
+Usage:
+    $ python benchmarks/decode_memory.py --images path/to/photos
+"""
+
+import argparse
+import io
+import multiprocessing as mp
+import resource
+import sys
+import time
+from pathlib import Path
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1]  # ml_service directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+RSS_UNIT = 1024 if sys.platform != "darwin" else 1  # ru_maxrss is KiB on Linux, bytes on macOS
+
+
+def legacy_decode(image_bytes, max_size):
+    import numpy as np
+    from PIL import Image, ImageOps
+
+    image = Image.open(io.BytesIO(image_bytes))
+    if max(image.size) > max_size:
+        ratio = max_size / max(image.size)
+        image = image.resize(tuple(int(dim * ratio) for dim in image.size), Image.Resampling.LANCZOS)
+    return np.asarray(ImageOps.exif_transpose(image))
+
+
+def bounded_decode(image_bytes, max_size):
+    from image_decode import decode_upload, to_detector_array
+
+    return to_detector_array(decode_upload(image_bytes, max_size, max_pixels=1 << 40))
+
+
+def _measure(variant, path, max_size, queue):
+    import numpy as np  # noqa: F401  imported before the baseline so only decoding is counted
+    from PIL import Image  # noqa: F401
+
+    import image_decode  # noqa: F401
+
+    image_bytes = Path(path).read_bytes()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t = time.perf_counter()
+    array = {"legacy": legacy_decode, "bounded": bounded_decode}[variant](image_bytes, max_size)
+    dt = time.perf_counter() - t
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put(((peak - baseline) * RSS_UNIT, dt, array.shape))
+
+
+def measure(variant, path, max_size):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    p = ctx.Process(target=_measure, args=(variant, path, max_size, queue))
+    p.start()
+    result = queue.get()
+    p.join()
+    return result
+
+
+def run(images, max_size=1280):
+    files = sorted(p for p in Path(images).rglob("*") if p.suffix.lower() in {".jpg", ".jpeg", ".png"})
+    print(f"{'image':<32} {'variant':<8} {'peak MB':>8} {'ms':>8}  shape")
+    totals = {"legacy": [0, 0.0], "bounded": [0, 0.0]}
+    for f in files:
+        for variant in ("legacy", "bounded"):
+            peak, dt, shape = measure(variant, f, max_size)
+            totals[variant][0] += peak
+            totals[variant][1] += dt
+            print(f"{f.name[:32]:<32} {variant:<8} {peak / 1e6:>8.1f} {dt * 1e3:>8.1f}  {shape}")
+    if files:
+        print()
+        for variant, (peak, dt) in totals.items():
+            print(f"mean {variant:<8} {peak / len(files) / 1e6:>8.1f} MB {dt / len(files) * 1e3:>8.1f} ms")
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=str, required=True, help="directory of sample uploads")
+    parser.add_argument("--max-size", type=int, default=1280, help="MAX_IMAGE_SIZE used by the service")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
@@ -0,0 +1,103 @@
+"""
+Batched `non_max_suppression` against the previous per-image loop.
+
+Predictions are synthetic YOLOv5s-shaped outputs (25200 anchors, 80 classes) with clusters of
+overlapping boxes around a few objects per image, so NMS has real work to do. Both versions
+run on the same tensors; outputs are checked for equality before timing.
+
+Usage:
+    $ python benchmarks/nms.py --batch-size 1 8 16 32 64 --objects 20 --device cpu
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import torch
+import torchvision
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1] / "yolov5"  # YOLOv5 root directory
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))  # ahead of ml_service/utils.py
+
+from utils.general import non_max_suppression, xywh2xyxy  # noqa: E402
+
+
+def nms_per_image(prediction, conf_thres=0.25, iou_thres=0.45, max_det=300):
+    """The previous implementation (best class, class-aware), one torchvision NMS call per image."""
+    max_wh, max_nms = 7680, 30000
+    xc = prediction[..., 4] > conf_thres
+    output = [torch.zeros((0, 6), device=prediction.device)] * prediction.shape[0]
+    for xi, x in enumerate(prediction):
+        x = x[xc[xi]]
+        if not x.shape[0]:
+            continue
+        x[:, 5:] *= x[:, 4:5]
+        box = xywh2xyxy(x[:, :4])
+        conf, j = x[:, 5:].max(1, keepdim=True)
+        x = torch.cat((box, conf, j.float()), 1)[conf.view(-1) > conf_thres]
+        if not x.shape[0]:
+            continue
+        x = x[x[:, 4].argsort(descending=True)[:max_nms]]
+        c = x[:, 5:6] * max_wh
+        i = torchvision.ops.nms(x[:, :4] + c, x[:, 4], iou_thres)[:max_det]
+        output[xi] = x[i]
+    return output
+
+
+def synthetic_predictions(bs, objects, anchors=25200, nc=80, imgsz=640, seed=0):
+    """(bs, anchors, 5 + nc) predictions: low-confidence noise plus ~30 jittered boxes around each object."""
+    g = torch.Generator().manual_seed(seed)
+    p = torch.rand(bs, anchors, 5 + nc, generator=g)
+    p[..., :2] *= imgsz
+    p[..., 2:4] = p[..., 2:4] * 64 + 8
+    p[..., 4] *= 0.2  # background objectness
+    for b in range(bs):
+        for _ in range(objects):
+            box = torch.rand(4, generator=g) * torch.tensor([imgsz, imgsz, 200, 200]) + torch.tensor([0, 0, 20, 20])
+            k = torch.randint(anchors, (30,), generator=g)
+            p[b, k, :4] = box + torch.randn(30, 4, generator=g) * 4
+            p[b, k, 4] = 0.5 + 0.5 * torch.rand(30, generator=g)
+            p[b, k, 5 + torch.randint(nc, (1,), generator=g)] = 0.9
+    return p
+
+
+def timed(fn, x, n):
+    for _ in range(3):
+        fn(x.clone())  # warmup
+    inputs = [x.clone() for _ in range(n)]  # NMS scales class scores in place on some paths
+    if x.device.type == "cuda":
+        torch.cuda.synchronize()
+    t = time.perf_counter()
+    for xi in inputs:
+        fn(xi)
+    if x.device.type == "cuda":
+        torch.cuda.synchronize()
+    return (time.perf_counter() - t) / n
+
+
+def run(batch_size=(1, 8, 16, 32, 64), objects=20, device="cpu", iterations=20):
+    print(f"{'batch':>5} {'boxes':>6} {'per-image ms':>13} {'batched ms':>11} {'speedup':>8}  identical")
+    for bs in batch_size:
+        x = synthetic_predictions(bs, objects).to(device)
+        ref, new = nms_per_image(x.clone()), non_max_suppression(x.clone())
+        same = all(torch.equal(a, b) for a, b in zip(ref, new))
+        t_ref, t_new = timed(nms_per_image, x, iterations), timed(non_max_suppression, x, iterations)
+        boxes = sum(len(d) for d in new)
+        print(f"{bs:>5} {boxes:>6} {t_ref * 1e3:>13.2f} {t_new * 1e3:>11.2f} {t_ref / t_new:>7.2f}x  {same}")
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1, 8, 16, 32, 64], help="batch sizes")
+    parser.add_argument("--objects", type=int, default=20, help="objects per image")
+    parser.add_argument("--device", type=str, default="cpu", help="cpu or cuda device, i.e. cuda:0")
+    parser.add_argument("--iterations", type=int, default=20, help="timed calls per batch size")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
@@ -0,0 +1,109 @@
+"""
+ONNX Runtime detector under concurrent requests: default session vs tuned options, a session pool and IO binding.
+
+Each configuration runs in a fresh process that loads the ONNX export through torch.hub (DetectMultiBackend) and
+configures it with DetectMultiBackend.onnx_sessions(). `--clients` threads then send AutoShape requests over the
+images. Reported per configuration and client count: request latency (mean, p50, p95), images/s, and the
+largest box/confidence difference against the default session. With IO binding the timings include copying the
+pre-bound outputs for each request, as DetectMultiBackend returns copies.
+
+Usage:
+    $ python yolov5/export.py --weights models/yolov5s.pt --include onnx --dynamic
+    $ python benchmarks/onnx_sessions.py --weights models/yolov5s.onnx --images path/to/captures --clients 1 2 4
+"""
+
+import argparse
+import multiprocessing as mp
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1]  # ml_service directory
+
+CONFIGS = {  # onnx_sessions() options, size 0 is one session per client; None keeps DetectMultiBackend's session
+    "default": None,
+    "tuned": {"size": 1, "optimization": "all"},
+    "pool": {"size": 0, "optimization": "all"},
+    "pool+binding": {"size": 0, "optimization": "all", "io_binding": True},
+}
+
+
+def _measure(config, weights, images, size, clients, requests, queue):
+    import torch
+    from PIL import Image
+
+    arrays = [np.asarray(Image.open(f).convert("RGB")) for f in images]
+    model = torch.hub.load(str(ROOT / "yolov5"), "custom", path=weights, source="local", device="cpu", verbose=False)
+    options = CONFIGS[config]
+    if options is not None:
+        model.model.onnx_sessions(**{**options, "size": options["size"] or clients})
+
+    def request(i):
+        t = time.perf_counter()
+        model(arrays[i % len(arrays)], size=size)
+        return (time.perf_counter() - t) * 1e3
+
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(request, range(4 * clients)))  # warmup, every pooled session binds the first shapes
+        t = time.perf_counter()
+        latency = list(pool.map(request, range(requests)))
+        throughput = requests / (time.perf_counter() - t)
+    preds = [model(im, size=size).pred[0].float().numpy() for im in arrays]
+    queue.put((latency, throughput, preds))
+
+
+def measure(config, weights, images, size, clients, requests):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    p = ctx.Process(target=_measure, args=(config, weights, images, size, clients, requests, queue))
+    p.start()
+    result = queue.get()
+    p.join()
+    return result
+
+
+def run(weights, images, size=640, clients=(1, 2, 4), requests=100, configs=tuple(CONFIGS)):
+    files = sorted(str(p) for p in Path(images).rglob("*") if p.suffix.lower() in {".jpg", ".jpeg", ".png"})
+    print(f"{len(files)} images, {requests} requests per configuration\n")
+    print(
+        f"{'config':<13} {'clients':>7} {'mean ms':>8} {'p50 ms':>7} {'p95 ms':>7} {'img/s':>7} "
+        f"{'box diff':>9} {'conf diff':>9}"
+    )
+    for n in clients:
+        reference = None
+        for config in configs:
+            latency, throughput, preds = measure(config, weights, files, size, n, requests)
+            reference = preds if reference is None else reference
+            box = conf = 0.0
+            for a, b in zip(reference, preds):
+                if a.shape != b.shape:  # detections appeared or disappeared
+                    box = conf = float("inf")
+                elif len(a):
+                    box = max(box, float(np.abs(a[:, :4] - b[:, :4]).max()))
+                    conf = max(conf, float(np.abs(a[:, 4] - b[:, 4]).max()))
+            p50, p95 = np.percentile(latency, (50, 95))
+            print(
+                f"{config:<13} {n:>7} {np.mean(latency):>8.2f} {p50:>7.2f} {p95:>7.2f} {throughput:>7.1f} "
+                f"{box:>9.2e} {conf:>9.2e}"
+            )
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", type=str, default="models/yolov5s.onnx", help="ONNX detector export")
+    parser.add_argument("--images", type=str, required=True, help="directory of reference images")
+    parser.add_argument("--size", type=int, default=640, help="inference size (long side, pixels)")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4], help="concurrent request threads")
+    parser.add_argument("--requests", type=int, default=100, help="timed requests per configuration")
+    parser.add_argument(
+        "--configs", type=str, nargs="+", default=list(CONFIGS), choices=list(CONFIGS), help="diffs vs the first"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
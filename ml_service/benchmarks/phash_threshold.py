@@ -0,0 +1,88 @@
+"""
+False-reuse benchmark for the near-duplicate cache threshold.
+
+Each image in --images is perturbed the way a re-capture would be (small shift,
+crop, brightness change, JPEG recompression, slight rotation). Those variants are
+near-duplicates that should be reused; every pair of distinct images should not.
+For each Hamming threshold the script reports the reuse rate on true
+re-captures and the false-reuse rate on distinct images.
+
+Usage:
+    $ python benchmarks/phash_threshold.py --images path/to/captures --max-false-reuse 0.001
+"""
+
+import argparse
+import io
+import itertools
+import sys
+from pathlib import Path
+
+from PIL import Image, ImageEnhance
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1]  # ml_service directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from phash_cache import dhash, hamming_distance  # noqa: E402
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+
+def recompress(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return Image.open(io.BytesIO(buffer.getvalue()))
+
+
+def recapture_variants(image):
+    """Perturbations that mimic taking the same photo a second time"""
+    w, h = image.size
+    dx, dy = max(1, w // 40), max(1, h // 40)
+    return [
+        image.crop((dx, dy, w, h)),  # framing shifted
+        image.crop((dx, dy, w - dx, h - dy)).resize((w, h)),  # slight zoom
+        ImageEnhance.Brightness(image).enhance(1.1),
+        ImageEnhance.Brightness(image).enhance(0.9),
+        recompress(image, 70),
+        image.rotate(2, resample=Image.Resampling.BILINEAR),
+    ]
+
+
+def run(images, max_distance=16, max_false_reuse=0.001):
+    files = sorted(p for p in Path(images).rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+    if len(files) < 2:
+        raise SystemExit(f"Need at least 2 images in {images}, found {len(files)}")
+
+    hashes, positives = [], []
+    for f in files:
+        image = Image.open(f).convert("RGB")
+        h = dhash(image)
+        hashes.append(h)
+        positives.extend(hamming_distance(h, dhash(v)) for v in recapture_variants(image))
+    negatives = [hamming_distance(a, b) for a, b in itertools.combinations(hashes, 2)]
+
+    print(f"{len(files)} images, {len(positives)} re-capture pairs, {len(negatives)} distinct pairs\n")
+    print(f"{'threshold':>9} {'reuse rate':>11} {'false reuse':>12}")
+    recommended = 0
+    for t in range(max_distance + 1):
+        reuse = sum(d <= t for d in positives) / len(positives)
+        false_reuse = sum(d <= t for d in negatives) / len(negatives)
+        if false_reuse <= max_false_reuse:
+            recommended = t
+        print(f"{t:>9} {reuse:>11.3f} {false_reuse:>12.4f}")
+    print(f"\nLargest threshold with false reuse <= {max_false_reuse}: {recommended}")
+    return recommended
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=str, required=True, help="directory of sample captures")
+    parser.add_argument("--max-distance", type=int, default=16, help="largest threshold to evaluate")
+    parser.add_argument("--max-false-reuse", type=float, default=0.001, help="acceptable false-reuse rate")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
@@ -0,0 +1,108 @@
+"""
+Serialization time and payload size of /identify responses: JSON (base64 images) vs msgpack.
+
+Builds synthetic responses shaped like the real one (two annotated PNGs, N detections)
+and encodes them with the same functions the service uses. --batch repeats the
+response to approximate the batch use case.
+
+Usage:
+    $ python benchmarks/response_encoding.py --detections 10 100 --image-size 1280 --batch 1 16
+"""
+
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1]  # ml_service directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from response_codec import PackedArray, PngImage, encode_json, encode_msgpack, msgpack  # noqa: E402
+
+
+def synthetic_png(size, seed=0):
+    """Photo-like PNG: smooth gradients plus noise so compression is realistic"""
+    rng = np.random.default_rng(seed)
+    h, w = int(size * 0.75), size
+    y, x = np.mgrid[0:h, 0:w]
+    base = np.stack([x * 255 / w, y * 255 / h, (x + y) * 127 / (w + h)], -1)
+    im = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(im).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def synthetic_response(n, png):
+    rng = np.random.default_rng(n)
+    boxes = rng.uniform(0, 1280, (n, 4)).astype(np.float32)
+    scores = rng.uniform(0.3, 1.0, n).astype(np.float32)
+    classes = rng.integers(0, 80, n).astype(np.int32)
+    detections = [{"item": "bottle", "type": "recyclable", "confidence": float(c)} for c in scores]
+    return {
+        "custom_model": {
+            "detections": [{"item": "recyclable", "type": "recyclable", "confidence": 0.91}],
+            "percentages": {"recyclable": 100.0},
+            "total_detections": 1,
+            "image": PngImage(png),
+            "scores": PackedArray([0.02, 0.91, 0.04, 0.03], np.float32),
+        },
+        "default_model": {
+            "detections": detections,
+            "percentages": {"recyclable": 100.0},
+            "total_detections": n,
+            "image": PngImage(png),
+            "boxes": PackedArray(boxes, np.float32),
+            "scores": PackedArray(scores, np.float32),
+            "class_ids": PackedArray(classes, np.int32),
+        },
+        "saved_file": "20250101_000000_capture.jpg",
+        "preprocessing_applied": True,
+    }
+
+
+def timeit(fn, data, n=20):
+    fn(data)  # warmup
+    t = time.perf_counter()
+    for _ in range(n):
+        payload = fn(data)
+    return (time.perf_counter() - t) / n, len(payload)
+
+
+def run(detections=(10, 100), image_size=1280, batch=(1, 16), repeats=20):
+    if msgpack is None:
+        raise SystemExit("msgpack is not installed: pip install msgpack")
+    png = synthetic_png(image_size)
+    print(f"annotated PNG: {len(png) / 1e3:.0f} kB\n")
+    print(
+        f"{'detections':>10} {'batch':>6} {'json ms':>9} {'msgpack ms':>11} {'json kB':>9} {'msgpack kB':>11} "
+        f"{'size':>6}"
+    )
+    for n in detections:
+        for b in batch:
+            data = [synthetic_response(n, png) for _ in range(b)]
+            tj, sj = timeit(encode_json, data, repeats)
+            tm, sm = timeit(encode_msgpack, data, repeats)
+            print(
+                f"{n:>10} {b:>6} {tj * 1e3:>9.2f} {tm * 1e3:>11.2f} {sj / 1e3:>9.0f} {sm / 1e3:>11.0f} "
+                f"{sm / sj:>6.2f}"
+            )
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--detections", type=int, nargs="+", default=[10, 100], help="detections per response")
+    parser.add_argument("--image-size", type=int, default=1280, help="annotated image width")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 16], help="responses per payload")
+    parser.add_argument("--repeats", type=int, default=20, help="timed encodes per configuration")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
@@ -0,0 +1,111 @@
+"""
+Memory and throughput of the single-process layout against per-model runner processes (MODEL_RUNNER_PROCESSES).
+
+Each layout runs in a fresh process that loads both models the way main.py does, then sends
+every image through the classifier and the detector concurrently (as /identify does) from
+--clients threads. Resident memory is reported per process after the run.
+
+Usage:
+    $ python benchmarks/runner_layout.py --images path/to/captures --clients 1 4 --requests 200
+"""
+
+import argparse
+import multiprocessing as mp
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import psutil
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1]  # ml_service directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+
+def _measure(layout, images, clients, requests, queue):
+    import os
+
+    os.chdir(ROOT)  # model paths in main.py are relative to ml_service
+    import main
+    import runner_loaders as rl
+    from image_decode import decode_upload, to_detector_array
+    from model_runner import RunnerModel
+
+    slots = {
+        "custom": (rl.load_custom_model, rl.classify_with_custom_model, rl.warmup_custom_model),
+        "default": (rl.load_default_model, rl.detect_with_yolov5, rl.warmup_default_model),
+    }
+    sources = {"custom": main.CUSTOM_MODEL_SOURCE, "default": main.MODEL_PATH_DEFAULT}
+    models, infer = {}, {}
+    for name, (loader, fn, warmup) in slots.items():
+        if layout == "runners":
+            models[name], infer[name] = RunnerModel(name, loader, fn, sources[name], warmup), main.call_runner
+        else:
+            models[name], infer[name] = loader(sources[name]), fn
+            warmup(models[name])
+
+    decoded = [decode_upload(Path(f).read_bytes(), main.MAX_IMAGE_SIZE, main.MAX_UPLOAD_PIXELS) for f in images]
+    work = [(im, to_detector_array(im)) for im in decoded]
+    pool = ThreadPoolExecutor(2 * clients)
+
+    def request(i):
+        image, array = work[i % len(work)]
+        t = time.perf_counter()
+        detection = pool.submit(infer["default"], models["default"], array)
+        infer["custom"](models["custom"], image)
+        detection.result()
+        return time.perf_counter() - t
+
+    with ThreadPoolExecutor(clients) as client_pool:
+        list(client_pool.map(request, range(len(work))))  # warm caches
+        t = time.perf_counter()
+        latencies = list(client_pool.map(request, range(requests)))
+        dt = time.perf_counter() - t
+
+    rss = {"api": psutil.Process().memory_info().rss}
+    for name, model in models.items():
+        if layout == "runners":
+            rss[name] = psutil.Process(model.pid).memory_info().rss
+            model.close()
+    queue.put((requests / dt, float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95)), rss))
+
+
+def measure(layout, images, clients, requests):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    p = ctx.Process(target=_measure, args=(layout, images, clients, requests, queue))
+    p.start()
+    result = queue.get()
+    p.join()
+    return result
+
+
+def run(images, clients=(1, 4), requests=200):
+    files = sorted(str(p) for p in Path(images).rglob("*") if p.suffix.lower() in {".jpg", ".jpeg", ".png"})
+    print(f"{len(files)} images, {requests} requests per configuration\n")
+    print(f"{'layout':<8} {'clients':>7} {'req/s':>7} {'p50 ms':>7} {'p95 ms':>7} {'api MB':>7} {'runners MB':>10}")
+    for n in clients:
+        for layout in ("single", "runners"):
+            rate, p50, p95, rss = measure(layout, files, n, requests)
+            runners = sum(v for k, v in rss.items() if k != "api")
+            runners = f"{runners / 1e6:>10.0f}" if runners else f"{'-':>10}"
+            print(
+                f"{layout:<8} {n:>7} {rate:>7.2f} {p50 * 1e3:>7.0f} {p95 * 1e3:>7.0f} "
+                f"{rss['api'] / 1e6:>7.0f} {runners}"
+            )
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=str, required=True, help="directory of sample uploads")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4], help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per configuration")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
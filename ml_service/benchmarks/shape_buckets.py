@@ -0,0 +1,93 @@
+"""
+Detector latency on mixed-aspect traffic with and without input shape buckets (DETECTOR_SHAPE_BUCKETS).
+
+Each mode runs in a fresh process that loads the detector through torch.hub, warms up on the
+shapes it can produce, then detects a seeded random stream of images whose aspect ratios vary
+like phone and camera captures. Latency spread (p95/p99 against p50) shows shape churn.
+
+Usage:
+    $ python benchmarks/shape_buckets.py --weights models/yolov5s.pt --requests 300
+"""
+
+import argparse
+import multiprocessing as mp
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1]  # ml_service directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+BUCKETS = [(640, 640), (480, 640), (640, 480), (384, 640), (640, 384)]
+ASPECTS = (1.0, 4 / 3, 3 / 4, 16 / 9, 9 / 16, 3 / 2, 2 / 3, 1.25, 0.8, 2.0, 0.5)  # width / height
+
+
+def mixed_images(n, seed=0, long_side=1280):
+    rng = np.random.default_rng(seed)
+    for aspect in rng.choice(ASPECTS, n):
+        aspect *= rng.uniform(0.95, 1.05)  # crops and odd sensors
+        w, h = (long_side, int(long_side / aspect)) if aspect >= 1 else (int(long_side * aspect), long_side)
+        yield rng.integers(0, 255, (h, w, 3), dtype=np.uint8)
+
+
+def _measure(weights, buckets, requests, size, queue):
+    import torch
+
+    sys.path.insert(0, str(ROOT / "yolov5"))
+    from utils.general import make_divisible
+    from utils.numpy_ops import bucket_shape
+
+    model = torch.hub.load(str(ROOT / "yolov5"), "custom", path=weights, source="local", verbose=False)
+    model.buckets = buckets
+    stride = int(model.stride)
+    shapes = buckets or [(size, s) for s in range(stride, size + 1, stride)] + [
+        (s, size) for s in range(stride, size + 1, stride)
+    ]
+    for shape in shapes:
+        model.model.warmup(imgsz=(1, 3, *shape), cpu=True)
+
+    latencies, seen = [], set()
+    for im in mixed_images(requests):
+        g = size / max(im.shape[:2])
+        seen.add(tuple(bucket_shape([make_divisible(int(x * g), stride) for x in im.shape[:2]], buckets)))
+        t = time.perf_counter()
+        model(im, size=size)
+        latencies.append(time.perf_counter() - t)
+    queue.put((latencies, len(seen)))
+
+
+def measure(weights, buckets, requests, size):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    p = ctx.Process(target=_measure, args=(weights, buckets, requests, size, queue))
+    p.start()
+    result = queue.get()
+    p.join()
+    return result
+
+
+def run(weights="models/yolov5s.pt", requests=300, size=640):
+    print(f"{requests} mixed-aspect requests at size {size}\n")
+    print(f"{'buckets':<8} {'shapes':>6} {'mean ms':>8} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'std ms':>7}")
+    for name, buckets in (("none", None), ("5", BUCKETS)):
+        latencies, shapes = measure(weights, buckets, requests, size)
+        ms = np.array(latencies) * 1e3
+        p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+        print(f"{name:<8} {shapes:>6} {ms.mean():>8.1f} {p50:>7.1f} {p95:>7.1f} {p99:>7.1f} {ms.std():>7.1f}")
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", type=str, default="models/yolov5s.pt", help="detector weights")
+    parser.add_argument("--requests", type=int, default=300, help="images per mode")
+    parser.add_argument("--size", type=int, default=640, help="inference size (long side, pixels)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
@@ -0,0 +1,69 @@
+"""
+Dense against sparse Detect-head decoding (AutoShape.sparse / detect.py --sparse-decode).
+
+Both modes run the same images through one AutoShape model. Reported per image: AutoShape's
+inference and NMS times, the rows of the prediction tensor handed to NMS and its size, and
+the largest difference between the detections of both modes.
+
+Usage:
+    $ python benchmarks/sparse_decode.py --weights models/yolov5s.pt --images path/to/captures --conf 0.3
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import torch
+from PIL import Image
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1]  # ml_service directory
+
+
+def run(weights, images, conf=0.3, size=640, repeats=3):
+    files = sorted(p for p in Path(images).rglob("*") if p.suffix.lower() in {".jpg", ".jpeg", ".png"})
+    arrays = [np.asarray(Image.open(f).convert("RGB")) for f in files]
+    model = torch.hub.load(str(ROOT / "yolov5"), "custom", path=weights, source="local", verbose=False)
+    model.conf = conf
+    detect = model.model.model.model[-1]  # AutoShape -> DetectMultiBackend -> DetectionModel -> Detect
+
+    rows = []
+    detect.register_forward_hook(lambda m, i, o: rows.append(o[0].shape))  # prediction tensor given to NMS
+    results = {}
+    print(f"{len(arrays)} images, conf {conf}\n")
+    print(f"{'mode':<7} {'infer ms':>9} {'nms ms':>7} {'rows':>7} {'pred MB':>8}")
+    for mode in ("dense", "sparse"):
+        model.sparse = mode == "sparse"
+        model(arrays[0], size=size)  # warmup
+        rows.clear()
+        infer, nms = [], []
+        for _ in range(repeats):
+            for im in arrays:
+                r = model(im, size=size)
+                infer.append(r.t[1])
+                nms.append(r.t[2])
+        results[mode] = [model(im, size=size).pred[0] for im in arrays]
+        n = np.mean([s[1] for s in rows])
+        mb = np.mean([np.prod(s) * 4 for s in rows]) / 1e6
+        print(f"{mode:<7} {np.mean(infer):>9.2f} {np.mean(nms):>7.2f} {n:>7.0f} {mb:>8.2f}")
+
+    diffs = [
+        (a - b).abs().max().item() if a.shape == b.shape and len(a) else 0.0 if a.shape == b.shape else float("inf")
+        for a, b in zip(results["dense"], results["sparse"])
+    ]
+    print(f"\nmax detection difference {max(diffs):.2e} ({sum(d == 0 for d in diffs)}/{len(diffs)} images identical)")
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", type=str, default="models/yolov5s.pt", help="detector weights")
+    parser.add_argument("--images", type=str, required=True, help="directory of sample captures")
+    parser.add_argument("--conf", type=float, default=0.3, help="confidence threshold")
+    parser.add_argument("--size", type=int, default=640, help="inference size (long side, pixels)")
+    parser.add_argument("--repeats", type=int, default=3, help="passes over the images per mode")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
@@ -0,0 +1,74 @@
+"""
+Aggregate frame rate of stream capture: reader threads (LoadStreams) vs capture processes (LoadStreamsShared).
+
+Simulates N cameras by repeating the given video files, then consumes batches as fast as possible for a fixed time.
+'fresh fps' counts new frames that reached the consumer across all streams; 'batch/s' is the consumer loop rate.
+Pass --infer-ms to simulate an inference step between batches.
+
+Usage:
+    $ python benchmarks/stream_capture.py --videos belt1.mp4 belt2.mp4 --streams 1 4 8 16 --seconds 10
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1] / "yolov5"  # vendored YOLOv5 directory
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))  # ahead of ml_service/utils.py
+
+from utils.dataloaders import LoadStreams, LoadStreamsShared  # noqa: E402
+
+
+def measure(loader, sources, img_size, seconds, infer_ms):
+    with tempfile.NamedTemporaryFile("w", suffix=".streams", delete=False) as f:
+        f.write("\n".join(sources))
+    try:
+        dataset = loader(f.name, img_size=img_size)
+    finally:
+        os.remove(f.name)
+    shared = isinstance(dataset, LoadStreamsShared)
+    previous, fresh, batches = None, 0, 0
+    t = time.perf_counter()
+    for _, _, im0, _, _ in dataset:
+        current = list(dataset.frame_counts) if shared else im0  # threads replace the array on each new frame
+        if previous is not None:
+            fresh += sum(c != p if shared else c is not p for c, p in zip(current, previous))
+        previous, batches = current, batches + 1
+        if infer_ms:
+            time.sleep(infer_ms / 1e3)
+        if time.perf_counter() - t > seconds:
+            break
+    dt = time.perf_counter() - t
+    if shared:
+        dataset.close()
+    return fresh / dt, batches / dt
+
+
+def run(videos, streams=(1, 4, 8), img_size=640, seconds=10.0, infer_ms=0.0):
+    print(f"{os.cpu_count()} CPUs, {img_size}px letterbox, {infer_ms:g} ms simulated inference\n")
+    print(f"{'streams':>7} {'mode':<10} {'fresh fps':>10} {'batch/s':>8}")
+    for n in streams:
+        sources = [str(Path(videos[i % len(videos)]).resolve()) for i in range(n)]
+        for name, loader in ("threads", LoadStreams), ("processes", LoadStreamsShared):
+            fps, rate = measure(loader, sources, img_size, seconds, infer_ms)
+            print(f"{n:>7} {name:<10} {fps:>10.1f} {rate:>8.1f}")
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--videos", type=str, nargs="+", required=True, help="video files, repeated to fill --streams")
+    parser.add_argument("--streams", type=int, nargs="+", default=[1, 4, 8], help="numbers of simulated streams")
+    parser.add_argument("--img-size", type=int, default=640, help="letterbox size")
+    parser.add_argument("--seconds", type=float, default=10.0, help="measurement time per configuration")
+    parser.add_argument("--infer-ms", type=float, default=0.0, help="simulated inference time per batch")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
@@ -0,0 +1,111 @@
+"""
+Recall versus latency of tiled inference against plain AutoShape resizing.
+
+Images need YOLO-format labels (one `class x_center y_center width height` row per
+object, normalized) in --labels with the same file stem. Recall is the share of
+labelled objects matched by a detection of the same class at IoU >= --iou-match.
+
+Usage:
+    $ python benchmarks/tiled_recall.py --images bins/images --labels bins/labels --tile-size 512 640 --overlap 0.2
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1]  # ml_service directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from image_decode import decode_upload, to_detector_array  # noqa: E402
+from tiling import detect_tiled  # noqa: E402
+
+
+def load_labels(path, w, h):
+    rows = np.loadtxt(path, ndmin=2) if path.exists() and path.stat().st_size else np.zeros((0, 5))
+    cls, xc, yc, bw, bh = rows.T
+    boxes = np.stack([(xc - bw / 2) * w, (yc - bh / 2) * h, (xc + bw / 2) * w, (yc + bh / 2) * h], 1)
+    return cls.astype(int), boxes
+
+
+def box_iou(a, b):
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(1)
+    return inter / (area_a[:, None] + area_b[None] - inter + 1e-9)
+
+
+def matched(gt_cls, gt_boxes, det, iou_match):
+    """Number of labelled objects matched one-to-one by a same-class detection"""
+    det = det.cpu().numpy() if isinstance(det, torch.Tensor) else det
+    if not len(gt_boxes) or not len(det):
+        return 0
+    iou = box_iou(gt_boxes, det[:, :4]) * (gt_cls[:, None] == det[None, :, 5].astype(int))
+    hits, used = 0, set()
+    for g in np.argsort(-iou.max(1)):
+        for d in np.argsort(-iou[g]):
+            if iou[g, d] < iou_match:
+                break
+            if d not in used:
+                used.add(d)
+                hits += 1
+                break
+    return hits
+
+
+def run(
+    weights, images, labels, max_size=2560, tile_size=(640,), overlap=(0.2,), batch_size=8, conf=0.25, iou_match=0.5
+):
+    model = torch.hub.load(str(ROOT / "yolov5"), "custom", path=weights, source="local")
+    model.conf = conf
+    files = sorted(p for p in Path(images).rglob("*") if p.suffix.lower() in {".jpg", ".jpeg", ".png"})
+    data = []
+    for f in files:
+        im = to_detector_array(decode_upload(f.read_bytes(), max_size, max_pixels=1 << 40))
+        data.append((im, *load_labels(Path(labels) / f"{f.stem}.txt", im.shape[1], im.shape[0])))
+    total = sum(len(b) for _, _, b in data)
+    print(f"{len(data)} images, {total} labelled objects\n")
+
+    configs = [("plain resize", None)] + [(f"tiled {t}px {o:.0%}", (t, o)) for t in tile_size for o in overlap]
+    print(f"{'mode':<22} {'recall':>7} {'ms/image':>9}")
+    for name, cfg in configs:
+
+        def detect(im, cfg=cfg):
+            if cfg is None:
+                return model(im).xyxy[0]
+            return detect_tiled(model, im, cfg[0], cfg[1], batch_size, conf=conf, iou=model.iou)
+
+        detect(data[0][0])  # warmup
+        hits, dt = 0, 0.0
+        for im, gt_cls, gt_boxes in data:
+            t = time.perf_counter()
+            det = detect(im)
+            dt += time.perf_counter() - t
+            hits += matched(gt_cls, gt_boxes, det, iou_match)
+        print(f"{name:<22} {hits / max(total, 1):>7.3f} {dt / len(data) * 1e3:>9.1f}")
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", type=str, default="models/yolov5s.pt", help="YOLOv5 checkpoint")
+    parser.add_argument("--images", type=str, required=True, help="directory of high-resolution images")
+    parser.add_argument("--labels", type=str, required=True, help="directory of YOLO-format label files")
+    parser.add_argument("--max-size", type=int, default=2560, help="decode bound (TILED_MAX_IMAGE_SIZE)")
+    parser.add_argument("--tile-size", type=int, nargs="+", default=[640], help="tile sizes to evaluate")
+    parser.add_argument("--overlap", type=float, nargs="+", default=[0.2], help="tile overlaps to evaluate")
+    parser.add_argument("--batch-size", type=int, default=8, help="tiles per forward pass")
+    parser.add_argument("--conf", type=float, default=0.25, help="confidence threshold")
+    parser.add_argument("--iou-match", type=float, default=0.5, help="IoU for a detection to count as a hit")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
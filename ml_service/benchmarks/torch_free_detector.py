@@ -0,0 +1,101 @@
+"""
+Import time, memory and latency of the ONNX detector with NumPy post-processing against AutoShape.
+
+Both run the same exported ONNX model through ONNX Runtime. 'autoshape' loads it via torch.hub
+(DetectMultiBackend + AutoShape, torch NMS); 'numpy' uses onnx_detector.OnnxDetector, which never
+imports torch. Each runs in a fresh process; startup covers imports, model load and the first
+inference. Detections of both are compared image by image.
+
+Usage:
+    $ python benchmarks/torch_free_detector.py --weights models/yolov5s.onnx --images path/to/captures
+"""
+
+import argparse
+import multiprocessing as mp
+import resource
+import sys
+import time
+from pathlib import Path
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1]  # ml_service directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+RSS_UNIT = 1024 if sys.platform != "darwin" else 1  # ru_maxrss is KiB on Linux, bytes on macOS
+
+
+def _measure(mode, weights, images, size, queue):
+    import os
+
+    os.chdir(ROOT)
+    t = time.perf_counter()
+    import numpy as np
+    from PIL import Image
+
+    arrays = [np.asarray(Image.open(f).convert("RGB")) for f in images]
+    if mode == "numpy":
+        from onnx_detector import OnnxDetector
+
+        model = OnnxDetector(weights, str(ROOT / "yolov5"))
+
+        def detect(im):
+            return model.ops.xyxy_records(model([im], size)[0][0], model.names)
+    else:
+        import torch
+
+        model = torch.hub.load(str(ROOT / "yolov5"), "custom", path=weights, source="local", verbose=False)
+
+        def detect(im):
+            return model(im, size=size).pandas().xyxy[0].to_dict(orient="records")
+
+    records = [detect(arrays[0])]
+    startup = time.perf_counter() - t
+    t = time.perf_counter()
+    records += [detect(im) for im in arrays[1:]]
+    latency = (time.perf_counter() - t) / max(len(arrays) - 1, 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT
+    queue.put((startup, latency, peak, "torch" in sys.modules, records))
+
+
+def measure(mode, weights, images, size):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    p = ctx.Process(target=_measure, args=(mode, weights, images, size, queue))
+    p.start()
+    result = queue.get()
+    p.join()
+    return result
+
+
+def same(a, b, atol=1e-3):
+    """Records agree on class and, within `atol` pixels/confidence, on every box"""
+    keys = "xmin", "ymin", "xmax", "ymax", "confidence"
+    return len(a) == len(b) and all(
+        x["class"] == y["class"] and all(abs(x[k] - y[k]) <= atol for k in keys) for x, y in zip(a, b)
+    )
+
+
+def run(weights, images, size=640):
+    files = sorted(str(p) for p in Path(images).rglob("*") if p.suffix.lower() in {".jpg", ".jpeg", ".png"})
+    print(f"{len(files)} images\n")
+    print(f"{'mode':<10} {'startup s':>10} {'ms/image':>9} {'peak MB':>8}  torch imported")
+    results = {}
+    for mode in ("autoshape", "numpy"):
+        startup, latency, peak, torch_imported, results[mode] = measure(mode, weights, files, size)
+        print(f"{mode:<10} {startup:>10.2f} {latency * 1e3:>9.2f} {peak / 1e6:>8.0f}  {torch_imported}")
+    agree = sum(same(a, b) for a, b in zip(results["autoshape"], results["numpy"]))
+    print(f"\nidentical detections on {agree}/{len(files)} images")
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", type=str, default="models/yolov5s.onnx", help="ONNX export of the detector")
+    parser.add_argument("--images", type=str, required=True, help="directory of sample captures")
+    parser.add_argument("--size", type=int, default=640, help="inference size (long side, pixels)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
@@ -0,0 +1,66 @@
+"""
+Test-time augmentation latency with its passes run one after another or concurrently (DetectionModel.tta_threads).
+
+Every mode runs the same images through one AutoShape model with augment=True, after a plain pass
+for reference. Reported per image: AutoShape's inference and NMS times, then the largest difference
+between the detections of the sequential and each concurrent mode.
+
+Usage:
+    $ python benchmarks/tta.py --weights models/yolov5s.pt --images path/to/captures --threads 1 3
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import torch
+from PIL import Image
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1]  # ml_service directory
+
+
+def run(weights, images, threads=(1, 3), size=640, repeats=3):
+    files = sorted(p for p in Path(images).rglob("*") if p.suffix.lower() in {".jpg", ".jpeg", ".png"})
+    arrays = [np.asarray(Image.open(f).convert("RGB")) for f in files]
+    model = torch.hub.load(str(ROOT / "yolov5"), "custom", path=weights, source="local", verbose=False)
+    detection_model = model.model.model  # AutoShape -> DetectMultiBackend -> DetectionModel
+    print(f"{len(arrays)} images, {torch.get_num_threads()} torch threads\n")
+    print(f"{'mode':<12} {'infer ms':>9} {'nms ms':>7}")
+    results = {}
+    for n in (0, *threads):  # 0: plain inference, for reference
+        detection_model.tta_threads = max(n, 1)
+        augment = n > 0
+        model(arrays[0], size=size, augment=augment)  # warmup
+        infer, nms = [], []
+        for _ in range(repeats):
+            for im in arrays:
+                r = model(im, size=size, augment=augment)
+                infer.append(r.t[1])
+                nms.append(r.t[2])
+        mode = f"tta x{n}" if augment else "plain"
+        results[n] = [model(im, size=size, augment=augment).pred[0] for im in arrays]
+        print(f"{mode:<12} {np.mean(infer):>9.2f} {np.mean(nms):>7.2f}")
+
+    reference = results[threads[0]]
+    for n in threads[1:]:
+        diffs = [
+            (a - b).abs().max().item() if a.shape == b.shape and len(a) else 0.0 if a.shape == b.shape else float("inf")
+            for a, b in zip(reference, results[n])
+        ]
+        print(f"\ntta x{n} against x{threads[0]}: max detection difference {max(diffs):.2e}")
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", type=str, default="models/yolov5s.pt", help="detector weights")
+    parser.add_argument("--images", type=str, required=True, help="directory of sample captures")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 3], help="tta_threads, first is the reference")
+    parser.add_argument("--size", type=int, default=640, help="inference size (long side, pixels)")
+    parser.add_argument("--repeats", type=int, default=3, help="passes over the images per mode")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
@@ -0,0 +1,67 @@
+"""
+Float input against uint8 input with the 1/255 scale folded into the first convolution (DETECTOR_UINT8_INPUT).
+
+Each mode loads its own AutoShape model, since folding rescales the first conv in place. Reported
+per image: AutoShape's pre-processing and inference times and the size of the input tensor, then
+the largest difference between the detections of both modes.
+
+Usage:
+    $ python benchmarks/uint8_input.py --weights models/yolov5s.pt --images path/to/captures
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import torch
+from PIL import Image
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[1]  # ml_service directory
+
+
+def run(weights, images, size=640, repeats=3):
+    files = sorted(p for p in Path(images).rglob("*") if p.suffix.lower() in {".jpg", ".jpeg", ".png"})
+    arrays = [np.asarray(Image.open(f).convert("RGB")) for f in files]
+    results = {}
+    print(f"{len(arrays)} images\n")
+    print(f"{'input':<7} {'pre ms':>7} {'infer ms':>9} {'input MB':>9}")
+    for mode in ("float", "uint8"):
+        model = torch.hub.load(str(ROOT / "yolov5"), "custom", path=weights, source="local", verbose=False)
+        if mode == "uint8":
+            model.model.model.fold_input_scale()  # AutoShape -> DetectMultiBackend -> DetectionModel
+            model.model.uint8 = True
+        inputs = []
+        model.model.register_forward_pre_hook(lambda m, args, inputs=inputs: inputs.append(args[0].nbytes))
+        model(arrays[0], size=size)  # warmup
+        inputs.clear()
+        pre, infer = [], []
+        for _ in range(repeats):
+            for im in arrays:
+                r = model(im, size=size)
+                pre.append(r.t[0])
+                infer.append(r.t[1])
+        results[mode] = [model(im, size=size).pred[0] for im in arrays]
+        print(f"{mode:<7} {np.mean(pre):>7.2f} {np.mean(infer):>9.2f} {np.mean(inputs) / 1e6:>9.2f}")
+
+    diffs = [
+        (a - b).abs().max().item() if a.shape == b.shape and len(a) else 0.0 if a.shape == b.shape else float("inf")
+        for a, b in zip(results["float"], results["uint8"])
+    ]
+    print(
+        f"\nmax detection difference {max(diffs):.2e} ({sum(d < 1e-3 for d in diffs)}/{len(diffs)} images within 1e-3)"
+    )
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", type=str, default="models/yolov5s.pt", help="detector weights")
+    parser.add_argument("--images", type=str, required=True, help="directory of sample captures")
+    parser.add_argument("--size", type=int, default=640, help="inference size (long side, pixels)")
+    parser.add_argument("--repeats", type=int, default=3, help="passes over the images per mode")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
@@ -0,0 +1,43 @@
+import io
+
+import numpy as np
+from PIL import Image, ImageOps
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds the configured byte or pixel limits"""
+
+
+def decode_upload(image_bytes, max_size, max_pixels):
+    """
+    Decode an uploaded image straight to (at most) `max_size` on its longest side.
+
+    The dimensions are checked from the header before any pixel data is decoded.
+    JPEGs are decoded with libjpeg's DCT scaling (1/2, 1/4, 1/8) so a 12 MP photo
+    never exists at full resolution, EXIF orientation is applied once in place,
+    and only the remaining small step is done with a LANCZOS resize.
+    """
+    image = Image.open(io.BytesIO(image_bytes))  # lazy, reads the header only
+    width, height = image.size
+    if width * height > max_pixels:
+        raise UploadTooLarge(f"Image is {width}x{height} ({width * height} pixels), limit is {max_pixels} pixels")
+
+    if max(width, height) > max_size:
+        ratio = max_size / max(width, height)
+        image.draft("RGB", (max(1, int(width * ratio)), max(1, int(height * ratio))))  # no-op for non-JPEG
+
+    ImageOps.exif_transpose(image, in_place=True)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    if max(image.size) > max_size:
+        ratio = max_size / max(image.size)
+        new_size = tuple(max(1, int(dim * ratio)) for dim in image.size)
+        image = image.resize(new_size, Image.Resampling.LANCZOS)
+    return image
+
+
+def to_detector_array(image):
+    """HWC uint8 RGB array that AutoShape can use as-is (no exif_transpose, no extra copies)"""
+    array = np.asarray(image)
+    return array if array.flags.c_contiguous else np.ascontiguousarray(array)
@@ -1,17 +1,53 @@
-from fastapi import FastAPI, File, UploadFile
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, Header, UploadFile
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-import torch
-from PIL import Image, ImageDraw, ImageFont, ImageEnhance
+from starlette.concurrency import run_in_threadpool
+from PIL import ImageDraw, ImageFont, ImageEnhance
+import asyncio
 import io
-import base64
 import logging
 import platform
 import pathlib
 import os
+import threading
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 from collections import Counter
 import numpy as np
+from image_decode import UploadTooLarge, decode_upload, to_detector_array
+from model_registry import ModelRegistry
+from model_runner import call_runner, start_runner
+from phash_cache import NearDuplicateCache, dhash
+from response_codec import MSGPACK_MEDIA_TYPE, PackedArray, PngImage, encode_msgpack, negotiate, to_json_content
+from runner_loaders import (
+    CONF_THRESHOLD,
+    CUSTOM_WASTE_CLASSES,
+    DETECTOR_ARTIFACT,
+    DETECTOR_AUGMENT,
+    DETECTOR_CPU_BF16,
+    DETECTOR_CPU_CHANNELS_LAST,
+    DETECTOR_INPUT_SIZE,
+    DETECTOR_ONNX_IO_BINDING,
+    DETECTOR_ONNX_OPTIMIZATION,
+    DETECTOR_SHAPE_BUCKETS,
+    DETECTOR_SPARSE_DECODE,
+    DETECTOR_UINT8_INPUT,
+    IOU_THRESHOLD,
+    MAX_DETECTIONS,
+    MAX_IMAGE_SIZE,
+    ONNX_SESSION_POOL_SIZE,
+    TILE_BATCH_SIZE,
+    TILE_OVERLAP,
+    TILE_SIZE,
+    classify_with_custom_model,
+    detect_with_yolov5,
+    load_custom_model,
+    load_default_model,
+    warmup_custom_model,
+    warmup_default_model,
+)
+from tracing import Tracer, set_attributes, slowest, span, span_summary
 
 # Fix for loading models trained on Linux/Mac in Windows
 if platform.system() == 'Windows':
@@ -20,7 +56,19 @@ if platform.system() == 'Windows':
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="WasteVision API", description="Identify recyclable, biodegradable, and hazardous waste from images.")
+
+@asynccontextmanager
+async def lifespan(app):
+    """Start loading the models in the background; the API answers health checks while they load"""
+    threading.Thread(target=load_models, name="model-startup", daemon=True).start()
+    yield
+
+
+app = FastAPI(
+    title="WasteVision API",
+    description="Identify recyclable, biodegradable, and hazardous waste from images.",
+    lifespan=lifespan,
+)
 
 app.add_middleware(
    CORSMiddleware,
@@ -35,70 +83,64 @@ os.makedirs(TEMP_STORAGE_DIR, exist_ok=True)
 
 # Model paths
 MODEL_PATH_SAVEDMODEL = "models/trained_v3_savedmodel"  # SavedModel format
+MODEL_PATH_ONNX_CLASSIFIER = "models/trained_v3.onnx"  # Converted with: python onnx_classifier.py --images samples/
+# Not committed: copy yolov5s.pt (or a trained detector) here, otherwise the first load downloads it from GitHub.
+# May also be an exported .onnx, served without torch by onnx_detector.py
 MODEL_PATH_DEFAULT = "models/yolov5s.pt"
 
-logger.info("Loading models...")
-
-# Load TensorFlow SavedModel
-model_custom = None
-try:
-    import tensorflow as tf
-    from tensorflow import keras
-    
-    logger.info(f"TensorFlow version: {tf.__version__}")
-    
-    if not os.path.exists(MODEL_PATH_SAVEDMODEL):
-        raise FileNotFoundError(f"SavedModel not found at {MODEL_PATH_SAVEDMODEL}")
-    
-    logger.info(f"Loading SavedModel from {MODEL_PATH_SAVEDMODEL}...")
-    
-    # Use TFSMLayer for Keras 3 compatibility
-    model_custom = keras.layers.TFSMLayer(
-        MODEL_PATH_SAVEDMODEL, 
-        call_endpoint='serving_default'
-    )
-    logger.info("✓ SavedModel loaded successfully as TFSMLayer")
-    
-except Exception as e:
-    logger.error(f"Failed to load SavedModel: {str(e)}", exc_info=True)
-    logger.error("Make sure tensorflow is installed: pip install tensorflow")
-    logger.error(f"And that the SavedModel exists at: {MODEL_PATH_SAVEDMODEL}")
-    model_custom = None
-
-# Load default YOLOv5 model
-try:
-    model_default = torch.hub.load('ultralytics/yolov5', 'yolov5s', force_reload=False)
-    logger.info("✓ Default YOLOv5 model loaded successfully")
-except Exception as e:
-    logger.error(f"Failed to load default model: {str(e)}")
-    raise
-
-# Detection configuration - OPTIMIZED FOR CAMERA CAPTURES
-CONF_THRESHOLD = 0.30  # Increased to reduce false positives
-IOU_THRESHOLD = 0.45   # Increased to reduce overlapping boxes
-MAX_DETECTIONS = 100   # Reasonable limit for performance
+# "onnx" serves the classifier through ONNX Runtime, so TensorFlow is never imported
+CLASSIFIER_BACKEND = "tensorflow"
+CUSTOM_MODEL_SOURCE = MODEL_PATH_ONNX_CLASSIFIER if CLASSIFIER_BACKEND == "onnx" else MODEL_PATH_SAVEDMODEL
+
+# Host each model in its own runner process (inputs via shared memory) so this process stays
+# small and never imports TensorFlow or PyTorch. Compare with benchmarks/runner_layout.py
+MODEL_RUNNER_PROCESSES = False
+# Detection, tiling and ONNX session settings are in runner_loaders.py, next to the functions that load and run the
+# models, because runner processes import that module without this app
+
+
+def classifier_format(source):
+    return "ONNX Runtime" if str(source).endswith(".onnx") else "SavedModel (TFSMLayer)"
+
 
 # Image preprocessing configuration
 ENABLE_PREPROCESSING = True  # Set to False to disable preprocessing
-MAX_IMAGE_SIZE = 1280  # Maximum dimension for image processing
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024  # Reject larger uploads before reading them
+MAX_UPLOAD_PIXELS = 50_000_000  # Reject larger images from the header, before decoding
 CONTRAST_FACTOR = 1.2  # Increase contrast (1.0 = no change)
 SHARPNESS_FACTOR = 1.3  # Increase sharpness (1.0 = no change)
 BRIGHTNESS_FACTOR = 1.1  # Increase brightness (1.0 = no change)
 
+# Near-duplicate cache configuration (perceptual hash of the decoded upload)
+ENABLE_NEAR_DUPLICATE_CACHE = True  # Reuse results for re-captures of the same item
+NEAR_DUPLICATE_MAX_DISTANCE = 6  # Max Hamming distance between 64-bit dHashes (tune with benchmarks/phash_threshold.py)
+NEAR_DUPLICATE_WINDOW_SECONDS = 30.0  # Only reuse results this recent
+NEAR_DUPLICATE_MAX_ENTRIES = 256  # Bounded in-memory index size
+
+# Request tracing - spans of sampled /identify requests (summarize with: python tracing.py traces/identify.jsonl)
+TRACE_SAMPLE_RATE = 0.0  # Share of requests traced, 0 disables tracing
+TRACE_MAX_REQUESTS = 1000  # Most recent traces kept in memory for /traces
+TRACE_FILE = "traces/identify.jsonl"  # Also append traces here (None to keep them in memory only)
+
+tracer = Tracer(TRACE_SAMPLE_RATE, TRACE_MAX_REQUESTS, TRACE_FILE)
+
+near_duplicate_cache = NearDuplicateCache(
+    max_entries=NEAR_DUPLICATE_MAX_ENTRIES,
+    max_distance=NEAR_DUPLICATE_MAX_DISTANCE,
+    window_seconds=NEAR_DUPLICATE_WINDOW_SECONDS,
+)
+
+# Tiled inference configuration - full bins / conveyor belts with many small items
+TILED_INFERENCE = False  # Default for /identify, override per request with ?tiled=true
+TILED_MAX_IMAGE_SIZE = 2560  # Decode bound in tiled mode so small items keep their pixels
+
 # Bounding box configuration
 LINE_THICKNESS = 5
 FONT_SIZE = 20
 HIDE_LABELS = False
 HIDE_CONF = False
 
-# Custom model waste classes mapping
-CUSTOM_WASTE_CLASSES = {
-    0: "hazardous",
-    1: "recyclable",
-    2: "biodegradable",
-    3: "nonbiodegradable"
-}
-
+# Colors of the custom model's waste classes (CUSTOM_WASTE_CLASSES in runner_loaders.py)
 CUSTOM_COLORS = {
     "hazardous": "red",
     "recyclable": "green",
@@ -198,14 +240,7 @@ def preprocess_camera_image(image):
     """
     try:
         logger.info("Starting image preprocessing...")
-        
-        # Resize if image is too large
-        if max(image.size) > MAX_IMAGE_SIZE:
-            ratio = MAX_IMAGE_SIZE / max(image.size)
-            new_size = tuple(int(dim * ratio) for dim in image.size)
-            image = image.resize(new_size, Image.Resampling.LANCZOS)
-            logger.info(f"Image resized to: {image.size}")
-        
+
         # Increase contrast for better object distinction
         enhancer = ImageEnhance.Contrast(image)
         image = enhancer.enhance(CONTRAST_FACTOR)
@@ -235,10 +270,16 @@ async def root():
     return {
         "service": "WasteVision API",
         "status": "running",
-        "custom_model_loaded": model_custom is not None,
-        "custom_model_format": "SavedModel (TFSMLayer)" if model_custom else "Not loaded",
-        "custom_model_type": "Image Classification (entire image)" if model_custom else None,
-        "default_model_loaded": True,
+        "ready": service_state["ready"],
+        "phase": service_state["phase"],
+        "custom_model_loaded": model_registry.active("custom") is not None,
+        "custom_model_format": (
+            classifier_format(model_registry.active("custom").source)
+            if model_registry.active("custom")
+            else "Not loaded"
+        ),
+        "custom_model_type": "Image Classification (entire image)" if model_registry.active("custom") else None,
+        "default_model_loaded": model_registry.active("default") is not None,
         "default_model_type": "YOLOv5 Object Detection (with bounding boxes)",
         "classes": list(CUSTOM_WASTE_CLASSES.values()),
         "detection_config": {
@@ -246,7 +287,8 @@ async def root():
             "iou_threshold": IOU_THRESHOLD,
             "max_detections": MAX_DETECTIONS,
             "preprocessing_enabled": ENABLE_PREPROCESSING
-        }
+        },
+        "near_duplicate_cache": near_duplicate_cache.stats() if ENABLE_NEAR_DUPLICATE_CACHE else None
     }
 
 
@@ -254,10 +296,25 @@ async def root():
 async def get_config():
     """Get current detection configuration"""
     return {
+        "classifier": {
+            "backend": CLASSIFIER_BACKEND,
+            "source": CUSTOM_MODEL_SOURCE,
+            "onnx_session_pool_size": ONNX_SESSION_POOL_SIZE
+        },
         "detection": {
             "confidence_threshold": CONF_THRESHOLD,
             "iou_threshold": IOU_THRESHOLD,
-            "max_detections": MAX_DETECTIONS
+            "max_detections": MAX_DETECTIONS,
+            "artifact": DETECTOR_ARTIFACT,
+            "input_size": DETECTOR_INPUT_SIZE,
+            "shape_buckets": DETECTOR_SHAPE_BUCKETS,
+            "sparse_decode": DETECTOR_SPARSE_DECODE,
+            "uint8_input": DETECTOR_UINT8_INPUT,
+            "cpu_channels_last": DETECTOR_CPU_CHANNELS_LAST,
+            "cpu_bf16": DETECTOR_CPU_BF16,
+            "onnx_optimization": DETECTOR_ONNX_OPTIMIZATION,
+            "onnx_io_binding": DETECTOR_ONNX_IO_BINDING,
+            "augment": DETECTOR_AUGMENT
         },
         "preprocessing": {
             "enabled": ENABLE_PREPROCESSING,
@@ -265,143 +322,335 @@ async def get_config():
             "contrast_factor": CONTRAST_FACTOR,
             "sharpness_factor": SHARPNESS_FACTOR,
             "brightness_factor": BRIGHTNESS_FACTOR
+        },
+        "near_duplicate_cache": {
+            "enabled": ENABLE_NEAR_DUPLICATE_CACHE,
+            "max_distance": NEAR_DUPLICATE_MAX_DISTANCE,
+            "window_seconds": NEAR_DUPLICATE_WINDOW_SECONDS,
+            "max_entries": NEAR_DUPLICATE_MAX_ENTRIES
+        },
+        "tiled_inference": {
+            "default": TILED_INFERENCE,
+            "max_image_size": TILED_MAX_IMAGE_SIZE,
+            "tile_size": TILE_SIZE,
+            "overlap": TILE_OVERLAP,
+            "batch_size": TILE_BATCH_SIZE
+        },
+        "tracing": {
+            "sample_rate": TRACE_SAMPLE_RATE,
+            "max_requests": TRACE_MAX_REQUESTS,
+            "file": TRACE_FILE
         }
     }
 
 
-def classify_with_tensorflow(image, model):
-    """Classify entire image using TensorFlow SavedModel via TFSMLayer"""
+def same_classification(active_output, candidate_output):
+    """Shadow agreement for the classifier: both versions pick the same waste type"""
+    active_response, candidate_response = active_output[0], candidate_output[0]
+    return bool(active_response and candidate_response) and active_response[0]["type"] == candidate_response[0]["type"]
+
+
+def same_detected_items(active_output, candidate_output):
+    """Shadow agreement for the detector: both versions find the same items, ignoring order"""
+    return Counter(det["name"] for det in active_output) == Counter(det["name"] for det in candidate_output)
+
+
+# Model registry - versions can be loaded, shadowed and swapped at runtime (see /models)
+model_registry = ModelRegistry()
+
+
+def register_model_slot(name, loader, infer, warmup, compare):
+    """Register a slot served in this process, or by a runner process when MODEL_RUNNER_PROCESSES is set"""
+    if MODEL_RUNNER_PROCESSES:
+        model_registry.register(name, start_runner(name, loader, infer, warmup), call_runner, compare=compare)
+    else:
+        model_registry.register(name, loader, infer, warmup=warmup, compare=compare)
+
+
+register_model_slot("custom", load_custom_model, classify_with_custom_model, warmup_custom_model, same_classification)
+register_model_slot("default", load_default_model, detect_with_yolov5, warmup_default_model, same_detected_items)
+
+# Service lifecycle - models load and warm up in the background once the server has started
+service_state = {"phase": "starting", "ready": False, "error": None, "ready_after_seconds": None}
+request_latency = {"first_ms": None, "steady_count": 0, "steady_total_ms": 0.0}
+STARTED_AT = time.time()
+
+
+def load_models():
+    """Load and warm up both models, then mark the service ready"""
+    service_state["phase"] = "loading"
+    logger.info("Loading models...")
+
+    # Load the classifier (TensorFlow SavedModel or its ONNX conversion)
     try:
-        import tensorflow as tf
-        
-        # Default input size - adjust based on your model
-        target_size = (224, 224)  # Common size, adjust if needed
-        
-        logger.info(f"Resizing image to {target_size}")
-        
-        # Preprocess image
-        img_resized = image.resize(target_size)
-        img_array = np.array(img_resized, dtype=np.float32)
-        
-        # Normalize to [0, 1]
-        img_array = img_array / 255.0
-        
-        # Add batch dimension
-        img_array = np.expand_dims(img_array, axis=0)
-        
-        logger.info(f"Input shape: {img_array.shape}")
-        
-        # Run inference - TFSMLayer returns a dictionary
-        result = model(img_array)
-        
-        # Extract predictions from the result dictionary
-        if isinstance(result, dict):
-            # Try common output keys
-            if 'output_0' in result:
-                predictions = result['output_0'].numpy()
-            elif 'dense' in result:
-                predictions = result['dense'].numpy()
-            else:
-                # Take the first output
-                predictions = list(result.values())[0].numpy()
-                logger.info(f"Available output keys: {list(result.keys())}")
-        else:
-            predictions = result.numpy()
-        
-        logger.info(f"Raw predictions shape: {predictions.shape}")
-        logger.info(f"Raw predictions: {predictions[0]}")
-        
-        # Get class with highest confidence
-        class_idx = np.argmax(predictions[0])
-        confidence = float(predictions[0][class_idx])
-        
-        waste_type = CUSTOM_WASTE_CLASSES.get(class_idx, "unknown")
-        
-        logger.info(f"✓ Classification: {waste_type} (class {class_idx}) with confidence {confidence:.2%}")
-        
-        # Get all class probabilities
-        all_predictions = {}
-        for idx, prob in enumerate(predictions[0]):
-            class_name = CUSTOM_WASTE_CLASSES.get(idx, f"class_{idx}")
-            all_predictions[class_name] = float(prob)
-        
-        logger.info(f"All class probabilities: {all_predictions}")
-        
-        return [{
-            "item": waste_type,
-            "type": waste_type,
-            "confidence": confidence,
-            "all_probabilities": all_predictions
-        }], {waste_type: 100.0}, 1
-        
+        model_registry.load("custom", "trained_v3", CUSTOM_MODEL_SOURCE, background=False)
+    except Exception:
+        runtime = "onnxruntime" if CLASSIFIER_BACKEND == "onnx" else "tensorflow"
+        logger.error(f"Make sure {runtime} is installed: pip install {runtime}")
+        logger.error(f"And that the model exists at: {CUSTOM_MODEL_SOURCE}")
+
+    # Load default YOLOv5 model
+    try:
+        model_registry.load("default", "yolov5s", MODEL_PATH_DEFAULT, background=False)
+        logger.info("✓ Default YOLOv5 model loaded successfully")
     except Exception as e:
-        logger.error(f"TensorFlow classification error: {str(e)}", exc_info=True)
-        return [], {}, 0
+        logger.error(f"Failed to load default model: {str(e)}")
+        service_state.update(phase="failed", error=str(e))
+        return
+
+    service_state.update(phase="ready", ready=True, ready_after_seconds=round(time.time() - STARTED_AT, 2))
+    logger.info(f"✓ Service ready {service_state['ready_after_seconds']}s after start")
+
+
+def record_request_latency(seconds):
+    """Log each /identify latency against the first request and the steady-state mean"""
+    ms = seconds * 1e3
+    if request_latency["first_ms"] is None:
+        request_latency["first_ms"] = ms
+        logger.info(f"First /identify request took {ms:.0f} ms")
+        return
+    request_latency["steady_count"] += 1
+    request_latency["steady_total_ms"] += ms
+    steady = request_latency["steady_total_ms"] / request_latency["steady_count"]
+    logger.info(
+        f"/identify took {ms:.0f} ms (first request {request_latency['first_ms']:.0f} ms, "
+        f"steady-state mean {steady:.0f} ms over {request_latency['steady_count']} requests)"
+    )
+
+
+@app.get("/health/live")
+async def liveness():
+    """The process is up and serving HTTP (models may still be loading)"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """Models are loaded and warmed up; 503 until then"""
+    steady_count = request_latency["steady_count"]
+    content = {
+        **service_state,
+        "first_request_ms": request_latency["first_ms"],
+        "steady_state_mean_ms": request_latency["steady_total_ms"] / steady_count if steady_count else None,
+    }
+    return JSONResponse(content=content, status_code=200 if service_state["ready"] else 503)
+
+
+@app.get("/models")
+async def list_models():
+    """Active and candidate model versions with latency and shadow agreement statistics"""
+    return model_registry.status()
+
+
+@app.post("/models/{slot}/load")
+async def load_model(slot: str, source: str, version: str, candidate: bool = False, sample_rate: float = 0.0):
+    """
+    Load a new model version in the background.
+
+    With candidate=true the version only receives a `sample_rate` share of traffic as
+    shadow requests; otherwise it replaces the active version once warmed up.
+    """
+    if not 0.0 <= sample_rate <= 1.0:
+        return JSONResponse(content={"error": "sample_rate must be between 0 and 1"}, status_code=400)
+    try:
+        model_registry.load(slot, version, source, as_candidate=candidate, sample_rate=sample_rate)
+    except KeyError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=404)
+    return JSONResponse(content={"slot": slot, "version": version, "status": "loading"}, status_code=202)
+
+
+@app.post("/models/{slot}/promote")
+async def promote_model(slot: str):
+    """Make the shadow candidate the active version"""
+    try:
+        promoted = model_registry.promote(slot)
+    except KeyError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=404)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=409)
+    return {"slot": slot, "active": promoted.version}
+
+
+@app.delete("/models/{slot}/candidate")
+async def drop_candidate_model(slot: str):
+    """Stop shadowing and unload the candidate version"""
+    try:
+        model_registry.drop_candidate(slot)
+    except KeyError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=404)
+    return {"slot": slot, "candidate": None}
+
+
+def active_model_versions():
+    """Identify the loaded classifier and detector versions, each load counting as a new version"""
+    return tuple(
+        (version.version, version.loaded_at) if (version := model_registry.active(slot)) else None
+        for slot in ("custom", "default")
+    )
+
+
+async def run_model(span_name, slot, inputs, **options):
+    """Run a registry slot on the thread pool, traced as one span"""
+    with span(span_name, slot=slot) as run:
+        output, version = await run_in_threadpool(model_registry.run, slot, inputs, **options)
+        run.set(version=version.version)
+    return output, version
+
+
+def build_response(content, media_type):
+    """Encode an /identify response as JSON (default) or msgpack when the client asked for it"""
+    with span("encode", media_type=media_type) as encode:
+        if media_type == MSGPACK_MEDIA_TYPE:
+            response = Response(content=encode_msgpack(content), media_type=MSGPACK_MEDIA_TYPE)
+        else:
+            response = JSONResponse(content=to_json_content(content))
+        encode.set(bytes=len(response.body))
+    return response
+
+
+@app.middleware("http")
+async def trace_identify(request, call_next):
+    """Trace sampled /identify requests end to end"""
+    if request.url.path != "/identify":
+        return await call_next(request)
+    with tracer.trace("identify") as trace:
+        response = await call_next(request)
+        if trace is not None:
+            trace.set(status_code=response.status_code)
+        return response
+
+
+@app.get("/traces")
+async def get_traces(top: int = 10):
+    """Span statistics and the slowest recently traced /identify requests"""
+    traces = tracer.traces()
+    return {
+        "sample_rate": tracer.sample_rate,
+        "traced_requests": len(traces),
+        "spans": span_summary(traces),
+        "slowest": slowest(traces, top),
+    }
 
 
 @app.post("/identify")
-async def identify(file: UploadFile = File(...)):
+async def identify(
+    file: UploadFile = File(...), accept: str = Header(None), tiled: bool = None, augment: bool = None
+):
+    media_type = negotiate(accept)
+    tiled = TILED_INFERENCE if tiled is None else tiled
+    augment = DETECTOR_AUGMENT if augment is None else augment
+    if not service_state["ready"]:
+        return JSONResponse(
+            content={"error": "Models are still loading", "phase": service_state["phase"]}, status_code=503
+        )
+    request_started = time.perf_counter()
     try:
         logger.info(f"Received file: {file.filename}")
 
-        image_bytes = await file.read()
+        if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+            logger.warning(f"Rejected upload of {file.size} bytes (limit {MAX_UPLOAD_BYTES})")
+            return JSONResponse(content={"error": f"Upload exceeds {MAX_UPLOAD_BYTES} bytes"}, status_code=413)
+
+        with span("upload.read") as read:
+            image_bytes = await file.read()
+            read.set(bytes=len(image_bytes))
         logger.info(f"Image size: {len(image_bytes)} bytes")
-        
+
+        # Header check, reduced JPEG decode, EXIF orientation and resize to MAX_IMAGE_SIZE in one pass
+        with span("decode", bytes=len(image_bytes)) as decode:
+            try:
+                max_size = TILED_MAX_IMAGE_SIZE if tiled else MAX_IMAGE_SIZE
+                image = decode_upload(image_bytes, max_size, MAX_UPLOAD_PIXELS)
+            except UploadTooLarge as e:
+                logger.warning(f"Rejected upload: {str(e)}")
+                return JSONResponse(content={"error": str(e)}, status_code=413)
+            decode.set(image_size=image.size)
+        logger.info(f"Decoded image dimensions: {image.size}")
+        set_attributes(upload_bytes=len(image_bytes), image_size=image.size, tiled=tiled, augment=augment)
+
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         original_filename = file.filename or "uploaded_image.jpg"
         saved_filename = f"{timestamp}_{original_filename}"
         saved_filepath = os.path.join(TEMP_STORAGE_DIR, saved_filename)
         
-        with open(saved_filepath, "wb") as f:
+        with span("upload.persist", bytes=len(image_bytes)), open(saved_filepath, "wb") as f:
             f.write(image_bytes)
         logger.info(f"Image saved to: {saved_filepath}")
-        
-        image = Image.open(io.BytesIO(image_bytes))
-        logger.info(f"Original image dimensions: {image.size}")
-        
+
+        # Reuse the previous result if this is a re-capture of a recently seen item (plain whole-image mode only)
+        image_hash = None
+        if ENABLE_NEAR_DUPLICATE_CACHE and not tiled and not augment:
+            versions = active_model_versions()  # a swapped or promoted version never reuses older results
+            with span("near_duplicate.lookup") as lookup:
+                image_hash = dhash(image)
+                cached = near_duplicate_cache.lookup(image_hash, versions)
+                lookup.set(hit=cached is not None)
+            set_attributes(near_duplicate_hit=cached is not None)
+            if cached is not None:
+                cached_response, distance, age = cached
+                logger.info(f"Near-duplicate hit (distance {distance}, {age:.1f}s old), reusing previous result")
+                response_data = dict(cached_response)
+                response_data["saved_file"] = saved_filename
+                response_data["near_duplicate"] = {"hit": True, "distance": distance, "age_seconds": round(age, 2)}
+                record_request_latency(time.perf_counter() - request_started)
+                return build_response(response_data, media_type)
+
         # Apply preprocessing for better detection accuracy
         if ENABLE_PREPROCESSING:
-            image = preprocess_camera_image(image)
+            with span("preprocess"):
+                image = preprocess_camera_image(image)
         else:
             logger.info("Preprocessing disabled, using original image")
 
         response_data = {}
 
+        # Start the detector first so both models run concurrently (in parallel with runner processes)
+        logger.info("Running YOLOv5 object detection...")
+        detection = asyncio.ensure_future(
+            run_model("detector", "default", to_detector_array(image), tiled=tiled, augment=augment)
+        )
+
         # Custom model classification (TensorFlow)
-        if model_custom is not None:
+        if model_registry.active("custom") is not None:
             logger.info("Running TensorFlow SavedModel classification...")
+
+            (custom_response, custom_percentages, total_custom), custom_version = await run_model(
+                "classifier", "custom", image
+            )
             
-            custom_response, custom_percentages, total_custom = classify_with_tensorflow(image, model_custom)
+            with span("render.classifier"):
+                # Create image with text overlay
+                image_custom = image.copy()
+                draw_custom = ImageDraw.Draw(image_custom)
+                try:
+                    font = ImageFont.truetype("arial.ttf", 40)
+                except:
+                    font = ImageFont.load_default()
             
-            # Create image with text overlay
-            image_custom = image.copy()
-            draw_custom = ImageDraw.Draw(image_custom)
-            try:
-                font = ImageFont.truetype("arial.ttf", 40)
-            except:
-                font = ImageFont.load_default()
-            
-            if custom_response:
-                waste_type = custom_response[0]["type"]
-                confidence = custom_response[0]["confidence"]
-                color = CUSTOM_COLORS.get(waste_type, "white")
-                text = f"{waste_type.upper()}: {confidence:.2%}"
+                if custom_response:
+                    waste_type = custom_response[0]["type"]
+                    confidence = custom_response[0]["confidence"]
+                    color = CUSTOM_COLORS.get(waste_type, "white")
+                    text = f"{waste_type.upper()}: {confidence:.2%}"
                 
-                # Draw text with background
-                text_bbox = draw_custom.textbbox((10, 10), text, font=font)
-                draw_custom.rectangle(text_bbox, fill="black")
-                draw_custom.text((10, 10), text, fill=color, font=font)
+                    # Draw text with background
+                    text_bbox = draw_custom.textbbox((10, 10), text, font=font)
+                    draw_custom.rectangle(text_bbox, fill="black")
+                    draw_custom.text((10, 10), text, fill=color, font=font)
             
-            buffered_custom = io.BytesIO()
-            image_custom.save(buffered_custom, format="PNG")
-            img_custom_str = base64.b64encode(buffered_custom.getvalue()).decode()
+                buffered_custom = io.BytesIO()
+                image_custom.save(buffered_custom, format="PNG")
+
+            custom_probabilities = custom_response[0]["all_probabilities"] if custom_response else {}
             
             response_data["custom_model"] = {
                 "detections": custom_response,
                 "percentages": custom_percentages,
                 "total_detections": total_custom,
-                "image": f"data:image/png;base64,{img_custom_str}",
-                "model_format": "SavedModel (TFSMLayer)",
+                "image": PngImage(buffered_custom.getvalue()),
+                "scores": PackedArray(list(custom_probabilities.values()), np.float32),
+                "model_format": classifier_format(custom_version.source),
+                "model_version": custom_version.version,
                 "note": "TensorFlow classification - classifies entire image into one category"
             }
         else:
@@ -411,18 +660,13 @@ async def identify(file: UploadFile = File(...)):
                 "detections": [],
                 "percentages": {},
                 "total_detections": 0,
-                "solution": f"Place your SavedModel at {MODEL_PATH_SAVEDMODEL}"
+                "solution": f"Place your model at {CUSTOM_MODEL_SOURCE}"
             }
 
         # Default model detection (YOLOv5)
-        logger.info("Running YOLOv5 object detection...")
-        model_default.conf = CONF_THRESHOLD
-        model_default.iou = IOU_THRESHOLD
-        model_default.max_det = MAX_DETECTIONS
-
-        results_default = model_default(image)
-        detections_default = results_default.pandas().xyxy[0].to_dict(orient="records")
+        detections_default, default_version = await detection
         logger.info(f"Default model found {len(detections_default)} detections")
+        set_attributes(detections=len(detections_default))
 
         default_class_counts = Counter()
         default_response = []
@@ -447,50 +691,66 @@ async def identify(file: UploadFile = File(...)):
                 default_percentages[waste_type] = round(percentage, 2)
 
         # Draw bounding boxes
-        logger.info("Drawing YOLOv5 bounding boxes...")
-        image_default = image.copy()
-        draw_default = ImageDraw.Draw(image_default)
-        try:
-            font = ImageFont.truetype("arial.ttf", FONT_SIZE)
-        except:
-            font = ImageFont.load_default()
+        with span("render.detector", detections=len(detections_default)):
+            logger.info("Drawing YOLOv5 bounding boxes...")
+            image_default = image.copy()
+            draw_default = ImageDraw.Draw(image_default)
+            try:
+                font = ImageFont.truetype("arial.ttf", FONT_SIZE)
+            except:
+                font = ImageFont.load_default()
 
-        for det in detections_default:
-            xmin, ymin, xmax, ymax = det["xmin"], det["ymin"], det["xmax"], det["ymax"]
-            label = det["name"]
-            confidence = det["confidence"]
-            waste_type = WASTE_CLASSES.get(label, "unknown")
+            for det in detections_default:
+                xmin, ymin, xmax, ymax = det["xmin"], det["ymin"], det["xmax"], det["ymax"]
+                label = det["name"]
+                confidence = det["confidence"]
+                waste_type = WASTE_CLASSES.get(label, "unknown")
+
+                color = {
+                    "recyclable": "green",
+                    "biodegradable": "blue",
+                    "hazardous": "red",
+                    "unknown": "gray",
+                    "not waste": "orange"
+                }.get(waste_type, "gray")
 
-            color = {
-                "recyclable": "green",
-                "biodegradable": "blue",
-                "hazardous": "red",
-                "unknown": "gray",
-                "not waste": "orange"
-            }.get(waste_type, "gray")
+                display_label = f"{label} ({waste_type})"
+                draw_default.rectangle([xmin, ymin, xmax, ymax], outline=color, width=LINE_THICKNESS)
 
-            display_label = f"{label} ({waste_type})"
-            draw_default.rectangle([xmin, ymin, xmax, ymax], outline=color, width=LINE_THICKNESS)
+                if not HIDE_LABELS:
+                    text = f"{display_label} {confidence:.2f}" if not HIDE_CONF else display_label
+                    draw_default.text((xmin, ymin - 25), text, fill=color, font=font)
 
-            if not HIDE_LABELS:
-                text = f"{display_label} {confidence:.2f}" if not HIDE_CONF else display_label
-                draw_default.text((xmin, ymin - 25), text, fill=color, font=font)
+            buffered_default = io.BytesIO()
+            image_default.save(buffered_default, format="PNG")
 
-        buffered_default = io.BytesIO()
-        image_default.save(buffered_default, format="PNG")
-        img_default_str = base64.b64encode(buffered_default.getvalue()).decode()
+        boxes_default = np.array(
+            [[det["xmin"], det["ymin"], det["xmax"], det["ymax"]] for det in detections_default], dtype=np.float32
+        ).reshape(-1, 4)
 
         response_data["default_model"] = {
             "detections": default_response,
             "percentages": default_percentages,
             "total_detections": total_default,
-            "image": f"data:image/png;base64,{img_default_str}"
+            "image": PngImage(buffered_default.getvalue()),
+            "model_version": default_version.version,
+            # Packed arrays are only included in binary (msgpack) responses
+            "boxes": PackedArray(boxes_default, np.float32),
+            "scores": PackedArray([det["confidence"] for det in detections_default], np.float32),
+            "class_ids": PackedArray([det["class"] for det in detections_default], np.int32)
         }
         response_data["saved_file"] = saved_filename
         response_data["preprocessing_applied"] = ENABLE_PREPROCESSING
+        response_data["tiled_inference"] = tiled
+        response_data["augmented_inference"] = augment
+
+        if image_hash is not None:
+            near_duplicate_cache.add(image_hash, dict(response_data), versions)
+            response_data["near_duplicate"] = {"hit": False}
 
         logger.info("Request completed successfully")
-        return JSONResponse(content=response_data)
+        record_request_latency(time.perf_counter() - request_started)
+        return build_response(response_data, media_type)
 
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}", exc_info=True)
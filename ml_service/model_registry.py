@@ -0,0 +1,216 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class VersionStats:
+    """Rolling latency and shadow-agreement statistics for one model version"""
+
+    def __init__(self, window=1000):
+        self.latencies = deque(maxlen=window)  # seconds
+        self.requests = 0
+        self.errors = 0
+        self.compared = 0
+        self.agreed = 0
+        self._lock = threading.Lock()
+
+    def record_latency(self, seconds):
+        with self._lock:
+            self.requests += 1
+            self.latencies.append(seconds)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def record_agreement(self, agreed):
+        with self._lock:
+            self.compared += 1
+            self.agreed += int(agreed)
+
+    def summary(self):
+        with self._lock:
+            latencies = np.array(self.latencies) * 1e3 if self.latencies else None
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "latency_ms": {
+                    "mean": round(float(latencies.mean()), 2),
+                    "p50": round(float(np.percentile(latencies, 50)), 2),
+                    "p95": round(float(np.percentile(latencies, 95)), 2),
+                }
+                if latencies is not None
+                else None,
+                "shadow_compared": self.compared,
+                "shadow_agreement": round(self.agreed / self.compared, 4) if self.compared else None,
+            }
+
+
+class ModelVersion:
+    """A loaded, warmed-up model together with where it came from and how it performs"""
+
+    def __init__(self, slot, version, source, model, load_seconds):
+        self.slot = slot
+        self.version = version
+        self.source = source
+        self.model = model
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self.stats = VersionStats()
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "source": self.source,
+            "load_seconds": round(self.load_seconds, 2),
+            "loaded_at": self.loaded_at,
+            **self.stats.summary(),
+        }
+
+
+class ModelSlot:
+    """Loader, inference and comparison functions for one named model (e.g. 'custom', 'default')"""
+
+    def __init__(self, name, loader, infer, warmup=None, compare=None):
+        self.name = name
+        self.loader = loader  # loader(source) -> model
+        self.infer = infer  # infer(model, inputs, **options) -> output
+        self.warmup = warmup  # warmup(model), optional
+        self.compare = compare  # compare(active_output, candidate_output) -> bool, optional
+        self.active = None
+        self.candidate = None
+        self.sample_rate = 0.0
+        self.loading = None  # version currently loading in the background
+        self.last_error = None
+
+
+class ModelRegistry:
+    """
+    Versioned models that can be replaced while the service keeps answering requests.
+
+    New versions are loaded and warmed up on a background thread, then swapped in by
+    replacing a single reference, so in-flight requests finish on the version they
+    started with. A candidate version can receive a sampled copy of live traffic on a
+    separate thread pool; its latency and agreement with the active version are kept
+    per version for comparison.
+    """
+
+    def __init__(self, shadow_workers=1):
+        self._slots = {}
+        self._lock = threading.Lock()
+        self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+        self._shadow = ThreadPoolExecutor(max_workers=shadow_workers, thread_name_prefix="model-shadow")
+
+    def register(self, name, loader, infer, warmup=None, compare=None):
+        self._slots[name] = ModelSlot(name, loader, infer, warmup, compare)
+
+    def _slot(self, name):
+        if name not in self._slots:
+            raise KeyError(f"Unknown model slot '{name}', available: {list(self._slots)}")
+        return self._slots[name]
+
+    def _load(self, slot, version, source, as_candidate, sample_rate):
+        logger.info(f"Loading {slot.name} model version '{version}' from {source}...")
+        t = time.perf_counter()
+        try:
+            model = slot.loader(source)
+            if slot.warmup is not None:
+                slot.warmup(model)
+        except Exception as e:
+            slot.last_error = f"{version}: {e}"
+            logger.error(f"Failed to load {slot.name} model version '{version}': {str(e)}", exc_info=True)
+            raise
+        finally:
+            with self._lock:
+                if slot.loading == version:  # a newer load of this slot may already be queued
+                    slot.loading = None
+        loaded = ModelVersion(slot.name, version, source, model, time.perf_counter() - t)
+        slot.last_error = None
+        with self._lock:
+            if as_candidate:
+                slot.candidate, slot.sample_rate = loaded, sample_rate
+            else:
+                slot.active = loaded
+        role = f"candidate (shadow {sample_rate:.0%})" if as_candidate else "active"
+        logger.info(f"✓ {slot.name} model version '{version}' is now {role} ({loaded.load_seconds:.1f}s)")
+        return loaded
+
+    def load(self, name, version, source, as_candidate=False, sample_rate=0.0, background=True):
+        """Load, warm up and install a version; returns a Future when `background`, else the ModelVersion"""
+        slot = self._slot(name)
+        with self._lock:
+            slot.loading = version
+        if not background:
+            return self._load(slot, version, source, as_candidate, sample_rate)
+        return self._loader.submit(self._load, slot, version, source, as_candidate, sample_rate)
+
+    def promote(self, name):
+        """Make the current candidate the active version"""
+        slot = self._slot(name)
+        with self._lock:
+            if slot.candidate is None:
+                raise ValueError(f"No candidate loaded for '{name}'")
+            slot.active, slot.candidate, slot.sample_rate = slot.candidate, None, 0.0
+        logger.info(f"✓ Promoted {name} model version '{slot.active.version}'")
+        return slot.active
+
+    def drop_candidate(self, name):
+        slot = self._slot(name)
+        with self._lock:
+            slot.candidate, slot.sample_rate = None, 0.0
+
+    def active(self, name):
+        """The active version of a slot, or None if nothing has been loaded"""
+        return self._slot(name).active
+
+    def run(self, name, inputs, **options):
+        """
+        Run the active version and mirror a sampled share of requests to the candidate.
+
+        Returns the output together with the ModelVersion that produced it.
+        """
+        slot = self._slot(name)
+        active, candidate, sample_rate = slot.active, slot.candidate, slot.sample_rate
+        if active is None:
+            raise RuntimeError(f"No {name} model loaded")
+        t = time.perf_counter()
+        try:
+            output = slot.infer(active.model, inputs, **options)
+        except Exception:
+            active.stats.record_error()
+            raise
+        active.stats.record_latency(time.perf_counter() - t)
+        if candidate is not None and random.random() < sample_rate:
+            self._shadow.submit(self._run_shadow, slot, candidate, inputs, options, output)
+        return output, active
+
+    def _run_shadow(self, slot, candidate, inputs, options, active_output):
+        t = time.perf_counter()
+        try:
+            output = slot.infer(candidate.model, inputs, **options)
+        except Exception as e:
+            candidate.stats.record_error()
+            logger.warning(f"Shadow {slot.name} model '{candidate.version}' failed: {str(e)}")
+            return
+        candidate.stats.record_latency(time.perf_counter() - t)
+        if slot.compare is not None:
+            candidate.stats.record_agreement(slot.compare(active_output, output))
+
+    def status(self):
+        return {
+            name: {
+                "active": slot.active.describe() if slot.active else None,
+                "candidate": slot.candidate.describe() if slot.candidate else None,
+                "shadow_sample_rate": slot.sample_rate,
+                "loading": slot.loading,
+                "last_error": slot.last_error,
+            }
+            for name, slot in self._slots.items()
+        }
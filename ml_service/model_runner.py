@@ -0,0 +1,144 @@
+import logging
+import os
+import resource
+import sys
+import threading
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+RSS_UNIT = 1024 if sys.platform != "darwin" else 1  # ru_maxrss is KiB on Linux, bytes on macOS
+
+
+def _peak_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT
+
+
+def _serve(conn, loader, infer, warmup, source):
+    """Runner process: load and warm up one model, then answer requests whose inputs arrive in shared memory"""
+    logging.basicConfig(level=logging.INFO)  # spawned, so the API process's logging setup is not inherited
+    try:
+        model = loader(source)
+        if warmup is not None:
+            warmup(model)
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", {"pid": os.getpid(), "peak_rss_bytes": _peak_rss()}))
+
+    shm = None
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:  # API process went away
+            break
+        if message is None:
+            break
+        shm_name, shape, dtype, as_image, options = message
+        if shm is None or shm.name != shm_name:  # parent grew its input buffer
+            if shm is not None:
+                shm.close()
+            shm = SharedMemory(name=shm_name)
+        array = np.ndarray(shape, dtype, shm.buf)
+        try:
+            conn.send(("ok", infer(model, Image.fromarray(array) if as_image else array, **options)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+        del array  # release the view so the buffer can be closed
+    if shm is not None:
+        shm.close()
+
+
+class RunnerModel:
+    """
+    A model hosted in a dedicated runner process.
+
+    The process imports only what its loader needs (TensorFlow or PyTorch), loads and warms
+    the model, then serves requests one at a time. Input images are written into a shared
+    memory buffer owned by this handle and only the small outputs travel back over a pipe.
+    Used in place of the model object in ModelRegistry slots; calling it runs `infer` in the
+    runner with the same arguments.
+    """
+
+    def __init__(self, name, loader, infer, source, warmup=None):
+        ctx = get_context("spawn")
+        self.name = name
+        self._conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(
+            target=_serve, args=(child_conn, loader, infer, warmup, source), name=f"runner-{name}", daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+        self._lock = threading.Lock()
+        self._shm = None
+        try:
+            status, info = self._conn.recv()
+        except EOFError:
+            status, info = "error", f"process exited with code {self._process.exitcode}"
+        if status != "ready":
+            self._process.join()
+            raise RuntimeError(f"{name} runner failed to start: {info}")
+        self.pid = info["pid"]
+        self.startup_peak_rss = info["peak_rss_bytes"]
+        logger.info(f"✓ {name} runner process {self.pid} ready ({self.startup_peak_rss / 1e6:.0f} MB peak RSS)")
+
+    def _input_buffer(self, nbytes):
+        if self._shm is None or self._shm.size < nbytes:
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+            self._shm = SharedMemory(create=True, size=max(nbytes, 1))
+        return self._shm
+
+    def __call__(self, inputs, **options):
+        as_image = isinstance(inputs, Image.Image)
+        array = np.asarray(inputs)
+        with self._lock:
+            if not self._process.is_alive():
+                raise RuntimeError(f"{self.name} runner process {self.pid} has exited")
+            shm = self._input_buffer(array.nbytes)
+            np.ndarray(array.shape, array.dtype, shm.buf)[...] = array
+            self._conn.send((shm.name, array.shape, array.dtype.str, as_image, options))
+            try:
+                status, output = self._conn.recv()
+            except EOFError:
+                status, output = "error", f"process {self.pid} exited during inference"
+        if status != "ok":
+            raise RuntimeError(f"{self.name} runner: {output}")
+        return output
+
+    def close(self):
+        """Stop the runner process and free the input buffer"""
+        with self._lock:
+            if self._process.is_alive():
+                try:
+                    self._conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                self._process.join(timeout=10)
+                if self._process.is_alive():
+                    self._process.terminate()
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+                self._shm = None
+
+    def __del__(self):
+        # Swapped-out versions are closed once the last in-flight request releases them
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def start_runner(name, loader, infer, warmup=None):
+    """Registry loader that hosts `loader(source)` in a runner process; pair with `call_runner` as the infer function"""
+    return lambda source: RunnerModel(name, loader, infer, source, warmup)
+
+
+def call_runner(model, inputs, **options):
+    return model(inputs, **options)
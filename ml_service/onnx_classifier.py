@@ -0,0 +1,120 @@
+"""
+ONNX Runtime serving of the waste classifier, plus the SavedModel -> ONNX conversion tool.
+
+Convert models/trained_v3_savedmodel and check that both models agree on sample images
+(needs tensorflow and tf2onnx, only at conversion time):
+    $ python onnx_classifier.py --savedmodel models/trained_v3_savedmodel --images samples/
+"""
+
+import argparse
+import os
+import queue
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+CLASSIFIER_INPUT_SIZE = (224, 224)
+
+
+def classifier_input(image, target_size=CLASSIFIER_INPUT_SIZE):
+    """Classifier input batch: resized RGB image scaled to [0, 1], shape (1, h, w, 3) float32"""
+    img_array = np.array(image.resize(target_size), dtype=np.float32)
+    return np.expand_dims(img_array / 255.0, axis=0)
+
+
+def predictions_from_output(result):
+    """Class scores from a classifier output dict (its 'output_0' or 'dense' entry, else the first) or tensor"""
+    if isinstance(result, dict):
+        for key in ("output_0", "dense"):
+            if key in result:
+                return np.asarray(result[key])
+        return np.asarray(next(iter(result.values())))
+    return np.asarray(result)
+
+
+class OnnxSessionPool:
+    """
+    A fixed pool of ONNX Runtime sessions for one model.
+
+    Each call borrows a free session, so concurrent requests run in parallel without sharing
+    a session's thread pool; the cores are split between the sessions. Called with an input
+    batch it returns {output name: array}, the same shape of result as the TFSMLayer.
+    """
+
+    def __init__(self, path, size=2, intra_op_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads or max(1, (os.cpu_count() or 1) // size)
+        self.path = str(path)
+        self._sessions = queue.Queue()
+        for _ in range(size):
+            self._sessions.put(ort.InferenceSession(self.path, options, providers=["CPUExecutionProvider"]))
+        session = self._sessions.queue[0]
+        self.input_name = session.get_inputs()[0].name
+        self.input_type = session.get_inputs()[0].type  # e.g. 'tensor(float)'
+        self.output_names = [x.name for x in session.get_outputs()]
+        self.metadata = session.get_modelmeta().custom_metadata_map
+        self.size = size
+
+    def __call__(self, inputs):
+        session = self._sessions.get()
+        try:
+            outputs = session.run(self.output_names, {self.input_name: inputs})
+        finally:
+            self._sessions.put(session)
+        return dict(zip(self.output_names, outputs))
+
+
+def convert(savedmodel, output, opset=13):
+    """Convert the SavedModel's serving_default signature to ONNX with tf2onnx"""
+    cmd = [sys.executable, "-m", "tf2onnx.convert", "--saved-model", str(savedmodel), "--output", str(output)]
+    subprocess.run(cmd + ["--opset", str(opset), "--signature_def", "serving_default"], check=True)
+
+
+def check_parity(savedmodel, onnx_path, images, atol=1e-4):
+    """Run both models on every image; returns (max absolute difference, top-1 agreement, image count)"""
+    from tensorflow import keras
+
+    tf_model = keras.layers.TFSMLayer(str(savedmodel), call_endpoint="serving_default")
+    ort_model = OnnxSessionPool(onnx_path, size=1)
+    files = sorted(p for p in Path(images).rglob("*") if p.suffix.lower() in {".jpg", ".jpeg", ".png"})
+    max_diff, agreed = 0.0, 0
+    for f in files:
+        x = classifier_input(Image.open(f).convert("RGB"))
+        expected = predictions_from_output(tf_model(x))
+        actual = predictions_from_output(ort_model(x))
+        diff = float(np.abs(expected - actual).max())
+        max_diff = max(max_diff, diff)
+        agreed += int(expected[0].argmax() == actual[0].argmax())
+        flag = "" if diff <= atol else "  <-- exceeds tolerance"
+        print(f"{f.name[:40]:<40} max |diff| {diff:.2e}  top-1 {expected[0].argmax()} / {actual[0].argmax()}{flag}")
+    return max_diff, agreed, len(files)
+
+
+def run(savedmodel, output, images=None, opset=13, atol=1e-4):
+    convert(savedmodel, output, opset)
+    if images:
+        max_diff, agreed, n = check_parity(savedmodel, output, images, atol)
+        print(f"\n{n} images: max |diff| {max_diff:.2e} (tolerance {atol:g}), top-1 agreement {agreed}/{n}")
+        if max_diff > atol or agreed < n:
+            raise SystemExit("Parity check failed")
+    print(f"✓ Wrote {output}")
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--savedmodel", type=str, default="models/trained_v3_savedmodel", help="SavedModel directory")
+    parser.add_argument("--output", type=str, default="models/trained_v3.onnx", help="ONNX file to write")
+    parser.add_argument("--images", type=str, help="sample images for the parity check")
+    parser.add_argument("--opset", type=int, default=13, help="ONNX opset")
+    parser.add_argument("--atol", type=float, default=1e-4, help="max absolute score difference allowed")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    run(**vars(opt))
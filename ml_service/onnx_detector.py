@@ -0,0 +1,63 @@
+"""
+YOLOv5 detection from an exported ONNX model without importing torch.
+
+Inference runs in an OnnxSessionPool and pre/post-processing uses the NumPy functions in
+yolov5/utils/numpy_ops.py, which match AutoShape's letterbox, NMS and box scaling. Export the
+detector once (e.g. `python yolov5/export.py --weights models/yolov5s.pt --include onnx --dynamic`)
+and point MODEL_PATH_DEFAULT at the .onnx file. Models exported with `--uint8` are fed the
+letterboxed uint8 batch as is.
+"""
+
+import ast
+import importlib.util
+import time
+from pathlib import Path
+
+import numpy as np
+
+from onnx_classifier import OnnxSessionPool
+
+
+def load_numpy_ops(repo="yolov5"):
+    """Import yolov5/utils/numpy_ops.py by file location, keeping the vendored `utils` and `models` off sys.path"""
+    path = Path(repo).resolve() / "utils" / "numpy_ops.py"
+    spec = importlib.util.spec_from_file_location("yolov5_numpy_ops", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # needs only numpy and cv2
+    return module
+
+
+class OnnxDetector:
+    """Torch-free stand-in for the AutoShape detector: same NMS settings, names and stride"""
+
+    conf = 0.25  # NMS confidence threshold
+    iou = 0.45  # NMS IoU threshold
+    classes = None  # (optional list) filter by class
+    agnostic = False  # NMS class-agnostic
+    max_det = 1000  # maximum number of detections per image
+    buckets = None  # (optional list) (h, w) input shapes to pad to
+
+    def __init__(self, path, repo="yolov5", pool_size=1):
+        self.ops = load_numpy_ops(repo)
+        self.session = OnnxSessionPool(path, pool_size)
+        meta = self.session.metadata  # written by yolov5/export.py
+        self.stride, self.names = int(meta["stride"]), ast.literal_eval(meta["names"])
+        self.uint8 = self.session.input_type == "tensor(uint8)"  # 1/255 folded into the first conv
+
+    def __call__(self, ims, size=640):
+        """Detect on a list of HWC uint8 RGB arrays; returns ([(n, 6) xyxy, conf, cls per image], per-image ms)"""
+        t0 = time.perf_counter()
+        x, shape0, shape1 = self.ops.preprocess(ims, size, self.stride, self.buckets, self.uint8)
+        t1 = time.perf_counter()
+        y = self.session(x)[self.session.output_names[0]]
+        t2 = time.perf_counter()
+        y = self.ops.non_max_suppression(y, self.conf, self.iou, self.classes, self.agnostic, max_det=self.max_det)
+        for det, s in zip(y, shape0):
+            self.ops.scale_boxes(shape1, det[:, :4], s)
+        t3 = time.perf_counter()
+        return y, tuple((b - a) / len(ims) * 1e3 for a, b in ((t0, t1), (t1, t2), (t2, t3)))
+
+    def warmup(self, shapes):
+        """Run one zero batch per (b, 3, h, w) shape so ONNX Runtime has set up each before serving"""
+        for shape in shapes:
+            self.session(np.zeros(shape, dtype=np.uint8 if self.uint8 else np.float32))
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+
+from PIL import Image
+
+
+def dhash(image, hash_size=8):
+    """
+    Compute a difference hash (dHash) of a PIL image.
+
+    The image is shrunk to (hash_size + 1) x hash_size, converted to grayscale and
+    each bit records whether a pixel is brighter than its right neighbour.
+    Re-captures of the same item produce hashes that differ in only a few bits.
+    """
+    small = image.resize((hash_size + 1, hash_size), Image.Resampling.BOX, reducing_gap=3.0).convert("L")
+    pixels = small.tobytes()
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(a, b):
+    """Number of differing bits between two hashes"""
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateCache:
+    """
+    Bounded in-memory index of recent perceptual hashes and their responses.
+
+    A lookup returns the most similar entry within `max_distance` bits that was
+    stored less than `window_seconds` ago under the same tag (e.g. the model
+    versions that produced it). The oldest entries are evicted once
+    `max_entries` is reached.
+    """
+
+    def __init__(self, max_entries=256, max_distance=6, window_seconds=30.0):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.window_seconds = window_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # hash -> (timestamp, tag, result)
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._entries:
+            key, (stored_at, _, _) = next(iter(self._entries.items()))
+            if now - stored_at <= self.window_seconds:
+                break
+            del self._entries[key]
+
+    def lookup(self, key, tag=None):
+        """Return (result, distance, age_seconds) of the closest fresh entry stored with `tag`, or None"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            best = None
+            for other, (stored_at, other_tag, result) in self._entries.items():
+                if other_tag != tag:
+                    continue
+                distance = hamming_distance(key, other)
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (result, distance, now - stored_at)
+                    if distance == 0:
+                        break
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return best
+
+    def add(self, key, result, tag=None):
+        """Store a result under its hash and tag, refreshing the entry if it already exists"""
+        now = time.monotonic()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (now, tag, result)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "max_entries": self.max_entries,
+                "max_distance": self.max_distance,
+                "window_seconds": self.window_seconds,
+            }
@@ -0,0 +1,84 @@
+import base64
+import json
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # optional, JSON is always available
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/msgpack", "application/vnd.msgpack")
+
+
+class PngImage:
+    """PNG bytes; a base64 data URI in JSON, raw bytes in msgpack"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def to_json(self):
+        return f"data:image/png;base64,{base64.b64encode(self.data).decode()}"
+
+
+class PackedArray:
+    """Numeric array sent only in binary responses as {dtype, shape, data} with little-endian packed data"""
+
+    def __init__(self, array, dtype):
+        self.array = np.ascontiguousarray(array, dtype=np.dtype(dtype).newbyteorder("<"))
+
+    def to_msgpack(self):
+        return {"dtype": self.array.dtype.name, "shape": list(self.array.shape), "data": self.array.tobytes()}
+
+
+def _media_ranges(accept):
+    for part in accept.split(","):
+        media, *params = (p.strip() for p in part.split(";"))
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        yield media.lower(), q
+
+
+def negotiate(accept):
+    """Pick the response media type from an Accept header; JSON unless msgpack is preferred and installed"""
+    if not accept or msgpack is None:
+        return JSON_MEDIA_TYPE
+    json_q = msgpack_q = 0.0
+    for media, q in _media_ranges(accept):
+        if media in MSGPACK_MEDIA_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif media in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            json_q = max(json_q, q)
+    return MSGPACK_MEDIA_TYPE if msgpack_q > 0 and msgpack_q >= json_q else JSON_MEDIA_TYPE
+
+
+def _convert(obj, binary):
+    if isinstance(obj, dict):
+        return {k: _convert(v, binary) for k, v in obj.items() if binary or not isinstance(v, PackedArray)}
+    if isinstance(obj, (list, tuple)):
+        return [_convert(v, binary) for v in obj]
+    if isinstance(obj, PngImage):
+        return obj.data if binary else obj.to_json()
+    if isinstance(obj, PackedArray):
+        return obj.to_msgpack()
+    return obj
+
+
+def to_json_content(data):
+    """JSON-ready content, identical to the historical /identify response (packed arrays are left out)"""
+    return _convert(data, binary=False)
+
+
+def encode_json(data):
+    return json.dumps(to_json_content(data), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def encode_msgpack(data):
+    return msgpack.packb(_convert(data, binary=True), use_bin_type=True)
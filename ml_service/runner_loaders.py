@@ -0,0 +1,253 @@
+"""
+Model settings and the functions that load, warm up and run each model.
+
+Kept free of import-time side effects (no app, registry, tracer or caches) because runner
+processes (MODEL_RUNNER_PROCESSES in main.py) unpickle these functions and import this
+module on their own; main.py imports them from here for the in-process layout.
+"""
+
+import logging
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+from onnx_classifier import CLASSIFIER_INPUT_SIZE, OnnxSessionPool, classifier_input, predictions_from_output
+from onnx_detector import OnnxDetector
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+ONNX_SESSION_POOL_SIZE = 2  # Concurrent classifier sessions (cores are split between them)
+YOLOV5_REPO = "yolov5"  # Vendored YOLOv5 checkout, loaded as a local torch.hub repo
+DETECTOR_ARTIFACT = None  # None loads the checkpoint; "fused", "torchscript", "onnx" or "ort" load a cached artifact
+ARTIFACT_CACHE_DIR = "models/artifacts"  # Built once per weights hash / input size / library versions, then reused
+
+# Detection configuration - OPTIMIZED FOR CAMERA CAPTURES
+CONF_THRESHOLD = 0.30  # Increased to reduce false positives
+IOU_THRESHOLD = 0.45   # Increased to reduce overlapping boxes
+MAX_DETECTIONS = 100   # Reasonable limit for performance
+DETECTOR_INPUT_SIZE = 640  # AutoShape inference size (long side, pixels)
+# Inputs are padded up to the smallest fitting (h, w) bucket, so mixed aspect ratios share a few shapes (cached grids,
+# warm backend kernels). Keep the long side at DETECTOR_INPUT_SIZE; None uses each image's own stride-multiple shape
+DETECTOR_SHAPE_BUCKETS = [(640, 640), (480, 640), (640, 480), (384, 640), (640, 384)]
+DETECTOR_SPARSE_DECODE = True  # Decode only anchors whose objectness passes CONF_THRESHOLD (PyTorch detector)
+DETECTOR_UINT8_INPUT = True  # Fold 1/255 into the first conv and feed uint8 images (PyTorch detector)
+# PyTorch detector on CPU: NHWC layout for oneDNN's fastest convolutions, and bfloat16 autocast on CPUs with native
+# bf16 (AVX512-BF16/AMX, ignored elsewhere). Compare with benchmarks/cpu_inference.py before enabling bf16
+DETECTOR_CPU_CHANNELS_LAST = True
+DETECTOR_CPU_BF16 = False
+# ONNX artifact detector (DETECTOR_ARTIFACT "onnx"/"ort"): ONNX_SESSION_POOL_SIZE sessions serve concurrent requests,
+# with this graph optimization level and output buffers pre-bound per session. Compare with benchmarks/onnx_sessions.py
+DETECTOR_ONNX_OPTIMIZATION = "all"  # "disable", "basic", "extended" or "all"
+DETECTOR_ONNX_IO_BINDING = True
+# Test-time augmentation (3 scaled/flipped passes, run concurrently) for hard images; whole-image PyTorch detector only
+DETECTOR_AUGMENT = False  # Default for /identify, override per request with ?augment=true
+
+# Warmup covers decoded uploads up to this size (main.py decodes to MAX_IMAGE_SIZE as well)
+MAX_IMAGE_SIZE = 1280  # Maximum dimension for image processing
+
+# Tiled inference - how tiles are cut and batched (TILED_INFERENCE in main.py turns it on)
+TILE_SIZE = 640  # Tile side in pixels (rounded up to the model stride)
+TILE_OVERLAP = 0.2  # Fraction of a tile shared with its neighbour
+TILE_BATCH_SIZE = 8  # Tiles per detector forward pass
+
+# Custom model waste classes mapping
+CUSTOM_WASTE_CLASSES = {
+    0: "hazardous",
+    1: "recyclable",
+    2: "biodegradable",
+    3: "nonbiodegradable"
+}
+
+
+def load_custom_model(source):
+    """Load the classifier: an ONNX Runtime session pool for *.onnx, otherwise the TensorFlow SavedModel"""
+    if str(source).endswith(".onnx"):
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"ONNX classifier not found at {source}")
+        model = OnnxSessionPool(source, ONNX_SESSION_POOL_SIZE)
+        logger.info(f"✓ ONNX classifier loaded with {model.size} ONNX Runtime sessions")
+        return model
+
+    import tensorflow as tf
+    from tensorflow import keras
+
+    logger.info(f"TensorFlow version: {tf.__version__}")
+
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"SavedModel not found at {source}")
+
+    logger.info(f"Loading SavedModel from {source}...")
+
+    # Use TFSMLayer for Keras 3 compatibility
+    model = keras.layers.TFSMLayer(source, call_endpoint='serving_default')
+    logger.info("✓ SavedModel loaded successfully as TFSMLayer")
+    return model
+
+
+def load_default_model(source):
+    """Load YOLOv5 with AutoShape from the vendored repo, or an ONNX export (*.onnx) without torch"""
+    if str(source).endswith(".onnx"):
+        model = OnnxDetector(source, YOLOV5_REPO, ONNX_SESSION_POOL_SIZE)
+        model.conf = CONF_THRESHOLD
+        model.iou = IOU_THRESHOLD
+        model.max_det = MAX_DETECTIONS
+        model.buckets = DETECTOR_SHAPE_BUCKETS
+        logger.info(f"✓ YOLOv5 ONNX export loaded without torch ({len(model.names)} classes)")
+        return model
+
+    import torch
+
+    model = torch.hub.load(
+        YOLOV5_REPO,
+        'custom',
+        path=source,
+        source='local',
+        artifact=DETECTOR_ARTIFACT,
+        cache_dir=ARTIFACT_CACHE_DIR,
+        imgsz=DETECTOR_INPUT_SIZE,
+    )
+    model.conf = CONF_THRESHOLD
+    model.iou = IOU_THRESHOLD
+    model.max_det = MAX_DETECTIONS
+    model.buckets = DETECTOR_SHAPE_BUCKETS
+    model.sparse = DETECTOR_SPARSE_DECODE
+    if DETECTOR_UINT8_INPUT and model.pt:
+        model.model.model.fold_input_scale()  # AutoShape -> DetectMultiBackend -> DetectionModel
+        model.model.uint8 = True
+    if model.pt and model.model.device.type == "cpu" and (DETECTOR_CPU_CHANNELS_LAST or DETECTOR_CPU_BF16):
+        model.model.cpu_inference(DETECTOR_CPU_CHANNELS_LAST, DETECTOR_CPU_BF16)
+    if model.model.onnx:  # "onnx" or "ort" artifact through DetectMultiBackend
+        model.model.onnx_sessions(
+            ONNX_SESSION_POOL_SIZE, DETECTOR_ONNX_OPTIMIZATION, io_binding=DETECTOR_ONNX_IO_BINDING
+        )
+        logger.info(f"✓ ONNX detector served by {ONNX_SESSION_POOL_SIZE} ONNX Runtime sessions")
+    return model
+
+
+def classify_with_tensorflow(image, model):
+    """Classify entire image using the custom model (TFSMLayer, or an ONNX Runtime session pool)"""
+    try:
+        target_size = CLASSIFIER_INPUT_SIZE
+        
+        logger.info(f"Resizing image to {target_size}")
+        
+        with span("classifier.pre", image_size=image.size, target_size=target_size):
+            img_array = classifier_input(image, target_size)
+        
+        logger.info(f"Input shape: {img_array.shape}")
+        
+        # Run inference - TFSMLayer and the session pool both return a dictionary
+        with span("classifier.infer", batch_size=img_array.shape[0]):
+            result = model(img_array)
+        
+        with span("classifier.post") as post:
+            predictions = predictions_from_output(result)
+        
+            logger.info(f"Raw predictions shape: {predictions.shape}")
+            logger.info(f"Raw predictions: {predictions[0]}")
+        
+            # Get class with highest confidence
+            class_idx = np.argmax(predictions[0])
+            confidence = float(predictions[0][class_idx])
+        
+            waste_type = CUSTOM_WASTE_CLASSES.get(class_idx, "unknown")
+        
+            logger.info(f"✓ Classification: {waste_type} (class {class_idx}) with confidence {confidence:.2%}")
+        
+            # Get all class probabilities
+            all_predictions = {}
+            for idx, prob in enumerate(predictions[0]):
+                class_name = CUSTOM_WASTE_CLASSES.get(idx, f"class_{idx}")
+                all_predictions[class_name] = float(prob)
+        
+            logger.info(f"All class probabilities: {all_predictions}")
+            post.set(label=waste_type, confidence=round(confidence, 4))
+
+        return [{
+            "item": waste_type,
+            "type": waste_type,
+            "confidence": confidence,
+            "all_probabilities": all_predictions
+        }], {waste_type: 100.0}, 1
+        
+    except Exception as e:
+        logger.error(f"TensorFlow classification error: {str(e)}", exc_info=True)
+        return [], {}, 0
+
+
+def detect_with_yolov5(model, image_array, tiled=False, augment=False):
+    """Run YOLOv5 object detection (whole image, with optional TTA, or overlapping tiles) and return xyxy records"""
+    if isinstance(model, OnnxDetector):  # torch-free; tiling and TTA need the PyTorch detector, so plain whole image
+        with span("detector.infer", image_shape=image_array.shape, batch_size=1) as infer:
+            (det,), (pre_ms, infer_ms, nms_ms) = model([image_array], size=DETECTOR_INPUT_SIZE)
+            infer.set(pre_ms=round(pre_ms, 2), infer_ms=round(infer_ms, 2), nms_ms=round(nms_ms, 2))
+        with span("detector.post", detections=len(det)):
+            return model.ops.xyxy_records(det, model.names)
+    if tiled:
+        from tiling import detect_tiled, detections_to_records
+
+        det = detect_tiled(
+            model,
+            image_array,
+            tile_size=TILE_SIZE,
+            overlap=TILE_OVERLAP,
+            batch_size=TILE_BATCH_SIZE,
+            conf=model.conf,
+            iou=model.iou,
+            max_det=model.max_det,
+        )
+        with span("detector.post", detections=len(det)):
+            return detections_to_records(det, model.names)
+    with span("detector.infer", image_shape=image_array.shape, batch_size=1, augment=augment) as infer:
+        results = model(image_array, size=DETECTOR_INPUT_SIZE, augment=augment)
+        pre_ms, infer_ms, nms_ms = results.t  # AutoShape's own per-image timings
+        infer.set(pre_ms=round(pre_ms, 2), infer_ms=round(infer_ms, 2), nms_ms=round(nms_ms, 2))
+    with span("detector.post", detections=len(results.pred[0])):
+        return results.pandas().xyxy[0].to_dict(orient="records")
+
+
+def classify_with_custom_model(model, image):
+    return classify_with_tensorflow(image, model)
+
+
+def warmup_custom_model(model):
+    classify_with_tensorflow(Image.new("RGB", CLASSIFIER_INPUT_SIZE, (114, 114, 114)), model)
+
+
+def detector_input_shapes(size, stride, buckets=None):
+    """Every (height, width) AutoShape produces for `size`: the buckets, else long side `size` and stride multiples"""
+    if buckets:
+        return sorted(set(map(tuple, buckets)))
+    short_sides = range(stride, size + 1, stride)
+    return sorted({(size, short) for short in short_sides} | {(short, size) for short in short_sides})
+
+
+def warmup_default_model(model):
+    """Run every input shape and batch size the service can produce so no request pays for first-use setup"""
+    t = time.perf_counter()
+    stride = int(model.stride)
+    if isinstance(model, OnnxDetector):
+        shapes = [(1, 3, h, w) for h, w in detector_input_shapes(DETECTOR_INPUT_SIZE, stride, DETECTOR_SHAPE_BUCKETS)]
+        model.warmup(shapes)
+        detect_with_yolov5(model, np.full((MAX_IMAGE_SIZE, MAX_IMAGE_SIZE, 3), 114, dtype=np.uint8))
+        logger.info(f"✓ YOLOv5 (ONNX) warmed up on {len(shapes)} input shapes in {time.perf_counter() - t:.1f}s")
+        return
+
+    import torch
+
+    tile = -(-TILE_SIZE // stride) * stride  # detect_tiled rounds the tile up to the stride
+    shapes = [(1, 3, h, w) for h, w in detector_input_shapes(DETECTOR_INPUT_SIZE, stride, DETECTOR_SHAPE_BUCKETS)]
+    shapes += [(b, 3, tile, tile) for b in range(1, TILE_BATCH_SIZE + 1)]
+    with torch.inference_mode():
+        for shape in shapes:
+            model.model.warmup(imgsz=shape, cpu=True)  # AutoShape -> DetectMultiBackend
+
+    # Pre/post-processing paths (letterbox, NMS, tiling) once each
+    image = np.full((MAX_IMAGE_SIZE, MAX_IMAGE_SIZE, 3), 114, dtype=np.uint8)
+    detect_with_yolov5(model, image)
+    detect_with_yolov5(model, image, tiled=True)
+    detect_with_yolov5(model, image, augment=True)  # scaled TTA shapes
+    logger.info(f"✓ YOLOv5 warmed up on {len(shapes)} input shapes in {time.perf_counter() - t:.1f}s")
@@ -0,0 +1,98 @@
+import numpy as np
+import torch
+
+from tracing import span
+
+
+def tile_origins(length, tile, overlap):
+    """Start offsets of overlapping tiles covering [0, length); the last tile is flush with the edge"""
+    if length <= tile:
+        return [0]
+    step = max(1, int(tile * (1 - overlap)))
+    return list(range(0, length - tile, step)) + [length - tile]
+
+
+@torch.inference_mode()
+def detect_tiled(
+    model,
+    image,
+    tile_size=640,
+    overlap=0.2,
+    batch_size=8,
+    include_full=True,
+    conf=0.25,
+    iou=0.45,
+    max_det=1000,
+):
+    """
+    Sliced inference for high-resolution images with many small items.
+
+    `model` is a YOLOv5 AutoShape model and `image` an HWC uint8 RGB array. The image
+    is cut into overlapping `tile_size` squares (plus, with `include_full`, one
+    letterboxed view of the whole image for large items) and every view runs through
+    the detector in batches of `batch_size`. Raw predictions are mapped back to image
+    pixels and merged with a single class-aware NMS.
+
+    Returns an (n, 6) tensor of [xmin, ymin, xmax, ymax, confidence, class].
+    """
+    # yolov5 modules are importable once the detector has been loaded from the vendored repo
+    from utils.augmentations import letterbox
+    from utils.general import make_divisible, non_max_suppression, scale_boxes, xywh2xyxy, xyxy2xywh
+
+    p = next(model.model.parameters()) if model.pt else torch.empty(1, device=model.model.device)
+    tile_size = make_divisible(tile_size, int(model.stride))
+    h, w = image.shape[:2]
+
+    with span("detector.tiled.pre", image_shape=image.shape, tile_size=tile_size) as pre:
+        views, offsets = [], []
+        for y0 in tile_origins(h, tile_size, overlap):
+            for x0 in tile_origins(w, tile_size, overlap):
+                crop = image[y0 : y0 + tile_size, x0 : x0 + tile_size]
+                if crop.shape[:2] != (tile_size, tile_size):  # image smaller than a tile, pad bottom/right
+                    canvas = np.full((tile_size, tile_size, 3), 114, dtype=np.uint8)
+                    canvas[: crop.shape[0], : crop.shape[1]] = crop
+                    crop = canvas
+                views.append(crop)
+                offsets.append((x0, y0))
+        n_tiles = len(views)
+        if include_full:
+            views.append(letterbox(image, tile_size, auto=False)[0])
+        pre.set(tiles=n_tiles, views=len(views))
+
+    preds = []
+    for i in range(0, len(views), batch_size):
+        batch = views[i : i + batch_size]
+        with span("detector.tiled.infer", batch_size=len(batch)):
+            x = torch.from_numpy(np.stack(batch)).permute(0, 3, 1, 2)  # BHWC to BCHW view, channels_last memory
+            if not getattr(model.model, "channels_last", False):  # DetectMultiBackend.cpu_inference()
+                x = x.contiguous()
+            y = model(x.to(p.device))  # uint8 in, raw predictions (b, anchors, 5 + nc), xywh in view pixels
+            y = y[0] if isinstance(y, (list, tuple)) else y
+        for j, yj in enumerate(y, start=i):
+            if j < n_tiles:  # tile -> image pixels
+                yj[:, 0] += offsets[j][0]
+                yj[:, 1] += offsets[j][1]
+            else:  # letterboxed full view -> image pixels
+                yj[:, :4] = xyxy2xywh(scale_boxes((tile_size, tile_size), xywh2xyxy(yj[:, :4]), (h, w)))
+            preds.append(yj)
+
+    with span("detector.tiled.nms") as nms:
+        det = non_max_suppression(torch.cat(preds, 0)[None], conf, iou, max_det=max_det)[0]
+        nms.set(detections=len(det))
+    return det
+
+
+def detections_to_records(det, names):
+    """Same record layout as Detections.pandas().xyxy[0].to_dict(orient='records')"""
+    return [
+        {
+            "xmin": xmin,
+            "ymin": ymin,
+            "xmax": xmax,
+            "ymax": ymax,
+            "confidence": confidence,
+            "class": int(cls),
+            "name": names[int(cls)],
+        }
+        for xmin, ymin, xmax, ymax, confidence, cls in det.tolist()
+    ]
@@ -0,0 +1,200 @@
+"""
+Request-scoped span tracing with a local exporter.
+
+A sampled request gets a Trace stored in a context variable; `span()` blocks anywhere below
+it (including thread-pool calls, which copy the context) record their duration, parent and
+attributes. Finished traces go to an in-memory ring buffer and, optionally, a JSONL file.
+When a request is not sampled `span()` only does a context-variable lookup.
+
+Summarize a trace file into a slowest-requests report:
+    $ python tracing.py traces/identify.jsonl --top 10
+"""
+
+import argparse
+import contextlib
+import contextvars
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+_trace = contextvars.ContextVar("trace", default=None)
+_parent = contextvars.ContextVar("span_parent", default=None)
+
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("id", "name", "parent", "start", "end", "attributes")
+
+    def __init__(self, id, name, parent, attributes):
+        self.id, self.name, self.parent, self.attributes = id, name, parent, attributes
+        self.start = time.perf_counter()
+        self.end = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+class Trace:
+    """Spans of one request, timed relative to the start of the request"""
+
+    def __init__(self, name, attributes):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attributes = attributes
+        self.wall_time = time.time()
+        self.start = time.perf_counter()
+        self.spans = []
+        self._ids = itertools.count(1)
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self, end):
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "time": self.wall_time,
+            "duration_ms": round((end - self.start) * 1e3, 3),
+            "attributes": self.attributes,
+            "spans": [
+                {
+                    "id": s.id,
+                    "parent": s.parent,
+                    "name": s.name,
+                    "start_ms": round((s.start - self.start) * 1e3, 3),
+                    "duration_ms": round((s.end - s.start) * 1e3, 3),
+                    "attributes": s.attributes,
+                }
+                for s in sorted(self.spans, key=lambda s: s.start)
+            ],
+        }
+
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """Time a block as a child of the current span; a no-op outside a sampled request"""
+    trace = _trace.get()
+    if trace is None:
+        yield NOOP_SPAN
+        return
+    s = Span(next(trace._ids), name, _parent.get(), attributes)
+    token = _parent.set(s.id)
+    try:
+        yield s
+    finally:
+        s.end = time.perf_counter()
+        _parent.reset(token)
+        trace.spans.append(s)
+
+
+def set_attributes(**attributes):
+    """Attach attributes to the current request's trace, if it is sampled"""
+    trace = _trace.get()
+    if trace is not None:
+        trace.set(**attributes)
+
+
+class Tracer:
+    """Samples requests into traces and keeps the most recent `max_traces` (plus a JSONL file when `path` is set)"""
+
+    def __init__(self, sample_rate=0.0, max_traces=1000, path=None):
+        self.sample_rate = sample_rate
+        self.path = Path(path) if path else None
+        self._traces = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def trace(self, name, **attributes):
+        """Trace the enclosed request if sampled; yields the Trace or None"""
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            yield None
+            return
+        trace = Trace(name, attributes)
+        token = _trace.set(trace)
+        try:
+            yield trace
+        except Exception as e:
+            trace.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _trace.reset(token)
+            self._export(trace.to_dict(time.perf_counter()))
+
+    def _export(self, record):
+        with self._lock:
+            self._traces.append(record)
+            if self.path:
+                self.path.parent.mkdir(parents=True, exist_ok=True)  # on first write, not when tracing is off
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+
+    def traces(self):
+        with self._lock:
+            return list(self._traces)
+
+
+def slowest(traces, top=10):
+    """The `top` slowest traces, each with its spans ordered by start time"""
+    return sorted(traces, key=lambda t: t["duration_ms"], reverse=True)[:top]
+
+
+def span_summary(traces):
+    """Per span name: count, mean/p50/p95/max duration in ms"""
+    durations = {}
+    for t in traces:
+        for s in t["spans"]:
+            durations.setdefault(s["name"], []).append(s["duration_ms"])
+    return {
+        name: {
+            "count": len(d),
+            "mean": round(float(np.mean(d)), 2),
+            "p50": round(float(np.percentile(d, 50)), 2),
+            "p95": round(float(np.percentile(d, 95)), 2),
+            "max": round(float(np.max(d)), 2),
+        }
+        for name, d in sorted(durations.items(), key=lambda kv: -sum(kv[1]))
+    }
+
+
+def report(traces, top=10):
+    """Text report: span statistics, then the slowest requests with their span trees"""
+    lines = [f"{len(traces)} traces\n", f"{'span':<28} {'count':>6} {'mean':>8} {'p50':>8} {'p95':>8} {'max':>8}"]
+    for name, s in span_summary(traces).items():
+        lines.append(f"{name:<28} {s['count']:>6} {s['mean']:>8.1f} {s['p50']:>8.1f} {s['p95']:>8.1f} {s['max']:>8.1f}")
+    for t in slowest(traces, top):
+        attributes = " ".join(f"{k}={v}" for k, v in t["attributes"].items())
+        lines.append(f"\n{t['duration_ms']:.1f} ms  {t['name']} {t['trace_id']}  {attributes}".rstrip())
+        depth = {None: -1}
+        for s in t["spans"]:
+            depth[s["id"]] = depth.get(s["parent"], -1) + 1
+            attributes = " ".join(f"{k}={v}" for k, v in s["attributes"].items())
+            name = "  " * depth[s["id"]] + s["name"]
+            lines.append(f"  {s['start_ms']:>8.1f} {s['duration_ms']:>8.1f} ms  {name}  {attributes}".rstrip())
+    return "\n".join(lines)
+
+
+def parse_opt():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("file", type=str, help="JSONL trace file written by Tracer")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest requests to show")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    with open(opt.file) as f:
+        print(report([json.loads(line) for line in f if line.strip()], opt.top))
@@ -23,10 +23,16 @@ Requirements:
 
 Usage:
     $ python benchmarks.py --weights yolov5s.pt --img 640
+    $ python benchmarks.py --weights yolov5s.pt --img 640 --throughput --batch-sizes 1 4 8 --threads 1 4
+    $ python benchmarks.py --json yolov5s_throughput.json --baseline baseline.json --tolerance 0.1  # regressions
 """
 
 import argparse
+import contextlib
+import json
+import os
 import platform
+import queue as queue_lib
 import sys
 import time
 from pathlib import Path
@@ -49,6 +55,22 @@ from utils.torch_utils import select_device
 from val import run as val_det
 
 
+# Failures of one export or backend that are recorded in its row instead of ending the benchmark
+BACKEND_ERRORS = (AssertionError, ImportError, OSError, RuntimeError, TypeError, ValueError)
+
+
+def supported_formats(device):
+    """Returns the `export.py --include` arguments of the formats benchmarkable on `device`, '-' for PyTorch."""
+    return [
+        f
+        for i, (name, f, suffix, cpu, gpu) in export.export_formats().iterrows()
+        if i not in (9, 10)  # Edge TPU and TF.js inference unsupported
+        and (i != 5 or platform.system() == "Darwin")  # CoreML inference on macOS only
+        and (cpu or "cpu" not in device.type)
+        and (gpu or "cuda" not in device.type)
+    ]
+
+
 def run(
     weights=ROOT / "yolov5s.pt",  # weights path
     imgsz=640,  # inference size (pixels)
@@ -59,6 +81,7 @@ def run(
     test=False,  # test exports only
     pt_only=False,  # test PyTorch only
     hard_fail=False,  # throw error on benchmark failure
+    workers=4,  # parallel export processes on CPU, 0 for one after another
 ):
     """
     Run YOLOv5 benchmarks on multiple export formats and log results for model performance evaluation.
@@ -73,6 +96,7 @@ def run(
         test (bool): Test export formats only (default: False).
         pt_only (bool): Test PyTorch format only (default: False).
         hard_fail (bool): Throw an error on benchmark failure if True (default: False).
+        workers (int): Export the formats in up to this many parallel processes on CPU, see export.run (default: 4).
 
     Returns:
         None. Logs information about the benchmark results, including the format, size, mAP50-95, and inference time.
@@ -99,7 +123,23 @@ def run(
     y, t = [], time.time()
     device = select_device(device)
     model_type = type(attempt_load(weights, fuse=False))  # DetectionModel, SegmentationModel, etc.
-    for i, (name, f, suffix, cpu, gpu) in export.export_formats().iterrows():  # index, (name, file, suffix, CPU, GPU)
+    formats = export.export_formats()
+    include = [f for f in supported_formats(device) if f != "-"]  # checked again with reasons below
+    exported = []
+    if include and not pt_only:
+        try:  # one export run loads the model once and exports independent formats in parallel
+            exported = export.run(
+                weights=weights,
+                imgsz=[imgsz],
+                include=include,
+                batch_size=batch_size,
+                device=device,
+                half=half,
+                workers=workers if device.type == "cpu" else 0,
+            )
+        except BACKEND_ERRORS as e:
+            LOGGER.warning(f"WARNING ⚠️ Benchmark export failure: {e}")
+    for i, (name, f, suffix, cpu, gpu) in formats.iterrows():  # index, (name, file, suffix, CPU, GPU)
         try:
             assert i not in (9, 10), "inference not supported"  # Edge TPU and TF.js are unsupported
             assert i != 5 or platform.system() == "Darwin", "inference only supported on macOS>=10.13"  # CoreML
@@ -112,9 +152,7 @@ def run(
             if f == "-":
                 w = weights  # PyTorch format
             else:
-                w = export.run(
-                    weights=weights, imgsz=[imgsz], include=[f], batch_size=batch_size, device=device, half=half
-                )[-1]  # all others
+                w = next((x for x in exported if suffix in x), "")  # all others, exported together above
             assert suffix in str(w), "export failed"
 
             # Validate
@@ -159,6 +197,7 @@ def test(
     test=False,  # test exports only
     pt_only=False,  # test PyTorch only
     hard_fail=False,  # throw error on benchmark failure
+    workers=4,  # parallel export processes on CPU, 0 for one after another
 ):
     """
     Run YOLOv5 export tests for all supported formats and log the results, including export statuses.
@@ -173,6 +212,7 @@ def test(
         test (bool): Test export formats only without running inference. Default is False.
         pt_only (bool): Test only the PyTorch model if True. Default is False.
         hard_fail (bool): Raise error on export or test failure if True. Default is False.
+        workers (int): Parallel export processes on CPU, see export.run. Default is 4.
 
     Returns:
         pd.DataFrame: DataFrame containing the results of the export tests, including format names and export statuses.
@@ -201,7 +241,9 @@ def test(
             w = (
                 weights
                 if f == "-"
-                else export.run(weights=weights, imgsz=[imgsz], include=[f], device=device, half=half)[-1]
+                else export.run(weights=weights, imgsz=[imgsz], include=[f], device=device, half=half, workers=workers)[
+                    -1
+                ]
             )  # weights
             assert suffix in str(w), "export failed"
             y.append([name, True])
@@ -218,6 +260,239 @@ def test(
     return py
 
 
+def _throughput_worker(w, data, device, half, imgsz, batch, threads, runs, warmup, queue):
+    """Measures one (format, batch size, thread count) configuration in a fresh process and puts its row on `queue`."""
+    import numpy as np
+    import torch
+
+    from models.common import DetectMultiBackend
+
+    row = {}
+    try:
+        if threads:
+            torch.set_num_threads(threads)
+        t = time.perf_counter()
+        device = select_device(device)
+        model = DetectMultiBackend(w, device=device, data=data, fp16=half)
+        row["load_ms"] = (time.perf_counter() - t) * 1e3
+        shape = batch, 3, imgsz, imgsz
+        im = (
+            torch.randint(0, 256, shape, dtype=torch.uint8, device=device)
+            if model.uint8
+            else torch.rand(shape, device=device)
+        )
+
+        def infer():
+            t = time.perf_counter()
+            model(im)
+            if device.type == "cuda":
+                torch.cuda.synchronize(device)
+            return (time.perf_counter() - t) * 1e3
+
+        row["first_ms"] = infer()  # cold: lazy initialization, allocation, kernel selection
+        for _ in range(warmup):
+            infer()
+        times = np.array([infer() for _ in range(runs)])
+        p50, p90, p99 = np.percentile(times, (50, 90, 99))
+        row.update(
+            status="ok",
+            mean_ms=times.mean(),
+            p50_ms=p50,
+            p90_ms=p90,
+            p99_ms=p99,
+            images_per_s=batch * runs / times.sum() * 1e3,
+        )
+        if device.type == "cuda":
+            row["cuda_peak_mb"] = torch.cuda.max_memory_allocated(device) / 2**20
+    except BACKEND_ERRORS as e:  # anything else crashes the worker, reported by measure_throughput()
+        row["status"] = f"failed: {e}"
+    try:
+        import resource
+
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        row["peak_rss_mb"] = rss / 2**20 if platform.system() == "Darwin" else rss / 2**10  # bytes on macOS, else KiB
+    except ImportError:  # Windows
+        pass
+    queue.put({k: round(v, 2) if isinstance(v, float) else v for k, v in row.items()})
+
+
+def measure_throughput(w, data, device, half, imgsz, batch, threads, runs, warmup):
+    """Runs _throughput_worker in a spawned process with OpenMP/MKL threads limited to `threads`, 0 for the default."""
+    import multiprocessing
+
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    env = {k: str(threads) for k in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")} if threads else {}
+    saved = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)  # inherited by the child before it imports any backend
+    try:
+        p = ctx.Process(
+            target=_throughput_worker, args=(w, data, device, half, imgsz, batch, threads, runs, warmup, queue)
+        )
+        p.start()
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k)
+            else:
+                os.environ[k] = v
+    row = None
+    while row is None and (p.is_alive() or not queue.empty()):
+        with contextlib.suppress(queue_lib.Empty):
+            row = queue.get(timeout=1)
+    p.join()
+    return row or {"status": f"crashed (exit code {p.exitcode})"}
+
+
+def throughput(
+    weights=ROOT / "yolov5s.pt",  # weights path
+    imgsz=640,  # inference size (pixels)
+    data=ROOT / "data/coco128.yaml",  # dataset.yaml path, for class names
+    device="",  # cuda device, i.e. 0 or 0,1,2,3 or cpu
+    half=False,  # use FP16 half-precision inference
+    batch_sizes=(1, 4, 8),  # batch sizes to sweep
+    threads=(1, 0),  # CPU thread counts to sweep, 0 for the backend default
+    runs=50,  # timed inferences per configuration
+    warmup=5,  # untimed inferences after the first, before timing
+    include=(),  # export formats to benchmark, default all supported on the device
+    json_file="",  # results JSON, default <weights>_throughput.json
+    baseline="",  # baseline JSON to compare against
+    tolerance=0.10,  # relative change flagged as a regression
+    workers=4,  # parallel export processes on CPU, 0 for one after another
+):
+    """
+    Sweeps batch sizes and thread counts for each export format and records latency distribution, throughput and memory.
+
+    Every (format, batch size, thread count) configuration runs in a fresh process: DetectMultiBackend loads the model
+    (`load_ms`), runs one cold inference (`first_ms`), `warmup` more, then `runs` timed inferences for the warm p50/p90/
+    p99 and mean latency per batch and images/s. The process's peak RSS (and CUDA memory on GPU) covers model load and
+    inference. Thread counts set torch threads plus OMP/MKL/OpenBLAS threads; backends with their own thread pools,
+    e.g. ONNX Runtime sessions, only follow the latter. Models are exported once, with dynamic axes when possible and
+    `max(batch_sizes)` as the batch; a format that rejects a batch size records a failed row.
+
+    Args:
+        weights (Path | str): PyTorch weights to export and benchmark.
+        imgsz (int): Square inference size in pixels.
+        data (Path | str): Dataset YAML, for class names.
+        device (str): CUDA device, e.g. '0', or 'cpu'.
+        half (bool): FP16 inference (GPU).
+        batch_sizes (tuple[int]): Batch sizes to sweep.
+        threads (tuple[int]): Thread counts to sweep, 0 for the backend default.
+        runs (int): Timed inferences per configuration.
+        warmup (int): Untimed inferences after the cold one.
+        include (tuple[str]): `export.py --include` formats, '-' for PyTorch; default all supported on the device.
+        json_file (str | Path): Where to write the results, default `<weights>_throughput.json`.
+        baseline (str | Path): Earlier results JSON to compare against with compare_throughput().
+        tolerance (float): Relative slowdown or memory growth flagged as a regression.
+        workers (int): Parallel export processes on CPU, see export.run.
+
+    Returns:
+        (dict): The results written to `json_file`, with a 'regressions' list when `baseline` is given.
+
+    Example:
+        ```bash
+        $ python benchmarks.py --weights yolov5s.pt --throughput --batch-sizes 1 8 --threads 1 4 --include - onnx
+        $ python benchmarks.py --weights yolov5s.pt --throughput --baseline yolov5s_throughput_main.json
+        ```
+    """
+    import torch
+
+    device = select_device(device)
+    formats = export.export_formats()
+    include = list(include) or supported_formats(device)
+    exported = []
+    if any(f != "-" for f in include):
+        exported = export.run(
+            weights=weights,
+            imgsz=[imgsz],
+            include=[f for f in include if f != "-"],
+            batch_size=max(batch_sizes),
+            device=device,
+            half=half,
+            dynamic=not half,  # --half is incompatible with --dynamic
+            workers=workers if device.type == "cpu" else 0,
+        )
+    results = {
+        "weights": str(weights),
+        "imgsz": imgsz,
+        "device": str(device),
+        "half": half,
+        "host": {
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "torch": torch.__version__,
+            "cuda": torch.cuda.get_device_name(device) if device.type == "cuda" else None,
+        },
+        "runs": runs,
+        "warmup": warmup,
+        "results": [],
+    }
+    for f in include:
+        name, suffix = formats.loc[formats["Argument"] == f, ["Format", "Suffix"]].values[0]
+        w = str(weights) if f == "-" else next((x for x in exported if suffix in x), "")
+        for batch in batch_sizes:
+            for n in threads:
+                if w:
+                    LOGGER.info(f"{name}: batch {batch}, threads {n or 'default'}")
+                    row = measure_throughput(w, data, str(device), half, imgsz, batch, n, runs, warmup)
+                else:
+                    row = {"status": "export failed"}
+                results["results"].append({"format": name, "batch": batch, "threads": n, **row})
+
+    py = pd.DataFrame(results["results"])
+    LOGGER.info(f"\n{py.to_string(index=False)}")
+    f = Path(json_file or Path(weights).with_name(f"{Path(weights).stem}_throughput.json"))
+    f.write_text(json.dumps(results, indent=2))
+    LOGGER.info(f"Throughput results saved to {f}")
+    if baseline:
+        results["regressions"] = compare_throughput(results, baseline, tolerance)
+    return results
+
+
+def compare_throughput(current, baseline, tolerance=0.10):
+    """
+    Compares throughput results against a baseline and returns the regressions beyond `tolerance`.
+
+    `current` and `baseline` are result dicts or JSON paths. Configurations are matched on (format, batch, threads).
+    A regression is a p50/p99 latency or peak RSS more than `tolerance` higher, images/s more than `tolerance` lower,
+    or a configuration that ran in the baseline but not now. Changes are logged per configuration.
+    """
+    current, baseline = (
+        json.loads(Path(x).read_text()) if isinstance(x, (str, Path)) else x for x in (current, baseline)
+    )
+    higher_is_worse = {"p50_ms": True, "p99_ms": True, "images_per_s": False, "peak_rss_mb": True}
+    base = {(r["format"], r["batch"], r["threads"]): r for r in baseline["results"]}
+    rows, regressions = [], []
+    for r in current["results"]:
+        key = r["format"], r["batch"], r["threads"]
+        b = base.get(key)
+        if b is None or b["status"] != "ok":
+            continue  # nothing to compare against
+        row = dict(zip(("format", "batch", "threads"), key))
+        if r["status"] != "ok":
+            regressions.append({**row, "metric": "status", "baseline": "ok", "current": r["status"]})
+            continue
+        for k, worse in higher_is_worse.items():
+            if r.get(k) is None or not b.get(k):
+                continue
+            change = r[k] / b[k] - 1
+            row[k] = f"{change:+.1%}"
+            if (change if worse else -change) > tolerance:
+                regressions.append({**row, "metric": k, "baseline": b[k], "current": r[k], "change": round(change, 4)})
+        rows.append(row)
+    if current.get("host") != baseline.get("host"):
+        LOGGER.warning("WARNING ⚠️ baseline was recorded on another host or software versions, compare with care")
+    LOGGER.info(f"\nChange against baseline (tolerance {tolerance:.0%})\n{pd.DataFrame(rows).to_string(index=False)}")
+    for x in regressions:
+        LOGGER.warning(
+            f"REGRESSION {x['format']} batch {x['batch']} threads {x['threads']}: {x['metric']} "
+            f"{x['baseline']} -> {x['current']}"
+        )
+    LOGGER.info(f"{len(regressions)} regressions beyond {tolerance:.0%}")
+    return regressions
+
+
 def parse_opt():
     """
     Parses command-line arguments for YOLOv5 model inference configuration.
@@ -233,6 +508,10 @@ def parse_opt():
         pt_only (bool): Test PyTorch only. This is a flag and defaults to False.
         hard_fail (bool | str): Throw an error on benchmark failure. Can be a boolean or a string representing a minimum
             metric floor, e.g., '0.29'. Defaults to False.
+        workers (int): Parallel export processes on CPU, 0 exports one format after another. Defaults to 4.
+        throughput (bool): Run the batch size and thread sweep of throughput() instead. Defaults to False.
+        batch_sizes, threads, runs, include, json, baseline, tolerance: throughput() options; `--baseline` without
+            `--throughput` compares the existing `--json` results with the baseline.
 
     Returns:
         argparse.Namespace: Parsed command-line arguments encapsulated in an argparse Namespace object.
@@ -251,6 +530,15 @@ def parse_opt():
     parser.add_argument("--test", action="store_true", help="test exports only")
     parser.add_argument("--pt-only", action="store_true", help="test PyTorch only")
     parser.add_argument("--hard-fail", nargs="?", const=True, default=False, help="Exception on error or < min metric")
+    parser.add_argument("--workers", type=int, default=4, help="parallel export processes on CPU, 0 for sequential")
+    parser.add_argument("--throughput", action="store_true", help="sweep batch sizes and threads, see throughput()")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 4, 8], help="throughput: batch sizes")
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 0], help="throughput: thread counts, 0 default")
+    parser.add_argument("--runs", type=int, default=50, help="throughput: timed inferences per configuration")
+    parser.add_argument("--include", nargs="+", default=[], help="throughput: formats, - for PyTorch, default all")
+    parser.add_argument("--json", type=str, default="", help="throughput: results JSON, default <weights>_throughput")
+    parser.add_argument("--baseline", type=str, default="", help="throughput: baseline JSON to flag regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="throughput: relative regression tolerance")
     opt = parser.parse_args()
     opt.data = check_yaml(opt.data)  # check YAML
     print_args(vars(opt))
@@ -286,7 +574,19 @@ def main(opt):
         $ python benchmarks.py --weights yolov5s.pt --img 640
         ```
     """
-    test(**vars(opt)) if opt.test else run(**vars(opt))
+    kwargs = vars(opt)
+    tp = {k: kwargs.pop(k) for k in ("batch_sizes", "threads", "runs", "include", "json", "baseline", "tolerance")}
+    tp["json_file"] = tp.pop("json")
+    if kwargs.pop("throughput"):
+        results = throughput(**{k: kwargs[k] for k in ("weights", "imgsz", "data", "device", "half", "workers")}, **tp)
+        if results.get("regressions"):
+            sys.exit(1)  # fail CI jobs that compare against a baseline
+    elif tp["baseline"]:  # compare an existing results JSON with the baseline
+        assert tp["json_file"], "--baseline without --throughput compares the --json results file"
+        if compare_throughput(tp["json_file"], tp["baseline"], tp["tolerance"]):
+            sys.exit(1)
+    else:
+        test(**kwargs) if opt.test else run(**kwargs)
 
 
 if __name__ == "__main__":
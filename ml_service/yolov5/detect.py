@@ -51,8 +51,8 @@ ROOT = Path(os.path.relpath(ROOT, Path.cwd()))  # relative
 
 from ultralytics.utils.plotting import Annotator, colors, save_one_box
 
-from models.common import DetectMultiBackend
-from utils.dataloaders import IMG_FORMATS, VID_FORMATS, LoadImages, LoadScreenshots, LoadStreams
+from models.common import DetectMultiBackend, decode_threshold
+from utils.dataloaders import IMG_FORMATS, VID_FORMATS, LoadImages, LoadScreenshots, LoadStreams, LoadStreamsShared
 from utils.general import (
     LOGGER,
     Profile,
@@ -103,6 +103,9 @@ def run(
     half=False,  # use FP16 half-precision inference
     dnn=False,  # use OpenCV DNN for ONNX inference
     vid_stride=1,  # video frame-rate stride
+    stream_processes=False,  # decode each stream in its own process into shared memory
+    sparse_decode=False,  # decode only anchors whose objectness passes conf_thres
+    uint8=False,  # fold 1/255 into the first conv and feed uint8 images
 ):
     """
     Runs YOLOv5 detection inference on various sources like images, videos, directories, streams, etc.
@@ -139,6 +142,13 @@ def run(
         half (bool): If True, use FP16 half-precision inference. Default is False.
         dnn (bool): If True, use OpenCV DNN backend for ONNX inference. Default is False.
         vid_stride (int): Stride for processing video frames, to skip frames between processing. Default is 1.
+        stream_processes (bool): If True, decode and letterbox each stream in its own process into a shared-memory
+            ring buffer instead of a reader thread. Default is False.
+        sparse_decode (bool): If True, the Detect head of a PyTorch model thresholds objectness logits before decoding
+            boxes, so only candidates reach NMS. Detections are unchanged. Default is False.
+        uint8 (bool): If True, a PyTorch model gets the 1/255 input scale folded into its first convolution and is fed
+            uint8 images without a float copy; models exported with `export.py --uint8` take uint8 regardless. Default
+            is False.
 
     Returns:
         None
@@ -169,15 +179,17 @@ def run(
 
     # Load model
     device = select_device(device)
-    model = DetectMultiBackend(weights, device=device, dnn=dnn, data=data, fp16=half)
+    model = DetectMultiBackend(weights, device=device, dnn=dnn, data=data, fp16=half, uint8=uint8)
     stride, names, pt = model.stride, model.names, model.pt
     imgsz = check_img_size(imgsz, s=stride)  # check image size
+    decode_thres = conf_thres if sparse_decode and pt else None  # Detect() sparse decode threshold
 
     # Dataloader
     bs = 1  # batch_size
     if webcam:
         view_img = check_imshow(warn=True)
-        dataset = LoadStreams(source, img_size=imgsz, stride=stride, auto=pt, vid_stride=vid_stride)
+        loader = LoadStreamsShared if stream_processes else LoadStreams
+        dataset = loader(source, img_size=imgsz, stride=stride, auto=pt, vid_stride=vid_stride)
         bs = len(dataset)
     elif screenshot:
         dataset = LoadScreenshots(source, img_size=imgsz, stride=stride, auto=pt)
@@ -191,15 +203,16 @@ def run(
     for path, im, im0s, vid_cap, s in dataset:
         with dt[0]:
             im = torch.from_numpy(im).to(model.device)
-            im = im.half() if model.fp16 else im.float()  # uint8 to fp16/32
-            im /= 255  # 0 - 255 to 0.0 - 1.0
+            if not model.uint8:  # uint8 models scale inside the first conv
+                im = im.half() if model.fp16 else im.float()  # uint8 to fp16/32
+                im /= 255  # 0 - 255 to 0.0 - 1.0
             if len(im.shape) == 3:
                 im = im[None]  # expand for batch dim
             if model.xml and im.shape[0] > 1:
                 ims = torch.chunk(im, im.shape[0], 0)
 
         # Inference
-        with dt[1]:
+        with dt[1], decode_threshold(decode_thres):
             visualize = increment_path(save_dir / Path(path).stem, mkdir=True) if visualize else False
             if model.xml and im.shape[0] > 1:
                 pred = None
@@ -361,6 +374,8 @@ def parse_opt():
         --dnn (bool, optional): Flag to use OpenCV DNN for ONNX inference. Defaults to False.
         --vid-stride (int, optional): Video frame-rate stride, determining the number of frames to skip in between
             consecutive frames. Defaults to 1.
+        --stream-processes (bool, optional): Flag to decode each stream in its own process into shared memory.
+            Defaults to False.
 
     Returns:
         argparse.Namespace: Parsed command-line arguments as an argparse.Namespace object.
@@ -406,6 +421,9 @@ def parse_opt():
     parser.add_argument("--half", action="store_true", help="use FP16 half-precision inference")
     parser.add_argument("--dnn", action="store_true", help="use OpenCV DNN for ONNX inference")
     parser.add_argument("--vid-stride", type=int, default=1, help="video frame-rate stride")
+    parser.add_argument("--stream-processes", action="store_true", help="decode each stream in its own process")
+    parser.add_argument("--sparse-decode", action="store_true", help="decode only anchors that pass --conf-thres")
+    parser.add_argument("--uint8", action="store_true", help="fold 1/255 into the first conv and feed uint8 images")
     opt = parser.parse_args()
     opt.imgsz *= 2 if len(opt.imgsz) == 1 else 1  # expand
     print_args(vars(opt))
@@ -23,6 +23,8 @@ Requirements:
 
 Usage:
     $ python export.py --weights yolov5s.pt --include torchscript onnx openvino engine coreml tflite ...
+    $ python export.py --weights yolov5s.pt --include onnx --int8 --data coco128.yaml  # ONNX Runtime static INT8
+    $ python export.py --weights yolov5s.pt --include torchscript onnx openvino saved_model tflite --workers 4
 
 Inference:
     $ python detect.py --weights yolov5s.pt                 # PyTorch
@@ -272,7 +274,7 @@ def export_torchscript(model, im, file, optimize, prefix=colorstr("TorchScript:"
     f = file.with_suffix(".torchscript")
 
     ts = torch.jit.trace(model, im, strict=False)
-    d = {"shape": im.shape, "stride": int(max(model.stride)), "names": model.names}
+    d = {"shape": im.shape, "stride": int(max(model.stride)), "names": model.names, "uint8": im.dtype == torch.uint8}
     extra_files = {"config.txt": json.dumps(d)}  # torch._C.ExtraFilesMap()
     if optimize:  # https://pytorch.org/tutorials/recipes/mobile_interpreter.html
         optimize_for_mobile(ts)._save_for_lite_interpreter(str(f), _extra_files=extra_files)
@@ -381,6 +383,117 @@ def export_onnx(model, im, file, opset, dynamic, simplify, prefix=colorstr("ONNX
     return f, model_onnx
 
 
+@try_export
+def export_onnx_int8(f_onnx, data, imgsz, stride, n, per_tensor, prefix=colorstr("ONNX INT8:")):
+    """
+    Quantize an exported ONNX model to static INT8 with ONNX Runtime, calibrating on `n` images of a dataset.
+
+    Args:
+        f_onnx (str): Path of the FP32 ONNX model written by export_onnx().
+        data (str): Dataset YAML whose train split provides the calibration images.
+        imgsz (list[int]): Export image size (height, width); calibration images are letterboxed to it.
+        stride (int): Model stride, for letterboxing.
+        n (int): Number of calibration images.
+        per_tensor (bool): Quantize weights per tensor instead of per output channel.
+        prefix (str): Prefix for log messages.
+
+    Returns:
+        (str, None): Path of the quantized model, `*-int8.onnx` next to the FP32 model.
+
+    Notes:
+        Weights are signed INT8 and activations unsigned INT8 in QDQ format, the layout ONNX Runtime runs with its INT8
+        CPU kernels. Activation ranges come from MinMax calibration. The Detect decode after the output convolutions
+        (sigmoid, grid and anchor arithmetic) stays in float, since INT8 box coordinates would be off by pixels.
+    """
+    check_requirements(("onnx>=1.12.0", "onnxruntime-gpu" if torch.cuda.is_available() else "onnxruntime"))
+    import numpy as np
+    import onnx
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    from utils.dataloaders import create_dataloader
+
+    LOGGER.info(f"\n{prefix} starting quantization with {n} calibration images from {data}...")
+    assert imgsz[0] == imgsz[1], f"calibration letterboxes square images, export with a square --imgsz, not {imgsz}"
+    f = str(Path(f_onnx).with_name(f"{Path(f_onnx).stem}-int8.onnx"))
+    f_pre = str(Path(f_onnx).with_name(f"{Path(f_onnx).stem}-int8-pre.onnx"))
+    quant_pre_process(f_onnx, f_pre)  # shape inference and graph optimization, recommended before quantization
+    model_onnx = onnx.load(f_pre)
+    name = model_onnx.graph.input[0].name
+    uint8 = model_onnx.graph.input[0].type.tensor_type.elem_type == onnx.TensorProto.UINT8  # export --uint8
+
+    # Nodes between the last convolutions and the outputs, i.e. the Detect decode
+    producers = {o: node for node in model_onnx.graph.node for o in node.output}
+    decode, seen, stack = set(), set(), [o.name for o in model_onnx.graph.output]
+    while stack:
+        node = producers.get(stack.pop())
+        if node is not None and node.op_type != "Conv" and id(node) not in seen:
+            seen.add(id(node))
+            decode.add(node.name)
+            stack.extend(node.input)
+
+    class Calibration(CalibrationDataReader):
+        """Feeds `n` letterboxed dataset images, preprocessed like DetectMultiBackend does, to the calibrator."""
+
+        def __init__(self):
+            dataset = check_dataset(check_yaml(data))
+            loader = create_dataloader(
+                dataset["train"], imgsz[0], 1, stride, pad=0.5, workers=4, shuffle=True, prefix=colorstr("calib: ")
+            )[0]
+            self.batches = iter(loader)
+            self.left = n
+
+        def get_next(self):
+            """Returns the next {input name: image} feed, or None after `n` images."""
+            batch = next(self.batches, None) if self.left > 0 else None
+            if batch is None:
+                return None
+            self.left -= 1
+            im = batch[0].numpy()
+            return {name: im if uint8 else im.astype(np.float32) / 255}
+
+    quantize_static(
+        f_pre,
+        f,
+        Calibration(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=not per_tensor,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        nodes_to_exclude=sorted(decode - {""}),
+    )
+    os.remove(f_pre)
+
+    # Metadata
+    model_onnx = onnx.load(f)
+    del model_onnx.metadata_props[:]
+    for meta in onnx.load(f_onnx).metadata_props:
+        model_onnx.metadata_props.add(key=meta.key, value=meta.value)
+    onnx.save(model_onnx, f)
+    return f, None
+
+
+def compare_onnx_int8(data, f_fp32, f_int8, imgsz, device, prefix=colorstr("ONNX INT8:")):
+    """Validates the FP32 and INT8 ONNX models with val.py on `data` and logs mAP and inference latency deltas."""
+    import val
+
+    rows = {}
+    for name, w in ("FP32", f_fp32), ("INT8", f_int8):
+        (_, _, map50, map, *_), _, t = val.run(
+            data, w, batch_size=1, imgsz=max(imgsz), device=device, half=False, plots=False, name=f"onnx-{name.lower()}"
+        )
+        rows[name] = map50, map, t[1]
+    (a50, a, at), (b50, b, bt) = rows["FP32"], rows["INT8"]
+    LOGGER.info(
+        f"\n{prefix} validation on {data}\n"
+        f"{'model':<6} {'mAP50':>7} {'mAP50-95':>9} {'infer ms/img':>13}\n"
+        f"{'FP32':<6} {a50:>7.4f} {a:>9.4f} {at:>13.2f}\n"
+        f"{'INT8':<6} {b50:>7.4f} {b:>9.4f} {bt:>13.2f}\n"
+        f"{'delta':<6} {b50 - a50:>+7.4f} {b - a:>+9.4f} {bt - at:>+13.2f} ({at / bt:.2f}x speed)"
+    )
+    return rows
+
+
 @try_export
 def export_openvino(file, metadata, half, int8, data, prefix=colorstr("OpenVINO:")):
     """
@@ -1274,6 +1387,102 @@ def pipeline_coreml(model, im, file, names, y, mlmodel, prefix=colorstr("CoreML
     print(f"{prefix} pipeline success ({time.time() - t:.2f}s), saved as {f} ({file_size(f):.1f} MB)")
 
 
+def run_chain(chain, queue=None):
+    """
+    Runs a chain of dependent export steps in order and returns (results, rows).
+
+    A step whose prerequisite formats failed is skipped. Each row (format, file, seconds, status) is also put on `queue`
+    as soon as it is known, so a parent process keeps the rows of a worker that crashes later in its chain.
+    """
+    r, rows = {}, []
+    for key, needs, step in chain:
+        if all(r.get(k, (None,))[0] for k in needs):
+            with Profile() as dt:
+                r[key] = step(r)
+            f = r[key][0]
+            row = key, str(f) if f else None, round(dt.t, 2), "ok" if f else "failed"
+        else:
+            r[key] = None, None
+            row = key, None, 0.0, "skipped"
+        rows.append(row)
+        if queue is not None:
+            queue.put(row)
+    return r, rows
+
+
+def _export_worker(chain, queue, threads):
+    """Runs one export chain in a forked process with its share of the CPU threads."""
+    torch.set_num_threads(threads)
+    run_chain(chain, queue)
+
+
+def run_chains_forked(chains, workers):
+    """
+    Runs export chains in up to `workers` forked processes and returns all rows in chain order.
+
+    The workers share the parent's loaded and fused model copy-on-write, so it is neither reloaded nor pickled. Chains
+    are independent: a worker that fails or crashes only loses its own formats, which are reported with its exit code.
+    """
+    import multiprocessing
+    import queue as queue_lib
+
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    n = min(workers, len(chains))
+    threads = max(1, torch.get_num_threads() // n)
+    pending, running, exitcodes, rows = list(chains), {}, {}, {}
+    LOGGER.info(f"\nExporting {sum(len(c) for c in chains)} formats in {len(chains)} chains, {n} worker processes...")
+
+    def collect(timeout):
+        with contextlib.suppress(queue_lib.Empty):
+            key, *row = results.get(timeout=timeout)
+            rows[key] = row
+            return True
+        return False
+
+    while pending or running:
+        while pending and len(running) < workers:
+            chain = pending.pop(0)
+            p = ctx.Process(target=_export_worker, args=(chain, results, threads))
+            p.start()
+            running[p] = chain
+        collect(0.5)
+        for p in [p for p in running if not p.is_alive()]:
+            p.join()
+            for key, *_ in running.pop(p):
+                exitcodes[key] = p.exitcode
+    while collect(0.5):  # rows still in the pipe of finished workers
+        pass
+    return [
+        (key, *rows.get(key, (None, 0.0, f"crashed (exit code {exitcodes[key]})")))
+        for chain in chains
+        for key, *_ in chain
+    ]
+
+
+def export_manifest(file, rows, seconds, workers):
+    """Logs the export rows as a table and saves them with file sizes to `<weights>_export_manifest.json`."""
+    exports = [
+        {"format": key, "file": f, "size_mb": round(file_size(f), 1) if f else None, "seconds": t, "status": status}
+        for key, f, t, status in rows
+    ]
+    manifest = {
+        "weights": str(file),
+        "workers": workers,
+        "wall_seconds": round(seconds, 2),
+        "export_seconds": round(sum(e["seconds"] for e in exports), 2),  # summed, above wall_seconds when parallel
+        "exports": exports,
+    }
+    if exports:
+        f = file.with_name(f"{file.stem}_export_manifest.json")
+        f.write_text(json.dumps(manifest, indent=2))
+        LOGGER.info(
+            f"\n{pd.DataFrame(exports).to_string(index=False)}\n"
+            f"{manifest['export_seconds']:.1f}s of exports in {manifest['wall_seconds']:.1f}s, manifest saved to {f}"
+        )
+    return manifest
+
+
 @smart_inference_mode()
 def run(
     data=ROOT / "data/coco128.yaml",  # 'dataset.yaml path'
@@ -1286,8 +1495,8 @@ def run(
     inplace=False,  # set YOLOv5 Detect() inplace=True
     keras=False,  # use Keras
     optimize=False,  # TorchScript: optimize for mobile
-    int8=False,  # CoreML/TF INT8 quantization
-    per_tensor=False,  # TF per tensor quantization
+    int8=False,  # CoreML/TF/OpenVINO/ONNX INT8 quantization
+    per_tensor=False,  # TF/ONNX per tensor quantization
     dynamic=False,  # ONNX/TF/TensorRT: dynamic axes
     cache="",  # TensorRT: timing cache path
     simplify=False,  # ONNX: simplify model
@@ -1301,6 +1510,9 @@ def run(
     topk_all=100,  # TF.js NMS: topk for all classes to keep
     iou_thres=0.45,  # TF.js NMS: IoU threshold
     conf_thres=0.25,  # TF.js NMS: confidence threshold
+    uint8=False,  # TorchScript/ONNX: uint8 input, 1/255 folded into the first conv
+    calib_images=300,  # ONNX INT8: calibration images from the --data train split
+    workers=0,  # export independent formats in this many forked processes (CPU), 0 for one after another
 ):
     """
     Exports a YOLOv5 model to specified formats including ONNX, TensorRT, CoreML, and TensorFlow.
@@ -1316,8 +1528,9 @@ def run(
         inplace (bool): Set the YOLOv5 Detect() module inplace=True. Default is False.
         keras (bool): Flag to use Keras for TensorFlow SavedModel export. Default is False.
         optimize (bool): Optimize TorchScript model for mobile deployment. Default is False.
-        int8 (bool): Apply INT8 quantization for CoreML or TensorFlow models. Default is False.
-        per_tensor (bool): Apply per tensor quantization for TensorFlow models. Default is False.
+        int8 (bool): Apply INT8 quantization for CoreML, TensorFlow, OpenVINO or ONNX models. ONNX writes an additional
+            static INT8 `*-int8.onnx` and validates it against the FP32 ONNX on `data`. Default is False.
+        per_tensor (bool): Apply per tensor quantization for TensorFlow and ONNX models. Default is False.
         dynamic (bool): Enable dynamic axes for ONNX, TensorFlow, or TensorRT exports. Default is False.
         cache (str): TensorRT timing cache path. Default is an empty string.
         simplify (bool): Simplify the ONNX model during export. Default is False.
@@ -1331,6 +1544,14 @@ def run(
         iou_thres (float): IoU threshold for NMS. Default is 0.45.
         conf_thres (float): Confidence threshold for NMS. Default is 0.25.
         mlmodel (bool): Flag to use *.mlmodel for CoreML export. Default is False.
+        uint8 (bool): Export TorchScript/ONNX graphs that take uint8 images, with the 1/255 input scale folded into the
+            first convolution. Default is False.
+        calib_images (int): Number of `data` train images used to calibrate ONNX INT8 activation ranges. Default is
+            300.
+        workers (int): Export independent formats (TorchScript, ONNX and OpenVINO, CoreML, the TensorFlow chain,
+            PaddlePaddle) in up to this many processes forked from the loaded model. CPU only; 0 or 1 exports them one
+            after another. Either way each format's file, size, time and status go to `<weights>_export_manifest.json`.
+            Default is 0.
 
     Returns:
         None
@@ -1383,7 +1604,13 @@ def run(
     if half:
         assert device.type != "cpu" or coreml, "--half only compatible with GPU export, i.e. use --device 0"
         assert not dynamic, "--half not compatible with --dynamic, i.e. use either --half or --dynamic but not both"
+    if uint8:
+        assert not any(flags[2:]), "--uint8 only compatible with TorchScript and ONNX export, i.e. --include onnx"
+    if int8 and onnx:
+        assert not half, "ONNX --int8 quantizes the FP32 graph, drop --half"
     model = attempt_load(weights, device=device, inplace=True, fuse=True)  # load FP32 model
+    if uint8:
+        model.fold_input_scale()  # takes 0-255 pixel values
 
     # Checks
     imgsz *= 2 if len(imgsz) == 1 else 1  # expand
@@ -1394,7 +1621,7 @@ def run(
     gs = int(max(model.stride))  # grid size (max stride)
     imgsz = [check_img_size(x, gs) for x in imgsz]  # verify img_size are gs-multiples
     ch = next(model.parameters()).size(1)  # require input image channels
-    im = torch.zeros(batch_size, ch, *imgsz).to(device)  # image size(1,3,320,192) BCHW iDetection
+    im = torch.zeros(batch_size, ch, *imgsz, dtype=torch.uint8 if uint8 else torch.float).to(device)  # BCHW
 
     # Update model
     model.eval()
@@ -1407,58 +1634,115 @@ def run(
     for _ in range(2):
         y = model(im)  # dry runs
     if half and not coreml:
-        im, model = im.half(), model.half()  # to FP16
+        im, model = im if uint8 else im.half(), model.half()  # to FP16
     shape = tuple((y[0] if isinstance(y, tuple) else y).shape)  # model output shape
     metadata = {"stride": int(max(model.stride)), "names": model.names}  # model metadata
     LOGGER.info(f"\n{colorstr('PyTorch:')} starting from {file} with output shape {shape} ({file_size(file):.1f} MB)")
 
-    # Exports
-    f = [""] * len(fmts)  # exported filenames
+    # Exports, as chains of dependent steps: (format, formats it needs, function of the chain's results -> (file, obj))
     warnings.filterwarnings(action="ignore", category=torch.jit.TracerWarning)  # suppress TracerWarning
+    chains = []
     if jit:  # TorchScript
-        f[0], _ = export_torchscript(model, im, file, optimize)
-    if engine:  # TensorRT required before ONNX
-        f[1], _ = export_engine(model, im, file, half, dynamic, simplify, workspace, verbose, cache)
+        chains.append([("torchscript", (), lambda r: export_torchscript(model, im, file, optimize))])
+    if engine:  # TensorRT, exports its own ONNX and so runs before the ONNX chain when sequential
+
+        def engine_step(r):
+            """Exports a TensorRT engine."""
+            return export_engine(model, im, file, half, dynamic, simplify, workspace, verbose, cache)
+
+        chains.append([("engine", (), engine_step)])
     if onnx or xml:  # OpenVINO requires ONNX
-        f[2], _ = export_onnx(model, im, file, opset, dynamic, simplify)
-    if xml:  # OpenVINO
-        f[3], _ = export_openvino(file, metadata, half, int8, data)
+        chain = [("onnx", (), lambda r: export_onnx(model, im, file, opset, dynamic, simplify))]
+        if onnx and int8:  # ONNX Runtime static INT8, OpenVINO below still converts the FP32 ONNX
+            chain.append(
+                (
+                    "onnx-int8",
+                    ("onnx",),
+                    lambda r: export_onnx_int8(r["onnx"][0], data, imgsz, gs, calib_images, per_tensor),
+                )
+            )
+        if xml:  # OpenVINO
+            chain.append(("openvino", ("onnx",), lambda r: export_openvino(file, metadata, half, int8, data)))
+        chains.append(chain)
     if coreml:  # CoreML
-        f[4], ct_model = export_coreml(model, im, file, int8, half, nms, mlmodel)
-        if nms:
-            pipeline_coreml(ct_model, im, file, model.names, y, mlmodel)
+
+        def coreml_step(r):
+            """Exports CoreML, with the NMS pipeline if requested."""
+            f, ct_model = export_coreml(model, im, file, int8, half, nms, mlmodel)
+            if nms:
+                pipeline_coreml(ct_model, im, file, model.names, y, mlmodel)
+            return f, ct_model
+
+        chains.append([("coreml", (), coreml_step)])
     if any((saved_model, pb, tflite, edgetpu, tfjs)):  # TensorFlow formats
         assert not tflite or not tfjs, "TFLite and TF.js models must be exported separately, please pass only one type."
         assert not isinstance(model, ClassificationModel), "ClassificationModel export to TF formats not yet supported."
-        f[5], s_model = export_saved_model(
-            model.cpu(),
-            im,
-            file,
-            dynamic,
-            tf_nms=nms or agnostic_nms or tfjs,
-            agnostic_nms=agnostic_nms or tfjs,
-            topk_per_class=topk_per_class,
-            topk_all=topk_all,
-            iou_thres=iou_thres,
-            conf_thres=conf_thres,
-            keras=keras,
-        )
-        if pb or tfjs:  # pb prerequisite to tfjs
-            f[6], _ = export_pb(s_model, file)
-        if tflite or edgetpu:
-            f[7], _ = export_tflite(
+
+        def tflite_step(r):
+            """Exports TFLite; metadata goes into the Edge TPU model instead when one follows."""
+            s_model = r["saved_model"][1]
+            f, _ = export_tflite(
                 s_model, im, file, int8 or edgetpu, per_tensor, data=data, nms=nms, agnostic_nms=agnostic_nms
             )
+            if f and not edgetpu:
+                add_tflite_metadata(f, metadata, num_outputs=len(s_model.outputs))
+            return f, None
+
+        def edgetpu_step(r):
+            """Compiles the TFLite model for the Edge TPU, then adds the metadata to the Edge TPU or TFLite model."""
+            f, _ = export_edgetpu(file)
+            add_tflite_metadata(f or r["tflite"][0], metadata, num_outputs=len(r["saved_model"][1].outputs))
+            return f, None
+
+        chain = [
+            (
+                "saved_model",
+                (),
+                lambda r: export_saved_model(
+                    model.cpu(),
+                    im,
+                    file,
+                    dynamic,
+                    tf_nms=nms or agnostic_nms or tfjs,
+                    agnostic_nms=agnostic_nms or tfjs,
+                    topk_per_class=topk_per_class,
+                    topk_all=topk_all,
+                    iou_thres=iou_thres,
+                    conf_thres=conf_thres,
+                    keras=keras,
+                ),
+            )
+        ]
+        if pb or tfjs:  # pb prerequisite to tfjs
+            chain.append(("pb", ("saved_model",), lambda r: export_pb(r["saved_model"][1], file)))
+        if tflite or edgetpu:
+            chain.append(("tflite", ("saved_model",), tflite_step))
             if edgetpu:
-                f[8], _ = export_edgetpu(file)
-            add_tflite_metadata(f[8] or f[7], metadata, num_outputs=len(s_model.outputs))
+                chain.append(("edgetpu", ("saved_model", "tflite"), edgetpu_step))
         if tfjs:
-            f[9], _ = export_tfjs(file, int8)
+            chain.append(("tfjs", ("pb",), lambda r: export_tfjs(file, int8)))
+        chains.append(chain)
     if paddle:  # PaddlePaddle
-        f[10], _ = export_paddle(model, im, file, metadata)
+        chains.append([("paddle", (), lambda r: export_paddle(model, im, file, metadata))])
+
+    t_exports = time.time()
+    if workers > 1 and len(chains) > 1 and device.type == "cpu" and hasattr(os, "fork"):
+        rows = run_chains_forked(chains, workers)
+    else:
+        if workers > 1 and len(chains) > 1:
+            LOGGER.warning("WARNING ⚠️ parallel export needs a CPU --device and fork(), exporting one after another")
+        rows = [row for chain in chains for row in run_chain(chain)[1]]
+    export_manifest(file, rows, time.time() - t_exports, workers)
+    f = [""] * len(fmts)  # exported filenames
+    for key, fi, *_ in rows:
+        if key in fmts:
+            f[fmts.index(key)] = fi
+    f_int8 = next((fi for key, fi, *_ in rows if key == "onnx-int8"), None)
 
     # Finish
-    f = [str(x) for x in f if x]  # filter out '' and None
+    if f_int8 and f[fmts.index("onnx")]:  # FP32 ONNX baseline
+        compare_onnx_int8(data, f[fmts.index("onnx")], f_int8, imgsz, device)
+    f = [str(x) for x in f + [f_int8] if x]  # filter out '' and None
     if any(f):
         cls, det, seg = (isinstance(model, x) for x in (ClassificationModel, DetectionModel, SegmentationModel))  # type
         det &= not seg  # segmentation models inherit from SegmentationModel(DetectionModel)
@@ -1510,8 +1794,8 @@ def parse_opt(known=False):
     parser.add_argument("--inplace", action="store_true", help="set YOLOv5 Detect() inplace=True")
     parser.add_argument("--keras", action="store_true", help="TF: use Keras")
     parser.add_argument("--optimize", action="store_true", help="TorchScript: optimize for mobile")
-    parser.add_argument("--int8", action="store_true", help="CoreML/TF/OpenVINO INT8 quantization")
-    parser.add_argument("--per-tensor", action="store_true", help="TF per-tensor quantization")
+    parser.add_argument("--int8", action="store_true", help="CoreML/TF/OpenVINO/ONNX INT8 quantization")
+    parser.add_argument("--per-tensor", action="store_true", help="TF/ONNX per-tensor quantization")
     parser.add_argument("--dynamic", action="store_true", help="ONNX/TF/TensorRT: dynamic axes")
     parser.add_argument("--cache", type=str, default="", help="TensorRT: timing cache file path")
     parser.add_argument("--simplify", action="store_true", help="ONNX: simplify model")
@@ -1525,6 +1809,9 @@ def parse_opt(known=False):
     parser.add_argument("--topk-all", type=int, default=100, help="TF.js NMS: topk for all classes to keep")
     parser.add_argument("--iou-thres", type=float, default=0.45, help="TF.js NMS: IoU threshold")
     parser.add_argument("--conf-thres", type=float, default=0.25, help="TF.js NMS: confidence threshold")
+    parser.add_argument("--uint8", action="store_true", help="TorchScript/ONNX: uint8 input, 1/255 folded into conv")
+    parser.add_argument("--calib-images", type=int, default=300, help="ONNX INT8: calibration images from --data")
+    parser.add_argument("--workers", type=int, default=0, help="parallel export processes (CPU), 0 for sequential")
     parser.add_argument(
         "--include",
         nargs="+",
@@ -103,7 +103,9 @@ def _create(name, pretrained=True, channels=3, classes=80, autoshape=True, verbo
         raise Exception(s) from e
 
 
-def custom(path="path/to/model.pt", autoshape=True, _verbose=True, device=None):
+def custom(
+    path="path/to/model.pt", autoshape=True, _verbose=True, device=None, artifact=None, cache_dir="artifacts", imgsz=640
+):
     """
     Loads a custom or local YOLOv5 model from a given path with optional autoshaping and device specification.
 
@@ -115,6 +117,10 @@ def custom(path="path/to/model.pt", autoshape=True, _verbose=True, device=None):
             (default is True).
         device (str | torch.device | None): Device to load the model on, e.g., 'cpu', 'cuda', torch.device('cuda:0'), etc.
             (default is None, which automatically selects the best available device).
+        artifact (str | None): Load a cached 'fused', 'torchscript', 'onnx' or 'ort' artifact built from `path` instead
+            of the checkpoint itself, building it in `cache_dir` on first use (default is None, load `path` directly).
+        cache_dir (str | Path): Artifact cache directory (default is 'artifacts').
+        imgsz (int | tuple): Input size the artifact is built and keyed for (default is 640).
 
     Returns:
         torch.nn.Module: A YOLOv5 model loaded with the specified parameters.
@@ -130,8 +136,15 @@ def custom(path="path/to/model.pt", autoshape=True, _verbose=True, device=None):
 
         # Load model from a local path without autoshape on the CPU device
         model = torch.hub.load('.', 'custom', 'yolov5s.pt', source='local', autoshape=False, device='cpu')
+
+        # Load the ONNX export of a local model, exported once and reused from the artifact cache afterwards
+        model = torch.hub.load('.', 'custom', 'yolov5s.pt', source='local', artifact='onnx', cache_dir='artifacts')
         ```
     """
+    if artifact:
+        from utils.artifact_cache import ArtifactCache
+
+        path = ArtifactCache(cache_dir).get(path, artifact, imgsz=imgsz, device=device)
     return _create(path, autoshape=autoshape, verbose=_verbose, device=device)
 
 
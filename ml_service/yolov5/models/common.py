@@ -3,9 +3,13 @@
 
 import ast
 import contextlib
+import contextvars
 import json
 import math
+import os
 import platform
+import queue
+import threading
 import warnings
 import zipfile
 from collections import OrderedDict, namedtuple
@@ -54,7 +58,8 @@ from utils.general import (
     xyxy2xywh,
     yaml_load,
 )
-from utils.torch_utils import copy_attr, smart_inference_mode
+from utils.numpy_ops import bucket_shape, letterbox_into
+from utils.torch_utils import copy_attr, cpu_bf16_supported, smart_inference_mode
 
 
 def autopad(k, p=None, d=1):
@@ -456,11 +461,26 @@ class Concat(nn.Module):
         return torch.cat(x, self.d)
 
 
+ONNX_OUTPUT_BUFFERS = 8  # input shapes whose pre-bound ONNX Runtime outputs are kept per pooled session
+
+
 class DetectMultiBackend(nn.Module):
     """YOLOv5 MultiBackend class for inference on various backends including PyTorch, ONNX, TensorRT, and more."""
 
-    def __init__(self, weights="yolov5s.pt", device=torch.device("cpu"), dnn=False, data=None, fp16=False, fuse=True):
-        """Initializes DetectMultiBackend with support for various inference backends, including PyTorch and ONNX."""
+    channels_last = False  # PyTorch CPU inference in NHWC layout, see cpu_inference()
+    bf16 = False  # PyTorch CPU inference under bfloat16 autocast, see cpu_inference()
+    onnx_pool = None  # queue of (ONNX Runtime session, IO bindings) borrowed by concurrent callers, see onnx_sessions()
+
+    def __init__(
+        self, weights="yolov5s.pt", device=torch.device("cpu"), dnn=False, data=None, fp16=False, fuse=True, uint8=False
+    ):
+        """
+        Initializes DetectMultiBackend with support for various inference backends, including PyTorch and ONNX.
+
+        `uint8` folds the 1/255 input scale into a PyTorch model's first convolution so it takes uint8 images directly;
+        TorchScript and ONNX models exported with `export.py --uint8` are detected as uint8 automatically. Callers check
+        `model.uint8` to skip the float conversion and division.
+        """
         #   PyTorch:              weights = *.pt
         #   TorchScript:                    *.torchscript
         #   ONNX Runtime:                   *.onnx
@@ -479,6 +499,7 @@ class DetectMultiBackend(nn.Module):
         w = str(weights[0] if isinstance(weights, list) else weights)
         pt, jit, onnx, xml, engine, coreml, saved_model, pb, tflite, edgetpu, tfjs, paddle, triton = self._model_type(w)
         fp16 &= pt or jit or onnx or engine or triton  # FP16
+        uint8 &= pt  # exported models carry their input type
         nhwc = coreml or saved_model or pb or tflite or edgetpu  # BHWC formats (vs torch BCWH)
         stride = 32  # default stride
         cuda = torch.cuda.is_available() and device.type != "cpu"  # use CUDA
@@ -487,6 +508,8 @@ class DetectMultiBackend(nn.Module):
 
         if pt:  # PyTorch
             model = attempt_load(weights if isinstance(weights, list) else w, device=device, inplace=True, fuse=fuse)
+            if uint8:
+                model.fold_input_scale()
             stride = max(int(model.stride.max()), 32)  # model stride
             names = model.module.names if hasattr(model, "module") else model.names  # get class names
             model.half() if fp16 else model.float()
@@ -501,7 +524,7 @@ class DetectMultiBackend(nn.Module):
                     extra_files["config.txt"],
                     object_hook=lambda d: {int(k) if k.isdigit() else k: v for k, v in d.items()},
                 )
-                stride, names = int(d["stride"]), d["names"]
+                stride, names, uint8 = int(d["stride"]), d["names"], d.get("uint8", False)
         elif dnn:  # ONNX OpenCV DNN
             LOGGER.info(f"Loading {w} for ONNX OpenCV DNN inference...")
             check_requirements("opencv-python>=4.5.4")
@@ -514,6 +537,8 @@ class DetectMultiBackend(nn.Module):
             providers = ["CUDAExecutionProvider", "CPUExecutionProvider"] if cuda else ["CPUExecutionProvider"]
             session = onnxruntime.InferenceSession(w, providers=providers)
             output_names = [x.name for x in session.get_outputs()]
+            input_name = session.get_inputs()[0].name
+            uint8 = session.get_inputs()[0].type == "tensor(uint8)"  # exported with --uint8
             meta = session.get_modelmeta().custom_metadata_map  # metadata
             if "stride" in meta:
                 stride, names = int(meta["stride"]), eval(meta["names"])
@@ -691,13 +716,20 @@ class DetectMultiBackend(nn.Module):
     def forward(self, im, augment=False, visualize=False):
         """Performs YOLOv5 inference on input images with options for augmentation and visualization."""
         b, ch, h, w = im.shape  # batch, channel, height, width
-        if self.fp16 and im.dtype != torch.float16:
+        if self.uint8 and not self.pt:
+            im = (im.round() if im.is_floating_point() else im).to(torch.uint8)  # exported uint8 graph, 0-255 values
+        elif im.dtype == torch.uint8 and not self.uint8:
+            im = (im.half() if self.fp16 else im.float()) / 255  # model takes 0-1 floats
+        elif self.fp16 and im.dtype not in (torch.float16, torch.uint8):
             im = im.half()  # to FP16
         if self.nhwc:
             im = im.permute(0, 2, 3, 1)  # torch BCHW to numpy BHWC shape(1,320,192,3)
 
         if self.pt:  # PyTorch
-            y = self.model(im, augment=augment, visualize=visualize) if augment or visualize else self.model(im)
+            if self.channels_last:
+                im = im.contiguous(memory_format=torch.channels_last)  # no copy for AutoShape's NHWC buffers
+            with torch.autocast("cpu", dtype=torch.bfloat16, enabled=self.bf16):
+                y = self.model(im, augment=augment, visualize=visualize) if augment or visualize else self.model(im)
         elif self.jit:  # TorchScript
             y = self.model(im)
         elif self.dnn:  # ONNX OpenCV DNN
@@ -705,8 +737,12 @@ class DetectMultiBackend(nn.Module):
             self.net.setInput(im)
             y = self.net.forward()
         elif self.onnx:  # ONNX Runtime
-            im = im.cpu().numpy()  # torch to numpy
-            y = self.session.run(self.output_names, {self.session.get_inputs()[0].name: im})
+            entry = self.onnx_pool.get() if self.onnx_pool else (self.session, None)
+            try:
+                y = self._onnx_run(*entry, im)
+            finally:
+                if self.onnx_pool:
+                    self.onnx_pool.put(entry)
         elif self.xml:  # OpenVINO
             im = im.cpu().numpy()  # FP32
             y = list(self.ov_compiled_model(im).values())
@@ -772,15 +808,121 @@ class DetectMultiBackend(nn.Module):
         else:
             return self.from_numpy(y)
 
+    def cpu_inference(self, channels_last=True, bf16=False):
+        """
+        Switches a PyTorch model on CPU to oneDNN-friendly inference and returns self.
+
+        `channels_last` converts the weights and every input to NHWC, for which oneDNN has its fastest convolution
+        kernels. `bf16` runs the model under bfloat16 autocast (Detect still decodes boxes in FP32); it is only enabled
+        on CPUs with native bf16 support (AVX512-BF16 or AMX) and costs some accuracy, so validate it first.
+        """
+        assert self.pt and self.device.type == "cpu", "CPU inference mode requires a PyTorch model on CPU"
+        if bf16 and not cpu_bf16_supported():
+            LOGGER.warning("WARNING ⚠️ this CPU has no native bfloat16 kernels, bf16 autocast disabled")
+            bf16 = False
+        torch.backends.mkldnn.enabled = True  # oneDNN convolutions
+        self.model.to(memory_format=torch.channels_last if channels_last else torch.contiguous_format)
+        self.channels_last, self.bf16 = channels_last, bf16
+        cpu = getattr(torch.backends, "cpu", None)  # torch>=2.0
+        isa = f" ({cpu.get_cpu_capability()})" if cpu else ""
+        LOGGER.info(f"CPU inference{isa}: channels_last={channels_last}, bf16={bf16}")
+        return self
+
+    def onnx_sessions(
+        self,
+        size=1,
+        optimization="all",
+        intra_op_threads=0,
+        inter_op_threads=0,
+        parallel=False,
+        arena=True,
+        io_binding=False,
+    ):
+        """
+        Rebuilds an ONNX Runtime model's session with tuned options and returns self; call it before serving.
+
+        `size` sessions form a pool: each forward borrows a free one, so concurrent callers run side by side instead of
+        sharing one session's thread pool, and the cores are split between the sessions unless `intra_op_threads` is
+        given. `optimization` is the graph optimization level ('disable', 'basic', 'extended' or 'all'). `parallel`
+        runs independent graph branches concurrently on `inter_op_threads`; `arena=False` releases the CPU memory arena
+        between runs at some latency cost. `io_binding` binds the input tensor in place and runs into output buffers
+        pre-allocated per pooled session and input shape, at most `ONNX_OUTPUT_BUFFERS` shapes each. Callers get copies
+        of the buffers, which the session's next borrower overwrites, so each run still allocates its outputs: binding
+        saves the input conversion and, on CUDA, keeps input and outputs on the GPU instead of round-tripping through
+        host memory. A single session with `io_binding` is pooled too, so concurrent callers never share its buffers.
+        """
+        assert self.onnx and not self.dnn, "session options require an ONNX Runtime model"
+        import onnxruntime
+
+        levels = {
+            "disable": "ORT_DISABLE_ALL",
+            "basic": "ORT_ENABLE_BASIC",
+            "extended": "ORT_ENABLE_EXTENDED",
+            "all": "ORT_ENABLE_ALL",
+        }
+        assert optimization in levels, f"optimization must be one of {list(levels)}, not '{optimization}'"
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = getattr(onnxruntime.GraphOptimizationLevel, levels[optimization])
+        options.intra_op_num_threads = intra_op_threads or (max(1, (os.cpu_count() or 1) // size) if size > 1 else 0)
+        options.inter_op_num_threads = inter_op_threads
+        mode = "ORT_PARALLEL" if parallel else "ORT_SEQUENTIAL"
+        options.execution_mode = getattr(onnxruntime.ExecutionMode, mode)
+        options.enable_cpu_mem_arena = arena
+        providers = self.session.get_providers()
+        sessions = [onnxruntime.InferenceSession(self.w, options, providers=providers) for _ in range(max(size, 1))]
+        self.session, self.onnx_pool = sessions[0], None
+        if len(sessions) > 1 or io_binding:
+            self.onnx_pool = queue.Queue()
+            for session in sessions:
+                self.onnx_pool.put((session, OrderedDict() if io_binding else None))  # bindings by input shape
+        LOGGER.info(
+            f"ONNX Runtime: {len(sessions)} session(s), optimization={optimization}, "
+            f"intra_op_threads={options.intra_op_num_threads or 'default'}, parallel={parallel}, arena={arena}, "
+            f"io_binding={io_binding}"
+        )
+        return self
+
+    def _onnx_run(self, session, bindings, im):
+        """
+        Runs an ONNX Runtime `session` on torch `im`; with `bindings` (the borrowed session's IO bindings by input
+        shape) it runs into that session's pre-bound outputs and returns copies of them.
+        """
+        if bindings is None:
+            return session.run(self.output_names, {self.input_name: im.cpu().numpy()})
+        cuda = im.device.type == "cuda" and "CUDAExecutionProvider" in session.get_providers()
+        device = im.device if cuda else torch.device("cpu")
+        im = im.to(device).contiguous()
+        key = tuple(im.shape), im.dtype
+        if key in bindings:
+            bindings.move_to_end(key)
+            binding, outputs = bindings[key]
+            dtype = torch.empty(0, dtype=im.dtype).numpy().dtype
+            binding.bind_input(self.input_name, device.type, device.index or 0, dtype, key[0], im.data_ptr())
+            session.run_with_iobinding(binding)
+        else:  # a plain run gives the output shapes of this input shape, then its buffers are bound once
+            y = session.run(self.output_names, {self.input_name: im.cpu().numpy()})
+            binding, outputs = session.io_binding(), [torch.from_numpy(x).to(device) for x in y]
+            for name, x, buffer in zip(self.output_names, y, outputs):
+                binding.bind_output(name, device.type, device.index or 0, x.dtype, x.shape, buffer.data_ptr())
+            bindings[key] = binding, outputs
+            if len(bindings) > ONNX_OUTPUT_BUFFERS:
+                bindings.popitem(last=False)  # least recently used shape
+        return [x.clone() for x in outputs]  # the buffers belong to the session, its next borrower overwrites them
+
     def from_numpy(self, x):
         """Converts a NumPy array to a torch tensor, maintaining device compatibility."""
         return torch.from_numpy(x).to(self.device) if isinstance(x, np.ndarray) else x
 
-    def warmup(self, imgsz=(1, 3, 640, 640)):
-        """Performs a single inference warmup to initialize model weights, accepting an `imgsz` tuple for image size."""
+    def warmup(self, imgsz=(1, 3, 640, 640), cpu=False):
+        """
+        Performs a single inference warmup to initialize model weights, accepting an `imgsz` tuple for image size.
+
+        CPU models are skipped unless `cpu=True`, e.g. for services that must build oneDNN primitives before serving.
+        """
         warmup_types = self.pt, self.jit, self.onnx, self.engine, self.saved_model, self.pb, self.triton
-        if any(warmup_types) and (self.device.type != "cpu" or self.triton):
-            im = torch.empty(*imgsz, dtype=torch.half if self.fp16 else torch.float, device=self.device)  # input
+        if any(warmup_types) and (self.device.type != "cpu" or self.triton or cpu):
+            dtype = torch.uint8 if self.uint8 else torch.half if self.fp16 else torch.float
+            im = torch.zeros(*imgsz, dtype=dtype, device=self.device)  # input
             for _ in range(2 if self.jit else 1):  #
                 self.forward(im)  # warmup
 
@@ -813,6 +955,57 @@ class DetectMultiBackend(nn.Module):
         return None, None
 
 
+PREPROCESS_BUFFERS = 8  # idle AutoShape input buffers kept per process, least recently used shapes are freed first
+
+
+class BufferPool:
+    """Process-wide free-list of reusable buffers keyed by shape; threads borrow one per call and hand it back."""
+
+    def __init__(self, max_idle=PREPROCESS_BUFFERS):
+        """Keeps at most `max_idle` returned buffers across all keys."""
+        self.max_idle = max_idle
+        self._free = OrderedDict()  # key: [buffers], least recently returned key first
+        self._lock = threading.Lock()
+
+    def acquire(self, key, create):
+        """Returns an idle buffer for `key`, or a new one from `create()` if every buffer of that key is in use."""
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                return free.pop()
+        return create()
+
+    def release(self, key, buffer):
+        """Returns `buffer` to the pool, freeing the least recently used idle buffers beyond `max_idle`."""
+        with self._lock:
+            self._free.setdefault(key, []).append(buffer)
+            self._free.move_to_end(key)
+            idle = sum(len(v) for v in self._free.values())
+            while idle > self.max_idle:
+                k, free = next(iter(self._free.items()))
+                free.pop(0)
+                idle -= 1
+                if not free:
+                    del self._free[k]
+
+
+_preprocess_buffers = BufferPool()
+
+detect_conf_thres = contextvars.ContextVar("detect_conf_thres", default=None)  # Detect sparse decode, None is dense
+
+
+@contextlib.contextmanager
+def decode_threshold(conf_thres):
+    """Decodes only anchors whose objectness can pass `conf_thres` (None: every anchor) in Detect heads run by the
+    calling thread or task, leaving concurrent callers on the same model untouched.
+    """
+    token = detect_conf_thres.set(conf_thres)
+    try:
+        yield
+    finally:
+        detect_conf_thres.reset(token)
+
+
 class AutoShape(nn.Module):
     """AutoShape class for robust YOLOv5 inference with preprocessing, NMS, and support for various input formats."""
 
@@ -823,6 +1016,8 @@ class AutoShape(nn.Module):
     classes = None  # (optional list) filter by class, i.e. = [0, 15, 16] for COCO persons, cats and dogs
     max_det = 1000  # maximum number of detections per image
     amp = False  # Automatic Mixed Precision (AMP) inference
+    buckets = None  # (optional list) (h, w) input shapes to pad to, i.e. [(640, 640), (480, 640), (640, 480)]
+    sparse = False  # PyTorch models: Detect decodes only anchors whose objectness can pass `conf`
 
     def __init__(self, model, verbose=True):
         """Initializes YOLOv5 model for inference, setting up attributes and preparing model for evaluation."""
@@ -853,6 +1048,44 @@ class AutoShape(nn.Module):
                 m.anchor_grid = list(map(fn, m.anchor_grid))
         return self
 
+    @staticmethod
+    def _preprocess(ims, shape, p, uint8=False, channels_last=False):
+        """
+        Letterboxes uint8 HWC images straight into a pooled batch canvas and converts it to the model's BCHW input.
+
+        The canvas (pinned on CUDA) and the input tensor are borrowed from a process-wide pool keyed by shape, so
+        repeated calls allocate nothing. Returns (input, lease); the input stays valid until the lease is handed back
+        with `_preprocess_buffers.release(*lease)`. With `uint8` (1/255 folded into the model) the input stays uint8
+        and only its layout changes. With `channels_last` the input keeps the canvas' NHWC memory layout, so on CPU a
+        uint8 input is the canvas itself and no separate input tensor is allocated.
+        """
+        dtype = torch.uint8 if uint8 else p.dtype
+        fmt = torch.channels_last if channels_last else torch.contiguous_format
+        key = len(ims), *shape, p.device, dtype, fmt
+        in_place = uint8 and channels_last and p.device.type == "cpu"  # the canvas is already the model input
+
+        def create():
+            canvas = torch.empty((len(ims), *shape, 3), dtype=torch.uint8, pin_memory=p.device.type == "cuda")
+            if in_place:
+                return canvas, None
+            return canvas, torch.empty((len(ims), 3, *shape), dtype=dtype, device=p.device, memory_format=fmt)
+
+        buffers = _preprocess_buffers.acquire(key, create)
+        canvas, x = buffers
+        canvas_np = canvas.numpy()
+        for i, im in enumerate(ims):
+            letterbox_into(im, canvas_np[i])  # resize and pad in place
+        src = canvas.permute(0, 3, 1, 2)  # BHWC to BCHW view, channels_last memory
+        if in_place:
+            return src, (key, buffers)
+        if uint8:
+            x.copy_(src)  # layout only, the model casts and scales
+        elif x.device.type == "cpu" and x.dtype == torch.float32:
+            torch.div(src, 255, out=x)  # layout, uint8 to fp32 and scaling in one pass
+        else:
+            x.copy_(src).div_(255)  # uint8 upload, then fp16/32 on device
+        return x, (key, buffers)
+
     @smart_inference_mode()
     def forward(self, ims, size=640, augment=False, profile=False):
         """
@@ -875,9 +1108,13 @@ class AutoShape(nn.Module):
                 size = (size, size)
             p = next(self.model.parameters()) if self.pt else torch.empty(1, device=self.model.device)  # param
             autocast = self.amp and (p.device.type != "cpu")  # Automatic Mixed Precision (AMP) inference
+            conf_thres = self.conf if self.sparse and self.pt else None  # sparse decode, this call only
+            uint8 = self.model.uint8 if self.dmb else getattr(self.model, "input_scale_folded", False)  # 0-255 input
             if isinstance(ims, torch.Tensor):  # torch
-                with amp.autocast(autocast):
-                    return self.model(ims.to(p.device).type_as(p), augment=augment)  # inference
+                if ims.dtype != torch.uint8:  # 0-1 floats
+                    ims = ims.type_as(p).mul(255).round_() if uint8 else ims.type_as(p)  # round, a cast truncates
+                with amp.autocast(autocast), decode_threshold(conf_thres):
+                    return self.model(ims.to(p.device), augment=augment)  # inference, uint8 is cast by the model
 
             # Pre-process
             n, ims = (len(ims), list(ims)) if isinstance(ims, (list, tuple)) else (1, [ims])  # number, list of images
@@ -899,14 +1136,26 @@ class AutoShape(nn.Module):
                 shape1.append([int(y * g) for y in s])
                 ims[i] = im if im.data.contiguous else np.ascontiguousarray(im)  # update
             shape1 = [make_divisible(x, self.stride) for x in np.array(shape1).max(0)]  # inf shape
-            x = [letterbox(im, shape1, auto=False)[0] for im in ims]  # pad
-            x = np.ascontiguousarray(np.array(x).transpose((0, 3, 1, 2)))  # stack and BHWC to BCHW
-            x = torch.from_numpy(x).to(p.device).type_as(p) / 255  # uint8 to fp16/32
+            shape1 = bucket_shape(shape1, self.buckets)  # pad up to a fixed shape, reusing its grids and kernels
+            lease = None  # pooled input buffers, handed back after the forward pass
+            if all(im.dtype == np.uint8 for im in ims):
+                channels_last = self.dmb and self.model.channels_last
+                x, lease = self._preprocess(ims, shape1, p, uint8, channels_last)  # into pooled buffers
+            else:
+                x = [letterbox(im, shape1, auto=False)[0] for im in ims]  # pad
+                x = np.ascontiguousarray(np.array(x).transpose((0, 3, 1, 2)))  # stack and BHWC to BCHW
+                x = torch.from_numpy(x).to(p.device).type_as(p)  # to fp16/32
+                x = x if uint8 else x / 255
 
         with amp.autocast(autocast):
             # Inference
             with dt[1]:
-                y = self.model(x, augment=augment)  # forward
+                try:
+                    with decode_threshold(conf_thres):
+                        y = self.model(x, augment=augment)  # forward
+                finally:
+                    if lease:
+                        _preprocess_buffers.release(*lease)
 
             # Post-process
             with dt[2]:
@@ -12,7 +12,9 @@ import math
 import os
 import platform
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
+from functools import lru_cache
 from pathlib import Path
 
 import torch
@@ -48,6 +50,8 @@ from models.common import (
     GhostBottleneck,
     GhostConv,
     Proto,
+    decode_threshold,
+    detect_conf_thres,
 )
 from models.experimental import MixConv2d
 from utils.autoanchor import check_anchor_order
@@ -92,29 +96,77 @@ class Detect(nn.Module):
     def forward(self, x):
         """Processes input through YOLOv5 layers, altering shape for detection: `x(bs, 3, ny, nx, 85)`."""
         z = []  # inference output
+        conf_thres = detect_conf_thres.get()  # per call, see models.common.decode_threshold()
+        sparse = conf_thres is not None and not self.training and not isinstance(self, Segment)
         for i in range(self.nl):
             x[i] = self.m[i](x[i])  # conv
+            if x[i].dtype == torch.bfloat16:
+                x[i] = x[i].float()  # decode in FP32, bf16 boxes would be off by pixels
             bs, _, ny, nx = x[i].shape  # x(bs,255,20,20) to x(bs,3,20,20,85)
             x[i] = x[i].view(bs, self.na, self.no, ny, nx).permute(0, 1, 3, 4, 2).contiguous()
 
             if not self.training:  # inference
-                if self.dynamic or self.grid[i].shape[2:4] != x[i].shape[2:4]:
-                    self.grid[i], self.anchor_grid[i] = self._make_grid(nx, ny, i)
+                if self.dynamic:
+                    grid, anchor_grid = self._make_grid(nx, ny, i)
+                else:
+                    grid, anchor_grid = self._cached_grid(nx, ny, i)
+                self.grid[i], self.anchor_grid[i] = grid, anchor_grid  # latest, for code that reads them
+                if sparse:
+                    z.append(self._decode_candidates(x[i], grid, anchor_grid, i, conf_thres))
+                    continue
 
                 if isinstance(self, Segment):  # (boxes + masks)
                     xy, wh, conf, mask = x[i].split((2, 2, self.nc + 1, self.no - self.nc - 5), 4)
-                    xy = (xy.sigmoid() * 2 + self.grid[i]) * self.stride[i]  # xy
-                    wh = (wh.sigmoid() * 2) ** 2 * self.anchor_grid[i]  # wh
+                    xy = (xy.sigmoid() * 2 + grid) * self.stride[i]  # xy
+                    wh = (wh.sigmoid() * 2) ** 2 * anchor_grid  # wh
                     y = torch.cat((xy, wh, conf.sigmoid(), mask), 4)
                 else:  # Detect (boxes only)
                     xy, wh, conf = x[i].sigmoid().split((2, 2, self.nc + 1), 4)
-                    xy = (xy * 2 + self.grid[i]) * self.stride[i]  # xy
-                    wh = (wh * 2) ** 2 * self.anchor_grid[i]  # wh
+                    xy = (xy * 2 + grid) * self.stride[i]  # xy
+                    wh = (wh * 2) ** 2 * anchor_grid  # wh
                     y = torch.cat((xy, wh, conf), 4)
                 z.append(y.view(bs, self.na * nx * ny, self.no))
 
+        if sparse:
+            y = self._pad_candidates(z, x[0].shape[0])
+            return (y,) if self.export else (y, x)
         return x if self.training else (torch.cat(z, 1),) if self.export else (torch.cat(z, 1), x)
 
+    def _decode_candidates(self, xi, grid, anchor_grid, i, c):
+        """Decodes the layer `i` anchors whose objectness logit can pass threshold `c`; returns (rows, image index)."""
+        t = math.log(c / (1 - c)) - 1e-3 if 0 < c < 1 else -math.inf if c <= 0 else math.inf  # logit, NMS re-checks
+        b, a, gy, gx = (xi[..., 4] > t).nonzero(as_tuple=True)
+        xy, wh, conf = xi[b, a, gy, gx].sigmoid().split((2, 2, self.nc + 1), 1)
+        xy = (xy * 2 + grid[0, a, gy, gx]) * self.stride[i]  # xy
+        wh = (wh * 2) ** 2 * anchor_grid[0, a, gy, gx]  # wh
+        return torch.cat((xy, wh, conf), 1), b
+
+    def _pad_candidates(self, z, bs):
+        """Packs per-layer candidates into a (bs, max candidates, no) prediction, padded with zero-objectness rows."""
+        rows, b = torch.cat([r for r, _ in z]), torch.cat([b for _, b in z])
+        i = b.sort(stable=True)[1]  # image by image, keeping layer and anchor order
+        rows, b = rows[i], b[i]
+        counts = torch.bincount(b, minlength=bs)
+        rank = torch.arange(len(b), device=b.device) - (counts.cumsum(0) - counts)[b]  # row within its image
+        y = rows.new_zeros((bs, int(counts.max()), self.no))
+        y[b, rank] = rows
+        return y
+
+    def _cached_grid(self, nx, ny, i):
+        """Returns the (grid, anchor_grid) of layer `i` for an (ny, nx) feature map, built once per shape."""
+        cache = self.__dict__.get("_grid_cache")  # absent on models pickled before the cache existed
+        if cache is None:
+            cache = self.__dict__["_grid_cache"] = {}
+        key = nx, ny, i
+        if key not in cache:
+            cache[key] = self._make_grid(nx, ny, i)
+        return cache[key]
+
+    def _apply(self, fn):
+        """Drops cached grids on to(), cpu(), cuda(), half() etc.; they are rebuilt from the moved anchors."""
+        self.__dict__.pop("_grid_cache", None)
+        return super()._apply(fn)
+
     def _make_grid(self, nx=20, ny=20, i=0, torch_1_10=check_version(torch.__version__, "1.10.0")):
         """Generates a mesh grid for anchor boxes with optional compatibility for torch versions < 1.10."""
         d = self.anchors[i].device
@@ -149,6 +201,30 @@ class Segment(Detect):
         return (x, p) if self.training else (x[0], p) if self.export else (x[0], p, x[1])
 
 
+@lru_cache(maxsize=None)
+def _tta_pool(workers):
+    """Returns the thread pool shared by concurrent test-time augmentation passes, one per worker count."""
+    return ThreadPoolExecutor(workers, thread_name_prefix="tta")
+
+
+def _in_caller_modes(fn):
+    """Wraps `fn` to run under the calling thread's grad, inference and autocast modes, which torch keeps per thread."""
+    grad, inference = torch.is_grad_enabled(), torch.is_inference_mode_enabled()
+    casts = []  # (device, dtype) of active autocast contexts
+    if torch.is_autocast_enabled():  # CUDA, e.g. AutoShape with amp
+        casts.append(("cuda", torch.get_autocast_gpu_dtype()))
+    if torch.is_autocast_cpu_enabled():  # e.g. DetectMultiBackend.cpu_inference(bf16=True)
+        casts.append(("cpu", torch.get_autocast_cpu_dtype()))
+
+    def wrapper(*args):
+        with torch.inference_mode(inference), torch.set_grad_enabled(grad), contextlib.ExitStack() as stack:
+            for device, dtype in casts:
+                stack.enter_context(torch.autocast(device, dtype=dtype))
+            return fn(*args)
+
+    return wrapper
+
+
 class BaseModel(nn.Module):
     """YOLOv5 base model."""
 
@@ -156,7 +232,14 @@ class BaseModel(nn.Module):
         """Executes a single-scale inference or training pass on the YOLOv5 base model, with options for profiling and
         visualization.
         """
-        return self._forward_once(x, profile, visualize)  # single-scale inference, train
+        return self._forward_once(self._input(x), profile, visualize)  # single-scale inference, train
+
+    def _input(self, x):
+        """Casts uint8 images to the model dtype, scaled to 0-1 unless `fold_input_scale()` moved 1/255 into conv."""
+        if x.dtype != torch.uint8:
+            return x
+        x = x.to(next(self.parameters()).dtype)
+        return x if getattr(self, "input_scale_folded", False) else x / 255
 
     def _forward_once(self, x, profile=False, visualize=False):
         """Performs a forward pass on the YOLOv5 model, enabling profiling and feature visualization options."""
@@ -186,20 +269,38 @@ class BaseModel(nn.Module):
         if c:
             LOGGER.info(f"{sum(dt):10.2f} {'-':>10s} {'-':>10s}  Total")
 
-    def fuse(self):
-        """Fuses Conv2d() and BatchNorm2d() layers in the model to improve inference speed."""
+    def fuse(self, uint8=False):
+        """Fuses Conv2d() and BatchNorm2d() layers in the model to improve inference speed; `uint8` also folds the 1/255
+        input scale into the first convolution (see `fold_input_scale`).
+        """
         LOGGER.info("Fusing layers... ")
         for m in self.model.modules():
             if isinstance(m, (Conv, DWConv)) and hasattr(m, "bn"):
                 m.conv = fuse_conv_and_bn(m.conv, m.bn)  # update conv
                 delattr(m, "bn")  # remove batchnorm
                 m.forward = m.forward_fuse  # update forward
+        if uint8:
+            self.fold_input_scale()
         self.info()
         return self
 
+    def fold_input_scale(self):
+        """
+        Folds the 1/255 input normalization into the first convolution's weights, for inference only.
+
+        The model then takes 0-255 pixel values: uint8 tensors (cast inside the model, so callers skip the float copy
+        and the division) or floats in that range. Exact up to rounding, as the conv is linear and zero padding is
+        unchanged; with FP16 weights the smallest scaled weights lose precision, so validate half-precision models.
+        """
+        if not getattr(self, "input_scale_folded", False):
+            conv = next(m for m in self.model.modules() if isinstance(m, nn.Conv2d))
+            conv.weight.data /= 255
+            self.input_scale_folded = True
+        return self
+
     def info(self, verbose=False, img_size=640):
         """Prints model information given verbosity and image size, e.g., `info(verbose=True, img_size=640)`."""
-        model_info(self, verbose, img_size)
+        return model_info(self, verbose, img_size)
 
     def _apply(self, fn):
         """Applies transformations like to(), cpu(), cuda(), half() to model tensors excluding parameters or registered
@@ -218,6 +319,8 @@ class BaseModel(nn.Module):
 class DetectionModel(BaseModel):
     """YOLOv5 detection model class for object detection tasks, supporting custom configurations and anchors."""
 
+    tta_threads = 3  # concurrent test-time augmentation passes, 1 runs them one after another
+
     def __init__(self, cfg="yolov5s.yaml", ch=3, nc=None, anchors=None):
         """Initializes YOLOv5 model with configuration file, input channels, number of classes, and custom anchors."""
         super().__init__()
@@ -265,22 +368,39 @@ class DetectionModel(BaseModel):
 
     def forward(self, x, augment=False, profile=False, visualize=False):
         """Performs single-scale or augmented inference and may include profiling or visualization."""
+        x = self._input(x)
         if augment:
             return self._forward_augment(x)  # augmented inference, None
         return self._forward_once(x, profile, visualize)  # single-scale inference, train
 
     def _forward_augment(self, x):
         """Performs augmented inference across different scales and flips, returning combined detections."""
+        with decode_threshold(None):  # _clip_augmented needs the dense layout, TTA pool threads default to it
+            return self._forward_augment_dense(x)
+
+    def _forward_augment_dense(self, x):
+        """
+        Runs the scaled and flipped passes of `_forward_augment` and merges their dense predictions.
+
+        With `tta_threads` > 1 the passes run concurrently on a shared thread pool, each de-scaled as it finishes; the
+        merged output is the same as running them one after another. The passes keep their own input shapes, as padding
+        them into one batch would change the predictions.
+        """
         img_size = x.shape[-2:]  # height, width
         s = [1, 0.83, 0.67]  # scales
         f = [None, 3, None]  # flips (2-ud, 3-lr)
-        y = []  # outputs
-        for si, fi in zip(s, f):
-            xi = scale_img(x.flip(fi) if fi else x, si, gs=int(self.stride.max()))
+        pad = 0.447 * 255 if getattr(self, "input_scale_folded", False) else 0.447  # imagenet mean, in input units
+
+        def forward(si, fi):
+            xi = scale_img(x.flip(fi) if fi else x, si, gs=int(self.stride.max()), value=pad)
             yi = self._forward_once(xi)[0]  # forward
             # cv2.imwrite(f'img_{si}.jpg', 255 * xi[0].cpu().numpy().transpose((1, 2, 0))[:, :, ::-1])  # save
-            yi = self._descale_pred(yi, fi, si, img_size)
-            y.append(yi)
+            return self._descale_pred(yi, fi, si, img_size)
+
+        if self.tta_threads > 1:
+            y = list(_tta_pool(self.tta_threads).map(_in_caller_modes(forward), s, f))
+        else:
+            y = [forward(si, fi) for si, fi in zip(s, f)]  # outputs
         y = self._clip_augmented(y)  # clip augmented tails
         return torch.cat(y, 1), None  # augmented inference, train
 
@@ -309,7 +429,7 @@ class DetectionModel(BaseModel):
         g = sum(4**x for x in range(nl))  # grid points
         e = 1  # exclude layer count
         i = (y[0].shape[1] // g) * sum(4**x for x in range(e))  # indices
-        y[0] = y[0][:, :-i]  # large
+        y[0] = y[0][:, : y[0].shape[1] - i]  # large, not [:, :-i] which empties it when i == 0
         i = (y[-1].shape[1] // g) * sum(4 ** (nl - 1 - x) for x in range(e))  # indices
         y[-1] = y[-1][:, i:]  # small
         return y
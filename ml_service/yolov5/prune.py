@@ -0,0 +1,159 @@
+# Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
+"""
+Structured channel pruning of a YOLOv5 detection model, with an optional fine-tune and a before/after report.
+
+Channels are ranked by BatchNorm gamma and removed from the Conv, C3, SPPF and Detect layers that produce and consume
+them (see utils/channel_prune.py), so parameters, GFLOPs and latency all drop. Train with `--bn-sparsity` first for a
+sharper ranking, then prune and fine-tune the pruned checkpoint with train.py.
+
+Usage:
+    $ python train.py --weights yolov5s.pt --data coco128.yaml --epochs 100 --bn-sparsity 1e-4  # sparsity training
+    $ python prune.py --weights runs/train/exp/weights/best.pt --data coco128.yaml --ratio 0.3 --epochs 30
+    $ python train.py --weights runs/prune/exp/pruned.pt --data coco128.yaml --epochs 30  # or fine-tune separately
+"""
+
+import argparse
+import os
+import sys
+from copy import deepcopy
+from pathlib import Path
+
+import torch
+
+FILE = Path(__file__).resolve()
+ROOT = FILE.parents[0]  # YOLOv5 root directory
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))  # add ROOT to PATH
+ROOT = Path(os.path.relpath(ROOT, Path.cwd()))  # relative
+
+import train
+import val
+from models.experimental import attempt_load
+from utils.channel_prune import prune_channels
+from utils.general import LOGGER, check_yaml, colorstr, increment_path, print_args
+from utils.torch_utils import select_device, time_sync
+
+
+def measure(weights, data, imgsz=640, batch_size=32, device="", runs=50, save_dir=Path("")):
+    """Returns (parameters, GFLOPs, batch-1 latency ms, mAP50, mAP50-95) of a checkpoint; mAPs are None without data."""
+    device = select_device(device)
+    model = attempt_load(weights, device=device, fuse=True)  # latency as deployed, Conv+BN fused
+    n_p, _, gflops = model.info(img_size=imgsz)
+    im = torch.zeros(1, 3, imgsz, imgsz, device=device)
+    with torch.inference_mode():
+        for _ in range(3):
+            model(im)  # warmup
+        t = time_sync()
+        for _ in range(runs):
+            model(im)
+        latency = (time_sync() - t) / runs * 1e3
+    map50 = map = None
+    if data:
+        (_, _, map50, map, *_), _, _ = val.run(
+            data, weights, batch_size, imgsz, device=device, plots=False, project=save_dir, name="val"
+        )
+    return n_p, gflops, latency, map50, map
+
+
+def run(
+    weights=ROOT / "yolov5s.pt",  # weights path, trained with BatchNorm (ideally --bn-sparsity)
+    data="",  # dataset.yaml path, for mAP and fine-tuning
+    ratio=0.3,  # fraction of prunable channels to remove
+    divisor=8,  # keep a multiple of this many channels per group
+    imgsz=640,  # inference size (pixels)
+    batch_size=32,  # validation and fine-tune batch size
+    device="",  # cuda device, i.e. 0 or 0,1,2,3 or cpu
+    epochs=0,  # fine-tune epochs with train.py after pruning, 0 to skip
+    hyp=ROOT / "data/hyps/hyp.scratch-low.yaml",  # fine-tune hyperparameters path
+    project=ROOT / "runs/prune",  # save to project/name
+    name="exp",  # save to project/name
+    exist_ok=False,  # existing project/name ok, do not increment
+):
+    """
+    Prunes `weights` by BN gamma, saves `pruned.pt`, optionally fine-tunes it, and logs a before/after table.
+
+    Args:
+        weights (str | Path): Checkpoint to prune; it must contain the unfused training model.
+        data (str | Path): Dataset YAML for validation and fine-tuning; without it mAP is not reported.
+        ratio (float): Fraction of prunable channels to remove, using one global gamma threshold.
+        divisor (int): Each channel group keeps a multiple of this many channels.
+        imgsz (int): Inference size in pixels for GFLOPs, latency and validation.
+        batch_size (int): Validation and fine-tune batch size.
+        device (str): CUDA device, e.g. '0' or 'cpu'.
+        epochs (int): Fine-tune epochs with train.py after pruning, 0 to skip.
+        hyp (str | Path): Fine-tune hyperparameters YAML.
+        project (str | Path): Directory to save results under.
+        name (str): Run name under `project`.
+        exist_ok (bool): Reuse an existing project/name directory.
+
+    Returns:
+        (Path): The pruned checkpoint, or the fine-tuned best.pt when `epochs` > 0.
+    """
+    save_dir = increment_path(Path(project) / name, exist_ok=exist_ok)
+    save_dir.mkdir(parents=True, exist_ok=True)
+    data = check_yaml(data) if data else ""
+    rows = [("original", *measure(weights, data, imgsz, batch_size, device, save_dir=save_dir))]
+
+    model = attempt_load(weights, device="cpu", fuse=False)  # keep BatchNorm, gammas rank the channels
+    prune_channels(model, ratio, divisor)
+    f = save_dir / "pruned.pt"
+    torch.save({"epoch": -1, "model": deepcopy(model).half(), "ema": None, "pruning": {"ratio": ratio}}, f)
+    LOGGER.info(f"{colorstr('Pruned:')} saved {f}")
+    rows.append(("pruned", *measure(f, data, imgsz, batch_size, device, save_dir=save_dir)))
+
+    if epochs:
+        assert data, "fine-tuning requires --data"
+        opt = train.run(
+            weights=str(f),
+            data=data,
+            hyp=str(hyp),
+            epochs=epochs,
+            batch_size=batch_size,
+            imgsz=imgsz,
+            device=device,
+            project=str(save_dir),
+            name="finetune",
+        )
+        f = Path(opt.save_dir) / "weights" / "best.pt"
+        rows.append(("fine-tuned", *measure(f, data, imgsz, batch_size, device, save_dir=save_dir)))
+
+    def fmt(x, spec):
+        return "-" if x is None else format(x, spec)
+
+    LOGGER.info(f"\n{'model':<12} {'params (M)':>11} {'GFLOPs':>8} {'latency ms':>11} {'mAP50':>7} {'mAP50-95':>9}")
+    for stage, n_p, gflops, latency, map50, map in rows:
+        LOGGER.info(
+            f"{stage:<12} {n_p / 1e6:>11.2f} {fmt(gflops, '>8.1f')} {latency:>11.2f} "
+            f"{fmt(map50, '>7.3f')} {fmt(map, '>9.3f')}"
+        )
+    return f
+
+
+def parse_opt():
+    """Parses command-line options for channel pruning."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights", type=str, default=ROOT / "yolov5s.pt", help="weights path")
+    parser.add_argument("--data", type=str, default="", help="dataset.yaml path, for mAP and fine-tuning")
+    parser.add_argument("--ratio", type=float, default=0.3, help="fraction of prunable channels to remove")
+    parser.add_argument("--divisor", type=int, default=8, help="keep a multiple of this many channels per group")
+    parser.add_argument("--imgsz", "--img", "--img-size", type=int, default=640, help="inference size (pixels)")
+    parser.add_argument("--batch-size", type=int, default=32, help="validation and fine-tune batch size")
+    parser.add_argument("--device", default="", help="cuda device, i.e. 0 or 0,1,2,3 or cpu")
+    parser.add_argument("--epochs", type=int, default=0, help="fine-tune epochs after pruning, 0 to skip")
+    parser.add_argument("--hyp", type=str, default=ROOT / "data/hyps/hyp.scratch-low.yaml", help="fine-tune hyps")
+    parser.add_argument("--project", default=ROOT / "runs/prune", help="save to project/name")
+    parser.add_argument("--name", default="exp", help="save to project/name")
+    parser.add_argument("--exist-ok", action="store_true", help="existing project/name ok, do not increment")
+    opt = parser.parse_args()
+    print_args(vars(opt))
+    return opt
+
+
+def main(opt):
+    """Runs channel pruning with the parsed options."""
+    run(**vars(opt))
+
+
+if __name__ == "__main__":
+    opt = parse_opt()
+    main(opt)
@@ -15,6 +15,7 @@ Tutorial:   https://docs.ultralytics.com/yolov5/tutorials/train_custom_data
 """
 
 import argparse
+import contextlib
 import math
 import os
 import random
@@ -53,6 +54,7 @@ from utils.autoanchor import check_anchors
 from utils.autobatch import check_train_batch_size
 from utils.callbacks import Callbacks
 from utils.dataloaders import create_dataloader
+from utils.distill import Teacher, augmentations
 from utils.downloads import attempt_download, is_url
 from utils.general import (
     LOGGER,
@@ -215,12 +217,18 @@ def train(hyp, opt, device, callbacks):
         with torch_distributed_zero_first(LOCAL_RANK):
             weights = attempt_download(weights)  # download if not found locally
         ckpt = torch_load(weights, map_location="cpu")  # load checkpoint to CPU to avoid CUDA memory leak
-        model = Model(cfg or ckpt["model"].yaml, ch=3, nc=nc, anchors=hyp.get("anchors")).to(device)  # create
-        exclude = ["anchor"] if (cfg or hyp.get("anchors")) and not resume else []  # exclude keys
-        csd = ckpt["model"].float().state_dict()  # checkpoint state_dict as FP32
-        csd = intersect_dicts(csd, model.state_dict(), exclude=exclude)  # intersect
-        model.load_state_dict(csd, strict=False)  # load
-        LOGGER.info(f"Transferred {len(csd)}/{len(model.state_dict())} items from {weights}")  # report
+        if getattr(ckpt["model"], "pruned", False):  # prune.py output, its layer widths no longer match the yaml
+            assert not cfg, "--cfg can not be combined with channel-pruned --weights"
+            assert ckpt["model"].nc == nc, f"pruned model has {ckpt['model'].nc} classes, dataset has {nc}"
+            model = deepcopy(ckpt["model"]).float().to(device)  # train the pruned module as is
+            LOGGER.info(f"Loaded channel-pruned model from {weights}")
+        else:
+            model = Model(cfg or ckpt["model"].yaml, ch=3, nc=nc, anchors=hyp.get("anchors")).to(device)  # create
+            exclude = ["anchor"] if (cfg or hyp.get("anchors")) and not resume else []  # exclude keys
+            csd = ckpt["model"].float().state_dict()  # checkpoint state_dict as FP32
+            csd = intersect_dicts(csd, model.state_dict(), exclude=exclude)  # intersect
+            model.load_state_dict(csd, strict=False)  # load
+            LOGGER.info(f"Transferred {len(csd)}/{len(model.state_dict())} items from {weights}")  # report
     else:
         model = Model(cfg, ch=3, nc=nc, anchors=hyp.get("anchors")).to(device)  # create
     amp = check_amp(model)  # check AMP
@@ -340,6 +348,7 @@ def train(hyp, opt, device, callbacks):
     hyp["cls"] *= nc / 80 * 3 / nl  # scale to classes and layers
     hyp["obj"] *= (imgsz / 640) ** 2 * 3 / nl  # scale to image size and layers
     hyp["label_smoothing"] = opt.label_smoothing
+    hyp["distill"], hyp["distill_t"], hyp["distill_feat"] = opt.distill, opt.distill_t, opt.distill_feat
     model.nc = nc  # attach number of classes to model
     model.hyp = hyp  # attach hyperparameters to model
     model.class_weights = labels_to_class_weights(dataset.labels, nc).to(device) * nc  # attach class weights
@@ -357,6 +366,11 @@ def train(hyp, opt, device, callbacks):
     scaler = torch.cuda.amp.GradScaler(enabled=amp)
     stopper, stop = EarlyStopping(patience=opt.patience), False
     compute_loss = ComputeLoss(model)  # init loss class
+    teacher = None
+    if opt.teacher:
+        augment = augmentations(hyp, opt.rect)  # the teacher cache only pays off without them
+        teacher = Teacher(opt.teacher, model, device, opt.distill_feat > 0, opt.teacher_cache, augment)
+    feat = teacher is not None and teacher.features  # attention-map loss, logged after the hard losses
     callbacks.run("on_train_start")
     LOGGER.info(
         f"Image sizes {imgsz} train, {imgsz} val\n"
@@ -378,17 +392,19 @@ def train(hyp, opt, device, callbacks):
         # b = int(random.uniform(0.25 * imgsz, 0.75 * imgsz + gs) // gs * gs)
         # dataset.mosaic_border = [b - imgsz, -b]  # height, width borders
 
-        mloss = torch.zeros(3, device=device)  # mean losses
+        mloss = torch.zeros(4 if feat else 3, device=device)  # mean losses
         if RANK != -1:
             train_loader.sampler.set_epoch(epoch)
         pbar = enumerate(train_loader)
-        LOGGER.info(("\n" + "%11s" * 7) % ("Epoch", "GPU_mem", "box_loss", "obj_loss", "cls_loss", "Instances", "Size"))
+        losses = ("box_loss", "obj_loss", "cls_loss") + (("feat_loss",) if feat else ())
+        LOGGER.info(("\n" + "%11s" * (4 + len(losses))) % ("Epoch", "GPU_mem", *losses, "Instances", "Size"))
         if RANK in {-1, 0}:
             pbar = tqdm(pbar, total=nb, bar_format=TQDM_BAR_FORMAT)  # progress bar
         optimizer.zero_grad()
         for i, (imgs, targets, paths, _) in pbar:  # batch -------------------------------------------------------------
             callbacks.run("on_train_batch_start")
             ni = i + nb * epoch  # number integrated batches (since train start)
+            keys = Teacher.keys(imgs) if teacher and teacher.cache else None  # hash the uint8 batch
             imgs = imgs.to(device, non_blocking=True).float() / 255  # uint8 to float32, 0-255 to 0.0-1.0
 
             # Warmup
@@ -412,8 +428,10 @@ def train(hyp, opt, device, callbacks):
 
             # Forward
             with torch.cuda.amp.autocast(amp):
-                pred = model(imgs)  # forward
-                loss, loss_items = compute_loss(pred, targets.to(device))  # loss scaled by batch_size
+                with teacher.watch(model) if teacher else contextlib.nullcontext():
+                    pred = model(imgs)  # forward
+                soft = teacher(imgs, keys) if teacher else None  # distillation targets
+                loss, loss_items = compute_loss(pred, targets.to(device), soft)  # loss scaled by batch_size
                 if RANK != -1:
                     loss *= WORLD_SIZE  # gradient averaged between devices in DDP mode
                 if opt.quad:
@@ -425,6 +443,10 @@ def train(hyp, opt, device, callbacks):
             # Optimize - https://pytorch.org/docs/master/notes/amp_examples.html
             if ni - last_opt_step >= accumulate:
                 scaler.unscale_(optimizer)  # unscale gradients
+                if opt.bn_sparsity:  # L1 on BatchNorm gammas (network slimming), ranks channels for prune.py
+                    for m in model.modules():
+                        if isinstance(m, nn.BatchNorm2d) and m.weight.grad is not None:
+                            m.weight.grad.add_(torch.sign(m.weight.detach()), alpha=opt.bn_sparsity)
                 torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=10.0)  # clip gradients
                 scaler.step(optimizer)  # optimizer.step
                 scaler.update()
@@ -438,7 +460,7 @@ def train(hyp, opt, device, callbacks):
                 mloss = (mloss * i + loss_items) / (i + 1)  # update mean losses
                 mem = f"{torch.cuda.memory_reserved() / 1e9 if torch.cuda.is_available() else 0:.3g}G"  # (GB)
                 pbar.set_description(
-                    ("%11s" * 2 + "%11.4g" * 5)
+                    ("%11s" * 2 + "%11.4g" * (2 + len(mloss)))
                     % (f"{epoch}/{epochs - 1}", mem, *mloss, targets.shape[0], imgs.shape[-1])
                 )
                 callbacks.run("on_train_batch_end", model, ni, imgs, targets, paths, list(mloss))
@@ -449,6 +471,8 @@ def train(hyp, opt, device, callbacks):
         # Scheduler
         lr = [x["lr"] for x in optimizer.param_groups]  # for loggers
         scheduler.step()
+        if teacher:
+            teacher.log_cache()
 
         if RANK in {-1, 0}:
             # mAP
@@ -475,7 +499,7 @@ def train(hyp, opt, device, callbacks):
             stop = stopper(epoch=epoch, fitness=fi)  # early stop check
             if fi > best_fitness:
                 best_fitness = fi
-            log_vals = list(mloss) + list(results) + lr
+            log_vals = list(mloss[:3]) + list(results) + lr + list(mloss[3:])  # feat_loss last, see Loggers.keys
             callbacks.run("on_fit_epoch_end", log_vals, epoch, best_fitness, fi)
 
             # Save model
@@ -535,7 +559,8 @@ def train(hyp, opt, device, callbacks):
                         compute_loss=compute_loss,
                     )  # val best model with plots
                     if is_coco:
-                        callbacks.run("on_fit_epoch_end", list(mloss) + list(results) + lr, epoch, best_fitness, fi)
+                        log_vals = list(mloss[:3]) + list(results) + lr + list(mloss[3:])
+                        callbacks.run("on_fit_epoch_end", log_vals, epoch, best_fitness, fi)
 
         callbacks.run("on_train_end", last, best, epoch, results)
 
@@ -603,6 +628,12 @@ def parse_opt(known=False):
     parser.add_argument("--freeze", nargs="+", type=int, default=[0], help="Freeze layers: backbone=10, first3=0 1 2")
     parser.add_argument("--save-period", type=int, default=-1, help="Save checkpoint every x epochs (disabled if < 1)")
     parser.add_argument("--seed", type=int, default=0, help="Global training seed")
+    parser.add_argument("--bn-sparsity", type=float, default=0.0, help="L1 penalty on BN gammas, for prune.py")
+    parser.add_argument("--teacher", type=str, default="", help="teacher weights for knowledge distillation")
+    parser.add_argument("--distill", type=float, default=1.0, help="distillation loss gain, with --teacher")
+    parser.add_argument("--distill-t", type=float, default=1.0, help="distillation temperature")
+    parser.add_argument("--distill-feat", type=float, default=0.0, help="attention-map distillation gain, 0 to skip")
+    parser.add_argument("--teacher-cache", type=str, default="", help="directory caching teacher outputs per image")
     parser.add_argument("--local_rank", type=int, default=-1, help="Automatic DDP Multi-GPU argument, do not modify")
 
     # Logger arguments
@@ -960,6 +991,17 @@ def run(**kwargs):
         freeze (list, optional): Layers to freeze, e.g., backbone=10, first 3 layers = [0, 1, 2]. Defaults to [0].
         save_period (int, optional): Frequency in epochs to save checkpoints. Disabled if < 1. Defaults to -1.
         seed (int, optional): Global training random seed. Defaults to 0.
+        bn_sparsity (float, optional): L1 penalty on BatchNorm gammas that pushes unimportant channels towards zero
+            before pruning with prune.py. Defaults to 0.0.
+        teacher (str, optional): Teacher weights whose soft objectness and class targets are distilled into the trained
+            model. Its Detect head must match (layers, anchors per layer, classes, strides). Defaults to ''.
+        distill (float, optional): Gain of the distillation loss relative to the hard objectness and class losses.
+            Defaults to 1.0.
+        distill_t (float, optional): Distillation temperature applied to both models' logits. Defaults to 1.0.
+        distill_feat (float, optional): Gain of the attention-map loss on the Detect inputs, 0 to skip. Defaults to
+            0.0.
+        teacher_cache (str, optional): Directory caching teacher outputs per image and input size; entries repeat only
+            for identical inputs, so it is disabled when the hyperparameters augment. Defaults to ''.
         local_rank (int, optional): Automatic DDP Multi-GPU argument. Do not modify. Defaults to -1.
 
     Returns:
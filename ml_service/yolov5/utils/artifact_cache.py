@@ -0,0 +1,166 @@
+# Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
+"""
+On-disk cache of fused, traced and exported model artifacts.
+
+Usage:
+    from utils.artifact_cache import ArtifactCache
+
+    path = ArtifactCache("artifacts").get("yolov5s.pt", "onnx", imgsz=640)  # built on first use, reused afterwards
+    model = DetectMultiBackend(path)
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import torch
+
+from utils.general import LOGGER, check_img_size, colorstr, file_size
+from utils.torch_utils import select_device
+
+CACHE_FORMAT = 1  # bump when the way artifacts are built changes
+BACKENDS = {  # backend: (artifact suffix, libraries whose versions invalidate the artifact)
+    "fused": (".pt", ("torch",)),
+    "torchscript": (".torchscript", ("torch",)),
+    "onnx": (".onnx", ("torch", "onnx")),
+    "ort": (".onnx", ("torch", "onnx", "onnxruntime")),
+}
+
+
+def file_hash(path, chunk=1 << 20):
+    """Returns the SHA-256 hex digest of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(chunk):
+            h.update(block)
+    return h.hexdigest()
+
+
+def library_versions(names):
+    """Returns {name: version} for the given libraries, 'missing' for those that are not installed."""
+    versions = {}
+    for name in names:
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            versions[name] = "missing"
+    return versions
+
+
+class ArtifactCache:
+    """
+    Directory of ready-to-load model artifacts keyed by weights hash, input size, backend, device and library versions.
+
+    Backends:
+        fused        Conv+BN fused PyTorch checkpoint; loads through the normal *.pt path without re-fusing
+        torchscript  traced with `export_torchscript` (dynamic Detect grids, so any stride-multiple input size works)
+        onnx         exported with `export_onnx` using dynamic axes
+        ort          the ONNX export after ONNX Runtime's extended graph optimizations, saved so they run only once
+
+    Artifacts are written to a temporary name and renamed into place, so concurrent builders never expose a partial
+    file. Each artifact has a JSON sidecar describing what it was built from.
+    """
+
+    def __init__(self, root="artifacts"):
+        """Initializes the cache in directory `root`, creating it if needed."""
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def key(self, weights, backend, imgsz=640, device="cpu", half=False):
+        """Returns the manifest identifying an artifact; its hash names the artifact file."""
+        assert backend in BACKENDS, f"Unknown artifact backend '{backend}', choose from {list(BACKENDS)}"
+        imgsz = [imgsz] * 2 if isinstance(imgsz, int) else list(imgsz)
+        return {
+            "format": CACHE_FORMAT,
+            "weights": Path(weights).name,
+            "sha256": file_hash(weights),
+            "backend": backend,
+            "imgsz": imgsz,
+            "device": select_device(device).type,
+            "half": half,
+            "versions": library_versions(BACKENDS[backend][1]),
+        }
+
+    def path(self, manifest):
+        """Returns the artifact path for a manifest from `key()`."""
+        digest = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:16]
+        backend = manifest["backend"]
+        return self.root / f"{Path(manifest['weights']).stem}-{backend}-{digest}{BACKENDS[backend][0]}"
+
+    def get(self, weights, backend, imgsz=640, device="cpu", half=False):
+        """Returns the path of a ready artifact for `weights`, building it first on a cache miss."""
+        manifest = self.key(weights, backend, imgsz, device, half)
+        f = self.path(manifest)
+        prefix = colorstr("Artifact cache:")
+        if f.exists():
+            LOGGER.info(f"{prefix} hit {f} ({file_size(f):.1f} MB)")
+            return f
+        LOGGER.info(f"{prefix} miss, building {backend} artifact for {weights}...")
+        t = time.perf_counter()
+        tmp = f.with_name(f"{f.stem}.partial{os.getpid()}{f.suffix}")
+        try:
+            self._build(weights, backend, manifest["imgsz"], device, half, tmp)
+            os.replace(tmp, f)
+        finally:
+            tmp.unlink(missing_ok=True)
+        manifest["build_seconds"] = round(time.perf_counter() - t, 2)
+        manifest["created"] = time.time()
+        f.with_suffix(".json").write_text(json.dumps(manifest, indent=2))
+        LOGGER.info(f"{prefix} built {f} in {manifest['build_seconds']:.1f}s ({file_size(f):.1f} MB)")
+        return f
+
+    @staticmethod
+    def _build(weights, backend, imgsz, device, half, file):
+        """Writes the `backend` artifact of `weights` to `file`."""
+        from export import export_onnx, export_torchscript  # scoped, export.py is only needed on a cache miss
+        from models.experimental import attempt_load
+        from models.yolo import Detect
+
+        device = select_device(device)
+        assert not (half and device.type == "cpu"), "half-precision artifacts require a CUDA device"
+        assert not (half and backend in ("onnx", "ort")), "ONNX artifacts use dynamic axes, which exclude half"
+        model = attempt_load(weights, device=device, inplace=True, fuse=True)  # FP32, Conv+BN fused
+        if backend == "fused":
+            torch.save({"model": model.half() if half else model}, file)
+            return
+
+        gs = int(max(model.stride))  # grid size (max stride)
+        im = torch.zeros(1, 3, *[check_img_size(x, gs) for x in imgsz]).to(device)
+        model.eval()
+        for m in model.modules():
+            if isinstance(m, Detect):
+                m.inplace = False
+                m.dynamic = True  # rebuild grids from the input shape so one artifact serves every AutoShape size
+                m.export = True
+        for _ in range(2):
+            model(im)  # dry runs
+        if half:
+            im, model = im.half(), model.half()
+
+        if backend == "torchscript":
+            f, _ = export_torchscript(model, im, file, optimize=False)
+        else:
+            f, _ = export_onnx(model, im, file, opset=12, dynamic=True, simplify=False)
+        assert f, f"{backend} export of {weights} failed"
+        if backend == "ort":
+            optimize_onnx(file)
+
+
+def optimize_onnx(file):
+    """Replaces an ONNX file with ONNX Runtime's optimized graph, keeping the YOLOv5 metadata (stride, names)."""
+    import onnx
+    import onnxruntime
+
+    optimized = file.with_name(f"{file.stem}.optimized{file.suffix}")
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    options.optimized_model_filepath = str(optimized)
+    onnxruntime.InferenceSession(str(file), options, providers=["CPUExecutionProvider"])  # writes `optimized`
+
+    model = onnx.load(optimized)
+    del model.metadata_props[:]
+    model.metadata_props.extend(onnx.load(file).metadata_props)
+    onnx.save(model, file)
+    optimized.unlink()
@@ -0,0 +1,197 @@
+# Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
+"""
+Structured channel pruning of YOLOv5 detection models.
+
+Channels are ranked by the magnitude of their BatchNorm scale (gamma) and physically removed from the convolutions that
+produce and consume them, so the pruned model runs narrower dense convolutions. Channels that must stay aligned are
+pruned together: the residual stream of a C3 block (its cv1 and every shortcut Bottleneck), the four SPPF pooling
+branches, and layer outputs that reach several consumers through Upsample and Concat. Train with
+`train.py --bn-sparsity` first so that unimportant channels have near-zero gammas.
+
+Usage:
+    from utils.channel_prune import prune_channels
+
+    summary = prune_channels(model, ratio=0.3)  # DetectionModel with BatchNorm, i.e. not fused
+"""
+
+import torch
+from torch import nn
+
+from models.common import C3, SPPF, Bottleneck, Concat, Conv
+from models.yolo import Detect
+from utils.general import LOGGER, make_divisible
+
+
+class ChannelGroup:
+    """Channels pruned together: the outputs of `producers` (Conv with BN) and the matching consumer inputs."""
+
+    def __init__(self, n, producers=(), prunable=True):
+        """Initializes a group of `n` channels; groups without producers (e.g. the image) are never pruned."""
+        self.n = n
+        self.producers = list(producers)
+        self.consumers = []  # (Conv or nn.Conv2d, input channel offset, producers summed into what it reads)
+        self.prunable = prunable and bool(self.producers)
+        self.keep = None  # bool mask over the n channels, set by prune_channels()
+
+    def scores(self):
+        """Returns each channel's mean |gamma| over the producers."""
+        return torch.stack([m.bn.weight.detach().abs().float() for m in self.producers]).mean(0)
+
+
+def _plain(*modules):
+    """True if every module is an unfused, ungrouped Conv whose channels can be sliced."""
+    return all(isinstance(m, Conv) and hasattr(m, "bn") and m.conv.groups == 1 for m in modules)
+
+
+def _layer_channels(model):
+    """Returns the output channel count of each top-level layer, from one forward pass on a small input."""
+    channels = []
+    hooks = [
+        m.register_forward_hook(lambda m, x, y: channels.append(y.shape[1] if isinstance(y, torch.Tensor) else 0))
+        for m in model.model
+    ]
+    p, s, training = next(model.parameters()), 2 * int(model.stride.max()), model.training
+    try:
+        with torch.no_grad():
+            model.eval()  # keep the BN running statistics
+            model._forward_once(torch.zeros(1, model.yaml.get("ch", 3), s, s, device=p.device, dtype=p.dtype))
+    finally:
+        model.train(training)
+        for h in hooks:
+            h.remove()
+    return channels
+
+
+def channel_groups(model):
+    """Traces a DetectionModel's layers into ChannelGroups; channels of layers it does not understand stay fixed."""
+    groups, spaces = [], []  # spaces: per layer, its output channels as a list of groups
+    channels = _layer_channels(model)
+
+    def group(n, producers=(), prunable=True):
+        groups.append(ChannelGroup(n, producers, prunable))
+        return groups[-1]
+
+    def consume(target, space, sources=None):
+        offset = 0
+        for g in space:
+            g.consumers.append((target, offset, tuple(g.producers if sources is None else sources)))
+            offset += g.n
+
+    image = [group(model.yaml.get("ch", 3), prunable=False)]
+    for i, m in enumerate(model.model):
+        x = (spaces[m.f] if spaces else image) if isinstance(m.f, int) else [spaces[j] for j in m.f]
+        if isinstance(m, Conv) and _plain(m):
+            consume(m, x)
+            out = [group(m.conv.out_channels, [m])]
+        elif (
+            isinstance(m, C3)
+            and all(type(b) is Bottleneck for b in m.m)
+            and _plain(m.cv1, m.cv2, m.cv3, *[c for b in m.m for c in (b.cv1, b.cv2)])
+        ):
+            consume(m.cv1, x)
+            consume(m.cv2, x)
+            stream = group(m.cv1.conv.out_channels, [m.cv1])  # residual stream through the bottlenecks
+            for b in m.m:
+                consume(b.cv1, [stream], stream.producers)  # reads the sum of the producers so far
+                consume(b.cv2, [group(b.cv1.conv.out_channels, [b.cv1])])
+                if b.add:
+                    stream.producers.append(b.cv2)
+                else:
+                    stream = group(b.cv2.conv.out_channels, [b.cv2])
+            consume(m.cv3, [stream, group(m.cv2.conv.out_channels, [m.cv2])])
+            out = [group(m.cv3.conv.out_channels, [m.cv3])]
+        elif isinstance(m, SPPF) and _plain(m.cv1, m.cv2):
+            consume(m.cv1, x)
+            consume(m.cv2, [group(m.cv1.conv.out_channels, [m.cv1])] * 4)  # x and its three poolings
+            out = [group(m.cv2.conv.out_channels, [m.cv2])]
+        elif isinstance(m, nn.Upsample):
+            out = x
+        elif isinstance(m, Concat) and m.d == 1:
+            out = [g for space in x for g in space]
+        elif type(m) is Detect:
+            for conv, space in zip(m.m, x):
+                consume(conv, space)
+            out = []
+        else:  # keep the inputs and outputs of anything else intact
+            for space in [x] if isinstance(m.f, int) else x:
+                for g in space:
+                    g.prunable = False
+            out = [group(channels[i], prunable=False)]
+            LOGGER.info(f"Channel pruning: layer {i} {m.type} is not pruned")
+        spaces.append(out)
+    return groups
+
+
+def _slice_conv(conv, keep_out=None, keep_in=None):
+    """Removes the output and input channels of an nn.Conv2d outside the `keep_out` and `keep_in` masks."""
+    w = conv.weight.detach()
+    if keep_out is not None:
+        w = w[keep_out]
+        if conv.bias is not None:
+            conv.bias = nn.Parameter(conv.bias.detach()[keep_out].clone())
+        conv.out_channels = w.shape[0]
+    if keep_in is not None:
+        w = w[:, keep_in]
+        conv.in_channels = w.shape[1]
+    conv.weight = nn.Parameter(w.clone())
+
+
+def _slice_bn(bn, keep):
+    """Removes the channels of a BatchNorm2d outside the `keep` mask."""
+    bn.weight = nn.Parameter(bn.weight.detach()[keep].clone())
+    bn.bias = nn.Parameter(bn.bias.detach()[keep].clone())
+    bn.running_mean = bn.running_mean[keep].clone()
+    bn.running_var = bn.running_var[keep].clone()
+    bn.num_features = int(keep.sum())
+
+
+def prune_channels(model, ratio=0.3, divisor=8, min_channels=8):
+    """
+    Prunes the lowest-|gamma| `ratio` of a DetectionModel's prunable channels in place.
+
+    The threshold is global, so layers whose gammas are mostly small lose more channels. Each group keeps at least
+    `min_channels` and a multiple of `divisor` channels, which suits vectorized kernels. A pruned channel outputs the
+    constant act(beta) when its gamma is ~0, so that constant is folded into the consumers' BN (or Detect bias) before
+    the channel is removed. The model must not be fused. Returns {'groups', 'channels', 'kept'} counts.
+    """
+    assert type(model.model[-1]) is Detect, "channel pruning supports detection models only"
+    groups = [g for g in channel_groups(model) if g.prunable]
+    assert groups, "no prunable channels, is the model fused?"
+    scores = [g.scores() for g in groups]
+    threshold = torch.cat(scores).quantile(ratio)
+    for g, s in zip(groups, scores):
+        n = min(g.n, max(make_divisible(int((s > threshold).sum()), divisor), min_channels))
+        g.keep = torch.zeros(g.n, dtype=torch.bool, device=s.device)
+        g.keep[s.topk(n).indices] = True
+
+    # Consumer input masks and the shift of the channels they lose, from the original weights
+    keep_in, shift = {}, {}
+    for g in groups:
+        for target, offset, sources in g.consumers:
+            conv = target.conv if isinstance(target, Conv) else target
+            mask = keep_in.setdefault(target, torch.ones(conv.in_channels, dtype=torch.bool, device=g.keep.device))
+            mask[offset : offset + g.n] = g.keep
+            pruned = ~g.keep
+            if pruned.any():
+                a = sum(m.act(m.bn.bias.detach()[pruned]) for m in sources)  # constant output of pruned channels
+                w = conv.weight.detach()[:, offset : offset + g.n][:, pruned].sum((2, 3))  # zero padding ignored
+                shift[target] = shift.get(target, 0) + w @ a
+
+    for target, mask in keep_in.items():
+        if isinstance(target, Conv):
+            _slice_conv(target.conv, keep_in=mask)
+            if target in shift:
+                target.bn.running_mean -= shift[target]
+        else:  # Detect output conv
+            _slice_conv(target, keep_in=mask)
+            if target in shift:
+                target.bias.data += shift[target]
+    for g in groups:
+        for m in g.producers:
+            _slice_conv(m.conv, keep_out=g.keep)
+            _slice_bn(m.bn, g.keep)
+
+    model.pruned = True  # widths no longer follow model.yaml, train.py keeps the module as is
+    n, kept = sum(g.n for g in groups), sum(int(g.keep.sum()) for g in groups)
+    LOGGER.info(f"Channel pruning: kept {kept}/{n} channels in {len(groups)} groups (gamma threshold {threshold:.3g})")
+    return {"groups": len(groups), "channels": n, "kept": kept}
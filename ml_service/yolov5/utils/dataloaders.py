@@ -11,7 +11,9 @@ import random
 import shutil
 import time
 from itertools import repeat
+from multiprocessing import get_context
 from multiprocessing.pool import Pool, ThreadPool
+from multiprocessing.shared_memory import SharedMemory
 from pathlib import Path
 from threading import Thread
 from urllib.parse import urlparse
@@ -55,6 +57,7 @@ from utils.general import (
     xywhn2xyxy,
     xyxy2xywhn,
 )
+from utils.numpy_ops import letterbox_into
 from utils.torch_utils import torch_distributed_zero_first
 
 # Parameters
@@ -430,6 +433,21 @@ class LoadImages:
         return self.nf  # number of files
 
 
+def resolve_stream_source(s):
+    """Resolves a stream source string to what `cv2.VideoCapture` accepts: YouTube page URLs to video URLs, '0' to 0."""
+    if urlparse(s).hostname in ("www.youtube.com", "youtube.com", "youtu.be"):  # if source is YouTube video
+        # YouTube format i.e. 'https://www.youtube.com/watch?v=Zgi9g1ksQHc' or 'https://youtu.be/LNwODJXcvt4'
+        check_requirements(("pafy", "youtube_dl==2020.12.2"))
+        import pafy
+
+        s = pafy.new(s).getbest(preftype="mp4").url  # YouTube URL
+    s = eval(s) if s.isnumeric() else s  # i.e. s = '0' local webcam
+    if s == 0:
+        assert not is_colab(), "--source 0 webcam unsupported on Colab. Rerun command in a local environment."
+        assert not is_kaggle(), "--source 0 webcam unsupported on Kaggle. Rerun command in a local environment."
+    return s
+
+
 class LoadStreams:
     """Loads and processes video streams for YOLOv5, supporting various sources including YouTube and IP cameras."""
 
@@ -449,16 +467,7 @@ class LoadStreams:
         for i, s in enumerate(sources):  # index, source
             # Start thread to read frames from video stream
             st = f"{i + 1}/{n}: {s}... "
-            if urlparse(s).hostname in ("www.youtube.com", "youtube.com", "youtu.be"):  # if source is YouTube video
-                # YouTube format i.e. 'https://www.youtube.com/watch?v=Zgi9g1ksQHc' or 'https://youtu.be/LNwODJXcvt4'
-                check_requirements(("pafy", "youtube_dl==2020.12.2"))
-                import pafy
-
-                s = pafy.new(s).getbest(preftype="mp4").url  # YouTube URL
-            s = eval(s) if s.isnumeric() else s  # i.e. s = '0' local webcam
-            if s == 0:
-                assert not is_colab(), "--source 0 webcam unsupported on Colab. Rerun command in a local environment."
-                assert not is_kaggle(), "--source 0 webcam unsupported on Kaggle. Rerun command in a local environment."
+            s = resolve_stream_source(s)
             cap = cv2.VideoCapture(s)
             assert cap.isOpened(), f"{st}Failed to open {s}"
             w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -526,6 +535,199 @@ class LoadStreams:
         return len(self.sources)  # 1E12 frames = 32 streams at 30 FPS for 30 years
 
 
+class SharedFrameRing:
+    """
+    Preallocated frames in shared memory, written by one capture process and read by one consumer.
+
+    Each slot holds a letterboxed CHW RGB frame ready for inference, the original HWC BGR frame and its capture time.
+    The writer never fills the most recently published slot nor the slot the reader holds, so with 3 or more slots the
+    arrays returned by `acquire()` stay valid, without copying, until the reader's next `acquire()`.
+    """
+
+    def __init__(self, shape, shape0, slots=3, name=None, lock=None, state=None):
+        """Creates a ring for frames of `shape` (letterboxed CHW) and `shape0` (original HWC), or attaches to `name`."""
+        assert slots >= 3, "SharedFrameRing needs at least 3 slots"
+        self.shape, self.shape0, self.slots = tuple(shape), tuple(shape0), slots
+        self.owner = name is None
+        n, n0 = slots * math.prod(self.shape), slots * math.prod(self.shape0)
+        self.shm = SharedMemory(name=name, create=self.owner, size=n + n0 + 8 * slots)
+        self.frames = np.ndarray((slots, *self.shape), np.uint8, self.shm.buf, 0)
+        self.frames0 = np.ndarray((slots, *self.shape0), np.uint8, self.shm.buf, n)
+        self.timestamps = np.ndarray(slots, np.float64, self.shm.buf, n + n0)
+        ctx = get_context("spawn")
+        self.lock = lock or ctx.Lock()
+        self.state = state or ctx.RawArray("q", [-1, -1, 0])  # latest published slot, slot held by reader, count
+
+    def __getstate__(self):
+        """Pickles only what a capture process needs to attach to the same shared memory."""
+        return dict(
+            shape=self.shape, shape0=self.shape0, slots=self.slots, name=self.shm.name, lock=self.lock, state=self.state
+        )
+
+    def __setstate__(self, state):
+        """Attaches to the shared memory of an unpickled ring."""
+        self.__init__(**state)
+
+    @property
+    def count(self):
+        """Number of frames published so far."""
+        return self.state[2]
+
+    def write_slot(self):
+        """Returns a slot the writer may fill: neither the latest published frame nor the one held by the reader."""
+        with self.lock:
+            busy = self.state[0], self.state[1]
+        return next(k for k in range(self.slots) if k not in busy)
+
+    def publish(self, k, timestamp):
+        """Makes slot `k` the latest frame."""
+        self.timestamps[k] = timestamp
+        with self.lock:
+            self.state[0] = k
+            self.state[2] += 1
+
+    def acquire(self):
+        """Holds the latest frame and returns (frame, frame0, timestamp, count) as views into shared memory."""
+        with self.lock:
+            k = self.state[1] = self.state[0]
+            count = self.state[2]
+        return self.frames[k], self.frames0[k], float(self.timestamps[k]), count
+
+    def close(self):
+        """Detaches from the shared memory, and frees it if this ring created it."""
+        self.frames = self.frames0 = self.timestamps = None
+        with contextlib.suppress(BufferError):  # views handed out by acquire() may still be alive
+            self.shm.close()
+        if self.owner:
+            with contextlib.suppress(FileNotFoundError):
+                self.shm.unlink()
+
+
+def capture_stream(source, ring, img_size, stride, auto, vid_stride, frames, stop):
+    """Decodes, letterboxes and publishes frames of one stream into `ring`; target of `LoadStreamsShared` processes."""
+    cv2.setNumThreads(1)  # one core per stream, parallelism comes from running one process per stream
+    cap = cv2.VideoCapture(source)
+    n, resized = 0, False
+    while cap.isOpened() and n < frames and not stop.is_set():
+        n += 1
+        cap.grab()  # .read() = .grab() followed by .retrieve()
+        if n % vid_stride == 0:
+            success, im = cap.retrieve()
+            if not success:
+                LOGGER.warning("WARNING ⚠️ Video stream unresponsive, please check your IP camera connection.")
+                im = np.zeros(ring.shape0, dtype=np.uint8)
+                cap.open(source)  # re-open stream if signal was lost
+            k = ring.write_slot()
+            if im.shape == ring.shape0:
+                ring.frames0[k] = im
+            else:  # resolution changed, e.g. the camera reconnected at another size; slots are sized for shape0
+                if not resized:
+                    LOGGER.warning(
+                        f"WARNING ⚠️ Stream {source} changed from {ring.shape0} to {im.shape}, "
+                        f"letterboxing its frames to the original size"
+                    )
+                    resized = True
+                im = letterbox_into(cv2.cvtColor(im, cv2.COLOR_GRAY2BGR) if im.ndim == 2 else im, ring.frames0[k])
+            ring.frames[k] = letterbox(im, img_size, stride=stride, auto=auto)[0][..., ::-1].transpose((2, 0, 1))
+            ring.publish(k, time.time())
+    cap.release()
+    ring.close()
+
+
+class LoadStreamsShared(LoadStreams):
+    """
+    Loads video streams like `LoadStreams`, but decodes each stream in its own process.
+
+    Every capture process letterboxes its frames into a `SharedFrameRing`, so decoding and resizing no longer compete
+    with inference for the GIL and the main process only gathers the latest frame of each stream.
+    """
+
+    def __init__(
+        self, sources="file.streams", img_size=640, stride=32, auto=True, transforms=None, vid_stride=1, slots=3
+    ):
+        """Opens each source to size its ring, then starts one capture process per stream and waits for first frames."""
+        torch.backends.cudnn.benchmark = True  # faster for fixed-size inference
+        self.mode = "stream"
+        self.img_size = img_size
+        self.stride = stride
+        self.vid_stride = vid_stride  # video frame-rate stride
+        sources = Path(sources).read_text().rsplit() if os.path.isfile(sources) else [sources]
+        n = len(sources)
+        self.sources = [clean_str(x) for x in sources]  # clean source names for later
+        self.fps, self.frames, self.shapes0 = [0] * n, [0] * n, [None] * n
+        resolved = []
+        for i, s in enumerate(sources):  # index, source
+            st = f"{i + 1}/{n}: {s}... "
+            s = resolve_stream_source(s)
+            cap = cv2.VideoCapture(s)
+            assert cap.isOpened(), f"{st}Failed to open {s}"
+            success, im = cap.read()
+            assert success, f"{st}Failed to read {s}"
+            fps = cap.get(cv2.CAP_PROP_FPS)  # warning: may return 0 or nan
+            self.frames[i] = max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 0) or float("inf")  # infinite stream fallback
+            self.fps[i] = max((fps if math.isfinite(fps) else 0) % 100, 0) or 30  # 30 FPS fallback
+            self.shapes0[i] = im.shape
+            cap.release()  # reopened by the capture process
+            resolved.append(s)
+            LOGGER.info(f"{st} Success ({self.frames[i]} frames {im.shape[1]}x{im.shape[0]} at {self.fps[i]:.2f} FPS)")
+
+        # check for common shapes, rings hold frames already letterboxed to the shared shape
+        s = np.stack(
+            [letterbox(np.zeros(x, np.uint8), img_size, stride=stride, auto=auto)[0].shape for x in self.shapes0]
+        )
+        self.rect = np.unique(s, axis=0).shape[0] == 1  # rect inference if all shapes equal
+        self.auto = auto and self.rect
+        self.transforms = transforms  # optional
+        if not self.rect:
+            LOGGER.warning("WARNING ⚠️ Stream shapes differ. For optimal performance supply similarly-shaped streams.")
+
+        ctx = get_context("spawn")
+        self.stop = ctx.Event()
+        self.rings, self.processes = [], []
+        for i, s in enumerate(resolved):
+            h, w = letterbox(np.zeros(self.shapes0[i], np.uint8), img_size, stride=stride, auto=self.auto)[0].shape[:2]
+            ring = SharedFrameRing((3, h, w), self.shapes0[i], slots)
+            args = (s, ring, img_size, stride, self.auto, vid_stride, self.frames[i], self.stop)
+            self.rings.append(ring)
+            self.processes.append(ctx.Process(target=capture_stream, args=args, daemon=True))
+            self.processes[i].start()
+        t = time.time()
+        while not all(r.count for r in self.rings):  # guarantee first frame
+            assert all(p.is_alive() for p in self.processes) and time.time() - t < 30, "Stream capture failed to start"
+            time.sleep(0.01)
+        self.timestamps, self.frame_counts = [0.0] * n, [0] * n
+        LOGGER.info("")  # newline
+
+    def __next__(self):
+        """Returns the latest frame of every stream; arrays are shared-memory views valid until the next call."""
+        self.count += 1
+        if not all(x.is_alive() for x in self.processes) or cv2.waitKey(1) == ord("q"):  # q to quit
+            self.close()
+            cv2.destroyAllWindows()
+            raise StopIteration
+
+        im, im0, self.timestamps, self.frame_counts = map(list, zip(*(r.acquire() for r in self.rings)))
+        if self.transforms:
+            im = np.stack([self.transforms(x) for x in im0])  # transforms
+        else:
+            im = im[0][None] if len(im) == 1 else np.stack(im)  # already letterboxed BCHW RGB
+
+        return self.sources, im, im0, None, ""
+
+    def close(self):
+        """Stops the capture processes and frees the shared memory."""
+        self.stop.set()
+        for p in self.processes:
+            p.join(timeout=5)
+        for r in self.rings:
+            r.close()
+
+    def __del__(self):
+        """Releases capture processes and shared memory when the loader is garbage collected."""
+        with contextlib.suppress(Exception):
+            self.close()
+
+
 def img2label_paths(img_paths):
     """Generates label file paths from corresponding image file paths by replacing `/images/` with `/labels/` and
     extension with `.txt`.
@@ -0,0 +1,178 @@
+# Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
+"""
+Knowledge distillation from a frozen YOLOv5 teacher.
+
+The teacher runs on the same augmented batch as the student and provides soft targets: its raw objectness and class
+logits at every anchor and, optionally, a spatial attention map of each Detect input. ComputeLoss turns them into
+distillation terms (see ComputeLoss.distill). Teacher outputs can be cached on disk per image, keyed by the image
+content and input size, so repeated epochs over identical inputs (training without augmentation) skip the teacher. The
+cache is turned off when the hyperparameters augment the batches, as no entry would ever be read back.
+
+Usage:
+    $ python train.py --weights yolov5n.pt --teacher yolov5s_waste.pt --data waste.yaml --epochs 100
+"""
+
+import contextlib
+import hashlib
+import os
+from pathlib import Path
+
+import torch
+import torch.nn.functional as F
+
+from models.experimental import attempt_load
+from utils.downloads import attempt_download
+from utils.general import LOGGER, colorstr
+from utils.torch_utils import de_parallel
+
+AUGMENT_HYPS = (  # random per batch, teacher cache entries of augmented images never repeat
+    "mosaic",
+    "mixup",
+    "copy_paste",
+    "degrees",
+    "translate",
+    "scale",
+    "shear",
+    "perspective",
+    "flipud",
+    "fliplr",
+    "hsv_h",
+    "hsv_s",
+    "hsv_v",
+)
+
+
+def augmentations(hyp, rect=False):
+    """Returns the names of the random augmentations `hyp` enables; `rect` training loads no mosaics."""
+    return [k for k in AUGMENT_HYPS if hyp.get(k, 0) > 0 and not (rect and k in {"mosaic", "mixup", "copy_paste"})]
+
+
+def attention(x):
+    """Returns the L2-normalized spatial attention map (channel mean of squared activations) of (b, c, h, w) x."""
+    return F.normalize(x.float().pow(2).mean(1).flatten(1))
+
+
+class Teacher:
+    """Frozen teacher model producing per-anchor soft targets, and optionally attention maps, for a student batch."""
+
+    def __init__(self, weights, student, device, features=False, cache="", augment=()):
+        """
+        Loads `weights` and checks its Detect head lines up with the student's anchor for anchor.
+
+        `augment` lists the active augmentations (see augmentations()); any disables `cache`.
+        """
+        self.model = attempt_load(weights, device=device, fuse=True)
+        self.model.requires_grad_(False)
+        self.model.model[-1].train()  # Detect returns the raw per-layer logits, nothing else depends on train mode
+        t, s = self.model.model[-1], de_parallel(student).model[-1]
+        assert (t.nl, t.na, t.nc) == (s.nl, s.na, s.nc), (
+            f"teacher Detect (nl, na, nc)={(t.nl, t.na, t.nc)} does not match the student's {(s.nl, s.na, s.nc)}"
+        )
+        assert torch.equal(t.stride.cpu(), s.stride.cpu()), f"teacher strides {t.stride} differ from {s.stride}"
+        if not torch.allclose(
+            t.anchors.cpu() * t.stride.cpu().view(-1, 1, 1), s.anchors.cpu() * s.stride.cpu().view(-1, 1, 1)
+        ):
+            LOGGER.warning("WARNING ⚠️ teacher and student anchors differ, soft targets match by anchor index")
+        self.features = features
+        self.student_attention = None  # set by watch() during the student forward
+        self.hits = self.misses = self.epochs = 0
+        self.cache = None
+        if cache and augment:
+            LOGGER.warning(
+                f"WARNING ⚠️ teacher cache disabled, augmentation ({', '.join(augment)}) makes every batch a miss; "
+                "train with e.g. hyp.no-augmentation.yaml to use it"
+            )
+        elif cache:
+            w = Path(attempt_download(weights))  # where attempt_load() found or downloaded the weights
+            digest = hashlib.sha1(w.read_bytes()).hexdigest()[:16]  # cache entries belong to one teacher
+            self.cache = Path(cache) / f"{w.stem}-{digest}"
+            self.cache.mkdir(parents=True, exist_ok=True)
+        LOGGER.info(
+            f"{colorstr('distill:')} teacher {weights}"
+            + (" with attention maps" if features else "")
+            + (f", cache {self.cache}" if self.cache else "")
+        )
+
+    @staticmethod
+    def keys(imgs):
+        """Returns a content hash of each uint8 image in a dataloader batch, the per-image cache key."""
+        return [hashlib.sha1(im.numpy().tobytes()).hexdigest() for im in imgs]
+
+    @contextlib.contextmanager
+    def watch(self, student):
+        """Captures the attention maps of the student's Detect inputs during a forward pass, if features are used."""
+        if not self.features:
+            yield
+            return
+
+        def hook(m, args):
+            self.student_attention = [attention(x) for x in args[0]]
+
+        h = de_parallel(student).model[-1].register_forward_pre_hook(hook)  # removed again, checkpoints stay clean
+        try:
+            yield
+        finally:
+            h.remove()
+
+    def __call__(self, imgs, keys=None):
+        """
+        Returns soft targets for a normalized batch: {'logits': per layer (b, na, ny, nx, 1 + nc) teacher objectness and
+        class logits, 'attention': per layer (student, teacher) maps or None}. `keys` from Teacher.keys() enable the
+        disk cache.
+        """
+        size = "x".join(map(str, imgs.shape[2:]))
+        entries = [None] * len(imgs)
+        if self.cache and keys:
+            for i, k in enumerate(keys):
+                f = self.cache / f"{k}_{size}.pt"
+                if f.is_file():
+                    e = torch.load(f, map_location=imgs.device)
+                    if not self.features or "attention" in e:
+                        entries[i] = e
+        miss = [i for i, e in enumerate(entries) if e is None]
+        self.hits += len(entries) - len(miss)
+        self.misses += len(miss)
+        if miss:
+            for i, e in zip(miss, self._run(imgs[miss])):
+                entries[i] = e
+                if self.cache and keys:
+                    f = self.cache / f"{keys[i]}_{size}.pt"
+                    torch.save(e, f.with_suffix(".tmp"))
+                    os.replace(f.with_suffix(".tmp"), f)  # atomic, DDP ranks may write the same entry
+        logits = [torch.stack([e["logits"][j] for e in entries]).float() for j in range(len(entries[0]["logits"]))]
+        soft = {"logits": logits, "attention": None}
+        if self.features:
+            teacher = [torch.stack([e["attention"][j] for e in entries]) for j in range(len(logits))]
+            soft["attention"] = list(zip(self.student_attention, teacher))
+        return soft
+
+    @torch.no_grad()
+    def _run(self, imgs):
+        """Runs the teacher on `imgs` and returns one cache entry (FP16 tensors) per image."""
+        maps = []
+
+        def hook(m, args):
+            maps.extend(attention(x) for x in args[0])
+
+        h = self.model.model[-1].register_forward_pre_hook(hook) if self.features else None
+        try:
+            x = self.model(imgs)
+        finally:
+            if h:
+                h.remove()
+        entries = [{"logits": [xi[b, ..., 4:].half() for xi in x]} for b in range(len(imgs))]
+        if self.features:
+            for b, e in enumerate(entries):
+                e["attention"] = [a[b].half() for a in maps]
+        return entries
+
+    def log_cache(self):
+        """Logs and resets the cache hit counts of the epoch."""
+        if self.cache:
+            n = self.hits + self.misses
+            LOGGER.info(f"{colorstr('distill:')} teacher cache {self.hits}/{n} hits")
+            if self.epochs and n and not self.hits:  # inputs never repeat, stop writing entries nobody reads
+                LOGGER.warning("WARNING ⚠️ teacher cache disabled, an epoch after the first had no hits")
+                self.cache = None
+        self.hits = self.misses = 0
+        self.epochs += 1
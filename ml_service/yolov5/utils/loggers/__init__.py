@@ -102,6 +102,8 @@ class Loggers:
             "x/lr1",
             "x/lr2",
         ]  # params
+        if getattr(opt, "teacher", "") and getattr(opt, "distill_feat", 0) > 0:
+            self.keys.append("train/feat_loss")  # last, the positional columns above stay put
         self.best_keys = ["best/epoch", "best/precision", "best/recall", "best/mAP_0.5", "best/mAP_0.5:0.95"]
         for k in LOGGERS:
             setattr(self, k, None)  # init empty logger dictionary
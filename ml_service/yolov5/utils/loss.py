@@ -136,8 +136,13 @@ class ComputeLoss:
         self.anchors = m.anchors
         self.device = device
 
-    def __call__(self, p, targets):  # predictions, targets
-        """Performs forward pass, calculating class, box, and object loss for given predictions and targets."""
+    def __call__(self, p, targets, soft=None):  # predictions, targets, teacher soft targets
+        """
+        Performs forward pass, calculating class, box, and object loss for given predictions and targets.
+
+        With `soft` targets from utils.distill.Teacher and hyp['distill'] > 0, distillation terms are added to the
+        objectness and class losses, and an attention-map term (hyp['distill_feat']) to the total.
+        """
         lcls = torch.zeros(1, device=self.device)  # class loss
         lbox = torch.zeros(1, device=self.device)  # box loss
         lobj = torch.zeros(1, device=self.device)  # object loss
@@ -181,12 +186,43 @@ class ComputeLoss:
 
         if self.autobalance:
             self.balance = [x / self.balance[self.ssi] for x in self.balance]
+        lfeat = torch.zeros(1, device=self.device)  # feature (attention map) distillation loss
+        if soft is not None:
+            lobj_kd, lcls_kd, lfeat = self.distill(p, soft)
+            lobj += lobj_kd
+            lcls += lcls_kd
         lbox *= self.hyp["box"]
         lobj *= self.hyp["obj"]
         lcls *= self.hyp["cls"]
         bs = tobj.shape[0]  # batch size
 
-        return (lbox + lobj + lcls) * bs, torch.cat((lbox, lobj, lcls)).detach()
+        items = (lbox, lobj, lcls, lfeat) if soft is not None and soft["attention"] is not None else (lbox, lobj, lcls)
+        return (lbox + lobj + lcls + lfeat) * bs, torch.cat(items).detach()
+
+    def distill(self, p, soft):
+        """
+        Returns the (objectness, class, feature) distillation losses of student predictions `p` against teacher `soft`
+        targets.
+
+        Objectness matches the teacher's sigmoid at every anchor, weighted like the hard objectness loss per layer.
+        Class logits match the teacher's where the teacher sees an object, weighted by its objectness. Both use
+        temperature hyp['distill_t'] (logits / T, loss * T^2). Attention maps of the Detect inputs are compared by L2.
+        """
+        w, t = self.hyp.get("distill", 0.0), self.hyp.get("distill_t", 1.0)
+        lobj, lcls, lfeat = (torch.zeros(1, device=self.device) for _ in range(3))
+        bce = nn.functional.binary_cross_entropy_with_logits
+        for i, (pi, ti) in enumerate(zip(p, soft["logits"])):
+            pobj, pcls = pi[..., 4].float() / t, pi[..., 5:].float() / t
+            tobj, tcls = ti[..., 0] / t, ti[..., 1:] / t
+            lobj += bce(pobj, tobj.sigmoid()) * self.balance[i]
+            if self.nc > 1:
+                conf = ti[..., 0].sigmoid()  # teacher objectness, focuses class matching on objects
+                lcls += (bce(pcls, tcls.sigmoid(), reduction="none").mean(-1) * conf).sum() / conf.sum().clamp(1)
+        if soft["attention"]:
+            for s, a in soft["attention"]:
+                lfeat += (s - a.float()).pow(2).sum(1).mean()
+            lfeat *= self.hyp.get("distill_feat", 0.0)
+        return lobj * w * t * t, lcls * w * t * t, lfeat
 
     def build_targets(self, p, targets):
         """Prepares model targets from input targets (image,class,x,y,w,h) for loss computation, returning class, box,
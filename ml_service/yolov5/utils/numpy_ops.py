@@ -0,0 +1,219 @@
+# Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
+"""
+NumPy versions of YOLOv5 pre- and post-processing, for running exported models (ONNX, OpenVINO, TFLite) without torch.
+
+Outputs match the torch functions in utils/general.py and AutoShape for the same raw predictions.
+
+Usage:
+    from utils.numpy_ops import non_max_suppression, preprocess, scale_boxes
+
+    x, shape0, shape1 = preprocess([im], size=640, stride=32)  # im: HWC uint8 RGB
+    y = non_max_suppression(session.run(None, {"images": x})[0], 0.25, 0.45)
+    for det, s in zip(y, shape0):
+        scale_boxes(shape1, det[:, :4], s)
+"""
+
+import math
+
+import cv2
+import numpy as np
+
+
+def make_divisible(x, divisor):
+    """Adjusts `x` to be divisible by `divisor`, returning the nearest greater or equal value."""
+    return math.ceil(x / divisor) * divisor
+
+
+def letterbox(im, new_shape=(640, 640), color=(114, 114, 114), auto=True, scaleFill=False, scaleup=True, stride=32):
+    """Resizes and pads image to new_shape with stride-multiple constraints, returns resized image, ratio, padding."""
+    shape = im.shape[:2]  # current shape [height, width]
+    if isinstance(new_shape, int):
+        new_shape = (new_shape, new_shape)
+
+    # Scale ratio (new / old)
+    r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
+    if not scaleup:  # only scale down, do not scale up (for better val mAP)
+        r = min(r, 1.0)
+
+    # Compute padding
+    ratio = r, r  # width, height ratios
+    new_unpad = int(round(shape[1] * r)), int(round(shape[0] * r))
+    dw, dh = new_shape[1] - new_unpad[0], new_shape[0] - new_unpad[1]  # wh padding
+    if auto:  # minimum rectangle
+        dw, dh = np.mod(dw, stride), np.mod(dh, stride)  # wh padding
+    elif scaleFill:  # stretch
+        dw, dh = 0.0, 0.0
+        new_unpad = (new_shape[1], new_shape[0])
+        ratio = new_shape[1] / shape[1], new_shape[0] / shape[0]  # width, height ratios
+
+    dw /= 2  # divide padding into 2 sides
+    dh /= 2
+
+    if shape[::-1] != new_unpad:  # resize
+        im = cv2.resize(im, new_unpad, interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    im = cv2.copyMakeBorder(im, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)  # add border
+    return im, ratio, (dw, dh)
+
+
+def bucket_shape(shape, buckets=None):
+    """Returns the smallest (h, w) bucket that fits inference `shape`, or `shape` itself if none does."""
+    fits = [b for b in buckets or () if b[0] >= shape[0] and b[1] >= shape[1]]
+    return list(min(fits, key=lambda b: b[0] * b[1])) if fits else shape
+
+
+def letterbox_into(im, out, color=(114, 114, 114)):
+    """Letterboxes HWC `im` into the preallocated HWC array `out`, with the rounding of `letterbox(auto=False)`."""
+    shape, (h, w) = im.shape[:2], out.shape[:2]
+    r = min(h / shape[0], w / shape[1])
+    nw, nh = int(round(shape[1] * r)), int(round(shape[0] * r))
+    top, left = int(round((h - nh) / 2 - 0.1)), int(round((w - nw) / 2 - 0.1))
+    out[:top] = color  # pad only the border, the rest is overwritten
+    out[top + nh :] = color
+    out[top : top + nh, :left] = color
+    out[top : top + nh, left + nw :] = color
+    inner = out[top : top + nh, left : left + nw]
+    if (nw, nh) != shape[::-1]:  # resize straight into the canvas
+        resized = cv2.resize(im, (nw, nh), dst=inner, interpolation=cv2.INTER_LINEAR)
+        if resized.ctypes.data != inner.ctypes.data:  # OpenCV could not write into the view
+            inner[...] = resized
+    else:
+        inner[...] = im
+    return out
+
+
+def preprocess(ims, size=640, stride=32, buckets=None, uint8=False):
+    """
+    AutoShape pre-processing of HWC uint8 RGB arrays, padded up to the nearest of `buckets` if given.
+
+    Returns the (b, 3, h, w) float32 batch scaled to 0-1 (uint8 0-255 for models exported with `--uint8`), the
+    original (h, w) of each image and the inference (h, w).
+    """
+    size = (size, size) if isinstance(size, int) else size
+    shape0 = [im.shape[:2] for im in ims]  # image shapes
+    shape1 = [[int(y * max(size) / max(s)) for y in s] for s in shape0]  # scaled to the long side
+    shape1 = bucket_shape([make_divisible(x, stride) for x in np.array(shape1).max(0)], buckets)  # inference shape
+    x = np.stack([letterbox(im, shape1, auto=False)[0] for im in ims]).transpose((0, 3, 1, 2))  # BHWC to BCHW
+    if uint8:
+        return np.ascontiguousarray(x), shape0, shape1
+    return np.ascontiguousarray(x, dtype=np.float32) / 255, shape0, shape1
+
+
+def xywh2xyxy(x):
+    """Convert nx4 boxes from [x, y, w, h] to [x1, y1, x2, y2] where xy1=top-left, xy2=bottom-right."""
+    y = np.copy(x)
+    y[..., 0] = x[..., 0] - x[..., 2] / 2  # top left x
+    y[..., 1] = x[..., 1] - x[..., 3] / 2  # top left y
+    y[..., 2] = x[..., 0] + x[..., 2] / 2  # bottom right x
+    y[..., 3] = x[..., 1] + x[..., 3] / 2  # bottom right y
+    return y
+
+
+def nms(boxes, scores, iou_thres):
+    """Greedy NMS with torchvision.ops.nms semantics: indices of kept boxes by decreasing score."""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while order.size:
+        i, order = order[0], order[1:]
+        keep.append(i)
+        w = (np.minimum(x2[i], x2[order]) - np.maximum(x1[i], x1[order])).clip(0)
+        h = (np.minimum(y2[i], y2[order]) - np.maximum(y1[i], y1[order])).clip(0)
+        inter = w * h
+        order = order[~(inter / (areas[i] + areas[order] - inter) > iou_thres)]
+    return np.array(keep, dtype=np.int64)
+
+
+def _image_rank(b, bs):
+    """Returns each row's position within its image for rows grouped by sorted image index `b`."""
+    counts = np.bincount(b, minlength=bs)
+    return np.arange(len(b)) - (counts.cumsum() - counts)[b]
+
+
+def non_max_suppression(
+    prediction, conf_thres=0.25, iou_thres=0.45, classes=None, agnostic=False, multi_label=False, max_det=300, nm=0
+):
+    """
+    Non-Maximum Suppression on a (b, n, 5 + nc + nm) prediction array, as `utils.general.non_max_suppression`.
+
+    Returns:
+         list of detections, on (n,6) array per image [xyxy, conf, cls]
+    """
+    assert 0 <= conf_thres <= 1, f"Invalid Confidence threshold {conf_thres}, valid values are between 0.0 and 1.0"
+    assert 0 <= iou_thres <= 1, f"Invalid IoU {iou_thres}, valid values are between 0.0 and 1.0"
+    if isinstance(prediction, (list, tuple)):  # first output only
+        prediction = prediction[0]
+
+    bs = prediction.shape[0]  # batch size
+    nc = prediction.shape[2] - nm - 5  # number of classes
+    max_wh = 7680  # (pixels) maximum box width and height
+    max_nms = 30000  # maximum number of boxes per image into nms()
+    multi_label &= nc > 1  # multiple labels per box
+    mi = 5 + nc  # mask start index
+
+    b, a = np.nonzero(prediction[..., 4] > conf_thres)  # image index, anchor index of every candidate
+    x = prediction[b, a].astype(np.float32)  # candidates of all images, image by image
+    x[:, 5:] *= x[:, 4:5]  # conf = obj_conf * cls_conf
+    box = xywh2xyxy(x[:, :4])
+    mask = x[:, mi:]
+
+    # Detections matrix nx6 (xyxy, conf, cls)
+    if multi_label:
+        i, j = np.nonzero(x[:, 5:mi] > conf_thres)
+        x, b = np.concatenate((box[i], x[i, 5 + j, None], j[:, None].astype(np.float32), mask[i]), 1), b[i]
+    else:  # best class only
+        j = x[:, 5:mi].argmax(1)
+        conf = np.take_along_axis(x[:, 5:mi], j[:, None], 1)
+        i = conf[:, 0] > conf_thres
+        x, b = np.concatenate((box, conf, j[:, None].astype(np.float32), mask), 1)[i], b[i]
+
+    # Filter by class
+    if classes is not None:
+        i = (x[:, 5:6] == np.array(classes)).any(1)
+        x, b = x[i], b[i]
+
+    if not x.shape[0]:  # no boxes
+        return [np.zeros((0, 6 + nm), dtype=np.float32) for _ in range(bs)]
+    i = np.argsort(-x[:, 4], kind="stable")  # sort by confidence...
+    i = i[np.argsort(b[i], kind="stable")]  # ...within each image
+    x, b = x[i], b[i]
+    i = _image_rank(b, bs) < max_nms  # remove excess boxes
+    x, b = x[i], b[i]
+
+    c = x[:, 5:6] * (0 if agnostic else max_wh)  # classes
+    boxes = x[:, :4] + c  # boxes (offset by class)
+    ib = b.astype(np.float64)[:, None] * (float(boxes.max()) - float(boxes.min()) + 1)  # images never overlap
+    i = nms(boxes.astype(np.float64) + ib, x[:, 4].astype(np.float64), iou_thres)
+    i.sort()  # back to image order, by confidence within each image
+    i = i[_image_rank(b[i], bs) < max_det]  # limit detections
+    return np.split(x[i], np.bincount(b[i], minlength=bs).cumsum()[:-1])
+
+
+def clip_boxes(boxes, shape):
+    """Clips bounding box coordinates (xyxy) to fit within the specified image shape (height, width)."""
+    boxes[..., [0, 2]] = boxes[..., [0, 2]].clip(0, shape[1])  # x1, x2
+    boxes[..., [1, 3]] = boxes[..., [1, 3]].clip(0, shape[0])  # y1, y2
+
+
+def scale_boxes(img1_shape, boxes, img0_shape, ratio_pad=None):
+    """Rescales (xyxy) bounding boxes from img1_shape to img0_shape, optionally using provided `ratio_pad`."""
+    if ratio_pad is None:  # calculate from img0_shape
+        gain = min(img1_shape[0] / img0_shape[0], img1_shape[1] / img0_shape[1])  # gain  = old / new
+        pad = (img1_shape[1] - img0_shape[1] * gain) / 2, (img1_shape[0] - img0_shape[0] * gain) / 2  # wh padding
+    else:
+        gain = ratio_pad[0][0]
+        pad = ratio_pad[1]
+
+    boxes[..., [0, 2]] -= pad[0]  # x padding
+    boxes[..., [1, 3]] -= pad[1]  # y padding
+    boxes[..., :4] /= gain
+    clip_boxes(boxes, img0_shape)
+    return boxes
+
+
+def xyxy_records(det, names):
+    """Returns (n, 6) detections as the records of `Detections.pandas().xyxy[i].to_dict(orient='records')`."""
+    columns = "xmin", "ymin", "xmax", "ymax", "confidence", "class", "name"
+    return [dict(zip(columns, x[:5] + [int(x[5]), names[int(x[5])]])) for x in det.tolist()]
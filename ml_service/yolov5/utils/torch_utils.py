@@ -43,6 +43,14 @@ def smart_inference_mode(torch_1_9=check_version(torch.__version__, "1.9.0")):
     return decorate
 
 
+def cpu_bf16_supported():
+    """Returns True if oneDNN has native bfloat16 kernels on this CPU (AVX512-BF16 or AMX), else False."""
+    try:
+        return torch.backends.mkldnn.is_available() and torch.ops.mkldnn._is_mkldnn_bf16_supported()
+    except (AttributeError, RuntimeError):  # torch<1.13 or no oneDNN build
+        return False
+
+
 def smartCrossEntropyLoss(label_smoothing=0.0):
     """Returns a CrossEntropyLoss with optional label smoothing for torch>=1.10.0; warns if smoothing on lower
     versions.
@@ -298,6 +306,8 @@ def model_info(model, verbose=False, imgsz=640):
     """
     Prints model summary including layers, parameters, gradients, and FLOPs; imgsz may be int or list.
 
+    Returns (parameters, gradients, GFLOPs at imgsz), GFLOPs None if thop could not profile the model.
+
     Example: img_size=640 or img_size=[640, 320]
     """
     n_p = sum(x.numel() for x in model.parameters())  # number parameters
@@ -317,17 +327,19 @@ def model_info(model, verbose=False, imgsz=640):
         im = torch.empty((1, p.shape[1], stride, stride), device=p.device)  # input image in BCHW format
         flops = thop.profile(deepcopy(model), inputs=(im,), verbose=False)[0] / 1e9 * 2  # stride GFLOPs
         imgsz = imgsz if isinstance(imgsz, list) else [imgsz, imgsz]  # expand if int/float
-        fs = f", {flops * imgsz[0] / stride * imgsz[1] / stride:.1f} GFLOPs"  # 640x640 GFLOPs
+        gflops = flops * imgsz[0] / stride * imgsz[1] / stride  # 640x640 GFLOPs
+        fs = f", {gflops:.1f} GFLOPs"
     except Exception:
-        fs = ""
+        gflops, fs = None, ""
 
     name = Path(model.yaml_file).stem.replace("yolov5", "YOLOv5") if hasattr(model, "yaml_file") else "Model"
     LOGGER.info(f"{name} summary: {len(list(model.modules()))} layers, {n_p} parameters, {n_g} gradients{fs}")
+    return n_p, n_g, gflops
 
 
-def scale_img(img, ratio=1.0, same_shape=False, gs=32):  # img(16,3,256,416)
+def scale_img(img, ratio=1.0, same_shape=False, gs=32, value=0.447):  # img(16,3,256,416)
     """Scales an image tensor `img` of shape (bs,3,y,x) by `ratio`, optionally maintaining the original shape, padded to
-    multiples of `gs`.
+    multiples of `gs` with `value`.
     """
     if ratio == 1.0:
         return img
@@ -336,7 +348,7 @@ def scale_img(img, ratio=1.0, same_shape=False, gs=32):  # img(16,3,256,416)
     img = F.interpolate(img, size=s, mode="bilinear", align_corners=False)  # resize
     if not same_shape:  # pad/crop img
         h, w = (math.ceil(x * ratio / gs) * gs for x in (h, w))
-    return F.pad(img, [0, w - s[1], 0, h - s[0]], value=0.447)  # value = imagenet mean
+    return F.pad(img, [0, w - s[1], 0, h - s[0]], value=value)  # value = imagenet mean
 
 
 def copy_attr(a, b, include=(), exclude=()):